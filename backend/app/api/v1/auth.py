@@ -2,11 +2,12 @@ from datetime import timedelta
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import get_settings
-from app.core.database import get_session
+from app.core.database import get_async_session
 from app.core.security import create_access_token # type: ignore
+from app.core.supabase import SupabaseAuthClient, get_supabase_client
 from app.services.user_service import register_user, authenticate_user # type: ignore
 from app.schemas.user import UserRegister, UserLogin, UserResponse, Token, ErrorResponse
 
@@ -20,18 +21,24 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
     status_code=status.HTTP_201_CREATED,
     responses={
         status.HTTP_400_BAD_REQUEST: {"model": ErrorResponse, "description": "Bad Request"},
+        status.HTTP_409_CONFLICT: {"model": ErrorResponse, "description": "Idempotency-Key in progress"},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": ErrorResponse, "description": "Idempotency-Key reused"},
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": ErrorResponse, "description": "Server Error"},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"model": ErrorResponse, "description": "Auth Provider Unavailable"},
     },
 )
 async def register(
     user_data: UserRegister,
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    supabase: Annotated[SupabaseAuthClient, Depends(get_supabase_client)]
 ):
     """
     Endpoint para registrar um novo usuário.
+    Com o cabeçalho Idempotency-Key, repetições da mesma requisição recebem a resposta da
+    primeira (sem registrar de novo no Supabase).
     """
     try:
-        new_user = await register_user(user_data, db)
+        new_user = await register_user(user_data, db, supabase)
         return new_user
     except HTTPException as e:
         raise e # Relança as exceções HTTP com seus detalhes
@@ -47,17 +54,19 @@ async def register(
     responses={
         status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": ErrorResponse, "description": "Server Error"},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"model": ErrorResponse, "description": "Auth Provider Unavailable"},
     },
 )
 async def login(
     user_data: UserLogin,
-    db: Annotated[Session, Depends(get_session)]
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    supabase: Annotated[SupabaseAuthClient, Depends(get_supabase_client)]
 ):
     """
     Endpoint para login de usuário. Retorna um token JWT.
     """
     try:
-        auth_result = await authenticate_user(user_data, db)
+        auth_result = await authenticate_user(user_data, db, supabase)
         access_token = auth_result["access_token"]
         # user_id = auth_result["user_id"] # Se precisar usar o ID do usuário para criar um token interno
 
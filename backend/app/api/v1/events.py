@@ -0,0 +1,81 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.events import EventHub, Subscription, format_sse, get_event_hub
+from app.core.query_budget import query_budget
+from app.core.security import get_current_user_id
+from app.schemas.user import ErrorResponse
+
+settings = get_settings()
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+# Intervalo de reconexão sugerido ao EventSource
+RECONNECT_MS = 3000
+
+class EventStreamResponse(StreamingResponse):
+    """
+    Resposta SSE que sempre libera a assinatura ao terminar. O finally do gerador não basta:
+    se o cliente desconecta antes da primeira iteração (ainda no envio dos cabeçalhos),
+    o gerador nunca começa e a vaga da conexão ficaria ocupada até o limite dar 429.
+    """
+
+    def __init__(self, hub: EventHub, subscription: Subscription, content, **kwargs):
+        super().__init__(content, **kwargs)
+        self.hub = hub
+        self.subscription = subscription
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.hub.unsubscribe(self.subscription)
+
+@router.get(
+    "",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {"content": {"text/event-stream": {}}, "description": "Server-Sent Events"},
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_429_TOO_MANY_REQUESTS: {"model": ErrorResponse, "description": "Too many open connections"},
+    },
+)
+@query_budget(0)
+async def stream(
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    hub: Annotated[EventHub, Depends(get_event_hub)],
+):
+    """
+    Eventos do usuário autenticado (Server-Sent Events), em vez de consultar a API em loop:
+    - "post": {id, action: created|updated|deleted, status, scheduled_at}
+    - "media": {id, action: created|updated|deleted, derivatives_status}
+    - "posts": {action: imported, inserted} (importação em massa)
+    - "resync": eventos foram descartados; recarregue os dados pela API.
+    Cada evento traz o estado mais recente do recurso (mudanças seguidas são agrupadas).
+    Ao (re)conectar, carregue os dados pela API e aplique os eventos recebidos a partir daí.
+    """
+    # Assina antes de responder, para o limite de conexões ainda poder devolver 429
+    subscription = hub.subscribe(current_user_id)
+
+    async def body():
+        yield f"retry: {RECONNECT_MS}\n: connected\n\n"
+        while True:
+            batch = await subscription.next_batch(settings.EVENTS_HEARTBEAT_SECONDS, settings.EVENTS_COALESCE_SECONDS)
+            if batch is None:
+                yield ": ping\n\n"
+                continue
+            yield "".join(format_sse(item["event"], item["data"]) for item in batch)
+
+    return EventStreamResponse(
+        hub,
+        subscription,
+        body(),
+        media_type="text/event-stream",
+        # Sem cache e sem buffer em proxies (nginx), para os eventos chegarem na hora
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
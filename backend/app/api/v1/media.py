@@ -0,0 +1,370 @@
+from typing import Annotated, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import get_async_session
+from app.core.query_budget import query_budget
+from app.core.security import get_current_user_id
+from app.core.storage import StorageBackend, get_storage
+from app.schemas.media import (
+    MediaDerivativeResponse,
+    MediaFromHash,
+    MediaPage,
+    MediaResponse,
+    UploadFinalize,
+    UploadSessionCreate,
+    UploadSessionResponse,
+)
+from app.schemas.user import ErrorResponse
+from app.services.derivative_service import get_derivative, list_derivatives
+from app.services.media_service import (
+    abort_upload,
+    append_upload_chunk,
+    create_media_from_hash,
+    create_upload_session,
+    delete_media,
+    finalize_upload,
+    get_media,
+    get_upload_session,
+    list_media,
+    session_to_response,
+    upload_media_stream,
+)
+
+settings = get_settings()
+
+router = APIRouter(prefix="/media", tags=["Media"])
+
+def media_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail={"code": "NOT_FOUND", "message": "Mídia não encontrada."}
+    )
+
+# --- Upload retomável (sessão + blocos + finalize) ---
+
+@router.post(
+    "/uploads",
+    response_model=UploadSessionResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE: {"model": ErrorResponse, "description": "Payload Too Large"},
+    },
+)
+async def start_upload(
+    data: UploadSessionCreate,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    """
+    Abre uma sessão de upload retomável. Envie os bytes com PUT /media/uploads/{id}?offset=N.
+    """
+    upload = await create_upload_session(current_user_id, data, db)
+    return session_to_response(upload)
+
+@router.get(
+    "/uploads/{upload_id}",
+    response_model=UploadSessionResponse,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponse, "description": "Upload not found"},
+    },
+)
+async def read_upload(
+    upload_id: UUID,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    """
+    Retorna o estado da sessão, incluindo o offset de onde o envio deve continuar.
+    """
+    upload = await get_upload_session(current_user_id, upload_id, db)
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "NOT_FOUND", "message": "Sessão de upload não encontrada."}
+        )
+    return session_to_response(upload)
+
+@router.put(
+    "/uploads/{upload_id}",
+    response_model=UploadSessionResponse,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponse, "description": "Upload not found"},
+        status.HTTP_409_CONFLICT: {"model": ErrorResponse, "description": "Offset mismatch or upload in progress"},
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE: {"model": ErrorResponse, "description": "Payload Too Large"},
+    },
+)
+async def upload_chunk(
+    upload_id: UUID,
+    request: Request,
+    offset: Annotated[int, Query(ge=0, description="Offset do primeiro byte deste bloco.")],
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    storage: Annotated[StorageBackend, Depends(get_storage)]
+):
+    """
+    Envia um bloco do arquivo no corpo da requisição (bytes crus, sem multipart).
+    O corpo é transmitido direto para o storage, sem ser carregado em memória.
+    """
+    upload = await append_upload_chunk(current_user_id, upload_id, offset, request.stream(), db, storage)
+    return session_to_response(upload)
+
+@router.post(
+    "/uploads/{upload_id}/complete",
+    response_model=MediaResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponse, "description": "Upload not found"},
+        status.HTTP_409_CONFLICT: {
+            "model": ErrorResponse, "description": "Incomplete upload, upload in progress or upload lost"
+        },
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": ErrorResponse, "description": "Checksum mismatch"},
+    },
+)
+async def complete_upload(
+    upload_id: UUID,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
+    data: Optional[UploadFinalize] = None,
+):
+    """
+    Finaliza o upload e cria a mídia. O SHA-256 já foi calculado durante o envio.
+    Se a finalização falhar no meio, a sessão fica em 'finalizing' (não aceita mais blocos)
+    e pode ser finalizada de novo.
+    """
+    return await finalize_upload(
+        current_user_id, upload_id, db, storage, expected_sha256=data.sha256 if data else None
+    )
+
+@router.delete(
+    "/uploads/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponse, "description": "Upload not found"},
+        status.HTTP_409_CONFLICT: {"model": ErrorResponse, "description": "Upload in progress"},
+    },
+)
+async def cancel_upload(
+    upload_id: UUID,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    storage: Annotated[StorageBackend, Depends(get_storage)]
+):
+    """
+    Cancela o upload e descarta os bytes já recebidos.
+    """
+    await abort_upload(current_user_id, upload_id, db, storage)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+# --- Mídias ---
+
+@router.post(
+    "",
+    response_model=MediaResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE: {"model": ErrorResponse, "description": "Payload Too Large"},
+    },
+)
+async def upload(
+    request: Request,
+    filename: Annotated[str, Query(min_length=1, max_length=255)],
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    storage: Annotated[StorageBackend, Depends(get_storage)],
+    content_type: Annotated[str, Header()] = "application/octet-stream",
+):
+    """
+    Upload em uma única requisição (arquivos pequenos): o corpo cru é transmitido
+    direto para o storage. Para arquivos grandes, prefira o upload retomável.
+    """
+    return await upload_media_stream(current_user_id, filename, content_type, request.stream(), db, storage)
+
+@router.post(
+    "/from-hash",
+    response_model=MediaResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponse, "description": "Content not stored yet"},
+    },
+)
+async def create_from_hash(
+    data: MediaFromHash,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    """
+    Cria a mídia sem reenviar os bytes quando o conteúdo (mesmo SHA-256) já está na
+    biblioteca do usuário (ex: o mesmo arquivo em outro post).
+    Responde 404 se o usuário ainda não tem esse conteúdo; nesse caso, faça o upload normalmente.
+    """
+    media = await create_media_from_hash(current_user_id, data.sha256, data.filename, data.content_type, db)
+    if not media:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "BLOB_NOT_FOUND", "message": "Conteúdo ainda não armazenado; faça o upload."}
+        )
+    return media
+
+@router.get(
+    "",
+    response_model=MediaPage,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+    },
+)
+@query_budget(1)
+async def list_(
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+    cursor: Optional[str] = None,
+):
+    """
+    Lista a biblioteca de mídia do usuário (mais recentes primeiro).
+    """
+    items, next_cursor = await list_media(current_user_id, db, limit=limit, cursor=cursor)
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get(
+    "/{media_id}",
+    response_model=MediaResponse,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponse, "description": "Media not found"},
+    },
+)
+@query_budget(1)
+async def read(
+    media_id: UUID,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    """
+    Retorna os metadados de uma mídia.
+    """
+    media = await get_media(current_user_id, media_id, db)
+    if not media:
+        raise media_not_found()
+    return media
+
+@router.get(
+    "/{media_id}/content",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponse, "description": "Media not found"},
+    },
+)
+async def download(
+    media_id: UUID,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    storage: Annotated[StorageBackend, Depends(get_storage)]
+):
+    """
+    Transmite o conteúdo da mídia em blocos.
+    """
+    media = await get_media(current_user_id, media_id, db)
+    if not media:
+        raise media_not_found()
+    return StreamingResponse(
+        storage.read(media.storage_key, settings.MEDIA_CHUNK_SIZE),
+        media_type=media.content_type,
+        headers={
+            "Content-Length": str(media.size),
+            "ETag": f'"{media.sha256}"',
+        },
+    )
+
+@router.get(
+    "/{media_id}/derivatives",
+    response_model=list[MediaDerivativeResponse],
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponse, "description": "Media not found"},
+    },
+)
+@query_budget(2)
+async def read_derivatives(
+    media_id: UUID,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    """
+    Lista as miniaturas/prévias já geradas (vazia enquanto derivatives_status não for 'ready').
+    """
+    media = await get_media(current_user_id, media_id, db)
+    if not media:
+        raise media_not_found()
+    return await list_derivatives(media.sha256, db)
+
+@router.get(
+    "/{media_id}/derivatives/{kind}",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponse, "description": "Media or derivative not found"},
+    },
+)
+async def download_derivative(
+    media_id: UUID,
+    kind: str,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    storage: Annotated[StorageBackend, Depends(get_storage)]
+):
+    """
+    Transmite uma miniatura/prévia (ex: thumb_256, preview, poster) para a biblioteca de mídia.
+    O conteúdo é imutável (endereçado pelo hash), então pode ficar em cache no navegador.
+    """
+    media = await get_media(current_user_id, media_id, db)
+    if not media:
+        raise media_not_found()
+    derivative = await get_derivative(media.sha256, kind, db)
+    if not derivative:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "DERIVATIVE_NOT_FOUND", "message": "Derivado não disponível (ainda)."}
+        )
+    return StreamingResponse(
+        storage.read(derivative.storage_key, settings.MEDIA_CHUNK_SIZE),
+        media_type=derivative.content_type,
+        headers={
+            "Content-Length": str(derivative.size),
+            "ETag": f'"{media.sha256}-{kind}"',
+            "Cache-Control": "private, max-age=31536000, immutable",
+        },
+    )
+
+@router.delete(
+    "/{media_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponse, "description": "Media not found"},
+    },
+)
+async def delete(
+    media_id: UUID,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    """
+    Remove uma mídia. O conteúdo é apagado quando não houver mais referências a ele.
+    """
+    if not await delete_media(current_user_id, media_id, db):
+        raise media_not_found()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
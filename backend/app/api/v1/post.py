@@ -0,0 +1,497 @@
+import json
+from datetime import date, datetime
+from typing import Annotated, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import CacheBackend, cached_json_response, get_cache, user_cache_key
+from app.core.config import get_settings
+from app.core.database import get_async_session
+from app.core.query_budget import query_budget
+from app.core.security import get_current_user_id
+from app.models.post import PostStatus
+from app.schemas.media import MediaResponse
+from app.schemas.post import (
+    PostCalendarResponse,
+    PostCalendarSummary,
+    PostCreate,
+    PostFileFormat,
+    PostImportResult,
+    PostPage,
+    PostResponse,
+    PostTagSuggestion,
+    PostUpdate,
+)
+from app.schemas.user import ErrorResponse
+from app.services.media_service import attach_media_to_post, detach_media_from_post, get_media, list_post_media
+from app.services.post_service import (
+    create_post,
+    delete_post,
+    get_post,
+    list_posts,
+    list_posts_in_range,
+    parse_fields,
+    update_post,
+)
+from app.services.post_rollup_service import get_calendar_summary
+from app.services.post_search_service import search_posts, suggest_tags
+from app.services.post_transfer_service import MEDIA_TYPES, export_posts, import_posts
+
+settings = get_settings()
+
+router = APIRouter(prefix="/posts", tags=["Posts"])
+
+def post_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail={"code": "NOT_FOUND", "message": "Post não encontrado."}
+    )
+
+FieldsQuery = Annotated[
+    Optional[str],
+    Query(description="Seleção esparsa de campos, separados por vírgula (ex: id,status,scheduled_at)."),
+]
+
+@router.post(
+    "",
+    response_model=PostResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_409_CONFLICT: {"model": ErrorResponse, "description": "Idempotency-Key in progress"},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": ErrorResponse, "description": "Idempotency-Key reused"},
+    },
+)
+async def create(
+    post_data: PostCreate,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    """
+    Cria um novo post para o usuário autenticado.
+    Com o cabeçalho Idempotency-Key, repetições da mesma requisição recebem o post criado
+    pela primeira, em vez de criar outro.
+    """
+    return await create_post(current_user_id, post_data, db)
+
+@router.get(
+    "",
+    response_model=PostPage,
+    response_model_exclude_unset=True,
+    responses={
+        status.HTTP_304_NOT_MODIFIED: {"description": "Not Modified (If-None-Match)"},
+        status.HTTP_400_BAD_REQUEST: {"model": ErrorResponse, "description": "Bad Request"},
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+    },
+)
+@query_budget(1)
+async def list_(
+    request: Request,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    cache: Annotated[CacheBackend, Depends(get_cache)],
+    limit: Annotated[int, Query(ge=1, le=settings.POSTS_PAGE_MAX_SIZE)] = 50,
+    cursor: Annotated[Optional[str], Query(description="Valor de next_cursor da página anterior.")] = None,
+    status_filter: Annotated[Optional[PostStatus], Query(alias="status")] = None,
+    platform: Optional[str] = None,
+    fields: FieldsQuery = None,
+):
+    """
+    Lista os posts do usuário autenticado, ordenados por data de agendamento.
+    Usa paginação por cursor: envie o 'next_cursor' recebido para buscar a próxima página.
+    A resposta tem ETag; com If-None-Match igual, retorna 304 sem corpo.
+    """
+    selected = parse_fields(fields)
+    status_value = status_filter.value if status_filter else None
+
+    async def build() -> bytes:
+        items, next_cursor = await list_posts(
+            current_user_id,
+            db,
+            limit=limit,
+            cursor=cursor,
+            status_filter=status_value,
+            platform=platform,
+            fields=selected,
+        )
+        page = PostPage.model_validate({"items": items, "next_cursor": next_cursor})
+        return page.model_dump_json(exclude_unset=True).encode()
+
+    key = await user_cache_key(cache, current_user_id, "posts", "list", limit, cursor, status_value, platform, selected)
+    return await cached_json_response(request, cache, key, build)
+
+@router.get(
+    "/calendar",
+    response_model=PostCalendarResponse,
+    response_model_exclude_unset=True,
+    responses={
+        status.HTTP_304_NOT_MODIFIED: {"description": "Not Modified (If-None-Match)"},
+        status.HTTP_400_BAD_REQUEST: {"model": ErrorResponse, "description": "Bad Request"},
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+    },
+)
+@query_budget(1)
+async def calendar(
+    request: Request,
+    start: datetime,
+    end: datetime,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    cache: Annotated[CacheBackend, Depends(get_cache)],
+    status_filter: Annotated[Optional[PostStatus], Query(alias="status")] = None,
+    platform: Optional[str] = None,
+    fields: FieldsQuery = None,
+    cursor: Annotated[Optional[str], Query(description="Valor de next_cursor da resposta anterior.")] = None,
+):
+    """
+    Retorna todos os posts agendados em [start, end) (ex: um mês do calendário) numa única consulta.
+    Se o intervalo passar de POSTS_CALENDAR_MAX_ITEMS posts, a resposta traz 'next_cursor'
+    para buscar o restante.
+    A resposta tem ETag; com If-None-Match igual, retorna 304 sem corpo.
+    """
+    selected = parse_fields(fields)
+    status_value = status_filter.value if status_filter else None
+
+    async def build() -> bytes:
+        items, next_cursor = await list_posts_in_range(
+            current_user_id,
+            start,
+            end,
+            db,
+            status_filter=status_value,
+            platform=platform,
+            fields=selected,
+            cursor=cursor,
+        )
+        response = PostCalendarResponse.model_validate(
+            {"start": start, "end": end, "items": items, "next_cursor": next_cursor}
+        )
+        return response.model_dump_json(exclude_unset=True).encode()
+
+    key = await user_cache_key(
+        cache, current_user_id, "posts", "calendar", start.isoformat(), end.isoformat(),
+        status_value, platform, selected, cursor,
+    )
+    return await cached_json_response(request, cache, key, build)
+
+@router.get(
+    "/summary",
+    response_model=PostCalendarSummary,
+    responses={
+        status.HTTP_304_NOT_MODIFIED: {"description": "Not Modified (If-None-Match)"},
+        status.HTTP_400_BAD_REQUEST: {"model": ErrorResponse, "description": "Bad Request"},
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+    },
+)
+@query_budget(1)
+async def summary(
+    request: Request,
+    start: date,
+    end: date,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    cache: Annotated[CacheBackend, Depends(get_cache)],
+    since: Annotated[
+        Optional[int],
+        Query(ge=0, description="'version' de uma resposta anterior: retorna só os dias alterados depois dela."),
+    ] = None,
+):
+    """
+    Resumo do calendário/dashboard em [start, end) (dias UTC, ex: um mês ou trimestre):
+    quantidade de posts por dia, status e rede social, lida dos rollups numa única consulta.
+    A resposta tem ETag; com If-None-Match igual, retorna 304 sem corpo.
+    """
+
+    async def build() -> bytes:
+        data = await get_calendar_summary(current_user_id, start, end, db, since=since)
+        return PostCalendarSummary.model_validate(data).model_dump_json().encode()
+
+    key = await user_cache_key(cache, current_user_id, "posts", "summary", start.isoformat(), end.isoformat(), since)
+    return await cached_json_response(request, cache, key, build)
+
+@router.get(
+    "/search",
+    response_model=PostPage,
+    responses={
+        status.HTTP_304_NOT_MODIFIED: {"description": "Not Modified (If-None-Match)"},
+        status.HTTP_400_BAD_REQUEST: {"model": ErrorResponse, "description": "Bad Request"},
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+    },
+)
+@query_budget(1)
+async def search(
+    request: Request,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    cache: Annotated[CacheBackend, Depends(get_cache)],
+    q: Annotated[
+        Optional[str],
+        Query(max_length=200, description='Texto da legenda: palavras, "frase exata", -excluir, or.'),
+    ] = None,
+    tag: Annotated[
+        list[str],
+        Query(max_length=10, description="Hashtags ('verao', '#verao') e menções ('@marca'); exige todas."),
+    ] = [],
+    limit: Annotated[int, Query(ge=1, le=settings.POSTS_PAGE_MAX_SIZE)] = 20,
+    cursor: Annotated[Optional[str], Query(description="Valor de next_cursor da página anterior.")] = None,
+    status_filter: Annotated[Optional[PostStatus], Query(alias="status")] = None,
+    platform: Optional[str] = None,
+):
+    """
+    Busca posts do usuário autenticado pela legenda e/ou por hashtags e menções, no índice de busca
+    (sem diferenciar maiúsculas nem acentos). Com 'q', os mais relevantes vêm primeiro; só com
+    'tag', os mais recentes. Use o 'next_cursor' recebido para buscar a próxima página.
+    A resposta tem ETag; com If-None-Match igual, retorna 304 sem corpo.
+    """
+    status_value = status_filter.value if status_filter else None
+
+    async def build() -> bytes:
+        items, next_cursor = await search_posts(
+            current_user_id,
+            db,
+            query=q,
+            tags=tag,
+            status_filter=status_value,
+            platform=platform,
+            limit=limit,
+            cursor=cursor,
+        )
+        return PostPage.model_validate({"items": items, "next_cursor": next_cursor}).model_dump_json().encode()
+
+    key = await user_cache_key(cache, current_user_id, "posts", "search", q, tag, limit, cursor, status_value, platform)
+    return await cached_json_response(request, cache, key, build)
+
+@router.get(
+    "/hashtags",
+    response_model=list[PostTagSuggestion],
+    responses={
+        status.HTTP_304_NOT_MODIFIED: {"description": "Not Modified (If-None-Match)"},
+        status.HTTP_400_BAD_REQUEST: {"model": ErrorResponse, "description": "Bad Request"},
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+    },
+)
+@query_budget(1)
+async def hashtags(
+    request: Request,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    cache: Annotated[CacheBackend, Depends(get_cache)],
+    prefix: Annotated[
+        str, Query(max_length=100, description="Início da tag (ex: 'ver', '#ver'); com '@', lista menções.")
+    ] = "",
+    limit: Annotated[int, Query(ge=1, le=50)] = 10,
+):
+    """
+    Autocomplete de hashtags (ou menções) já usadas pelo usuário autenticado, das mais usadas
+    para as menos usadas.
+    A resposta tem ETag; com If-None-Match igual, retorna 304 sem corpo.
+    """
+
+    async def build() -> bytes:
+        suggestions = await suggest_tags(current_user_id, prefix, db, limit=limit)
+        return json.dumps(suggestions, ensure_ascii=False).encode()
+
+    key = await user_cache_key(cache, current_user_id, "posts", "hashtags", prefix, limit)
+    return await cached_json_response(request, cache, key, build)
+
+@router.post(
+    "/import",
+    response_model=PostImportResult,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+    },
+)
+async def import_(
+    request: Request,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    file_format: Annotated[
+        Optional[PostFileFormat],
+        Query(alias="format", description="Se omitido, é deduzido do Content-Type (text/csv ou NDJSON)."),
+    ] = None,
+    content_type: Annotated[str, Header()] = "application/x-ndjson",
+):
+    """
+    Importa posts em massa. O corpo é o próprio arquivo (NDJSON, um post por linha, ou CSV com
+    cabeçalho content,platform,scheduled_at[,status,account_id,id]), lido em streaming.
+    Linhas inválidas são reportadas em 'errors' sem interromper a importação.
+    """
+    if file_format is None:
+        file_format = PostFileFormat.CSV if "csv" in content_type.lower() else PostFileFormat.NDJSON
+    return await import_posts(current_user_id, request.stream(), file_format, db)
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+    },
+)
+@query_budget(1)
+async def export(
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    file_format: Annotated[PostFileFormat, Query(alias="format")] = PostFileFormat.NDJSON,
+    status_filter: Annotated[Optional[PostStatus], Query(alias="status")] = None,
+    platform: Optional[str] = None,
+):
+    """
+    Exporta os posts do usuário autenticado (NDJSON ou CSV) em streaming, ordenados por data de agendamento.
+    No CSV, textos que começam com =, +, - ou @ recebem um apóstrofo na frente, para não serem
+    executados como fórmula ao abrir o arquivo numa planilha (a importação remove o apóstrofo).
+    """
+    return StreamingResponse(
+        export_posts(
+            current_user_id,
+            file_format,
+            status_filter=status_filter.value if status_filter else None,
+            platform=platform,
+        ),
+        media_type=MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="posts.{file_format.value}"'},
+    )
+
+@router.get(
+    "/{post_id}",
+    response_model=PostResponse,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponse, "description": "Post not found"},
+    },
+)
+@query_budget(1)
+async def read(
+    post_id: UUID,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    """
+    Retorna um post do usuário autenticado.
+    """
+    post = await get_post(current_user_id, post_id, db)
+    if not post:
+        raise post_not_found()
+    return post
+
+@router.patch(
+    "/{post_id}",
+    response_model=PostResponse,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponse, "description": "Post not found"},
+        status.HTTP_409_CONFLICT: {"model": ErrorResponse, "description": "Post is being published"},
+    },
+)
+async def update(
+    post_id: UUID,
+    post_data: PostUpdate,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    """
+    Atualiza parcialmente um post do usuário autenticado.
+    """
+    post = await update_post(current_user_id, post_id, post_data, db)
+    if not post:
+        raise post_not_found()
+    return post
+
+@router.delete(
+    "/{post_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponse, "description": "Post not found"},
+        status.HTTP_409_CONFLICT: {"model": ErrorResponse, "description": "Post is being published"},
+    },
+)
+async def delete(
+    post_id: UUID,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    """
+    Remove um post do usuário autenticado.
+    """
+    if not await delete_post(current_user_id, post_id, db):
+        raise post_not_found()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@router.get(
+    "/{post_id}/media",
+    response_model=list[MediaResponse],
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponse, "description": "Post not found"},
+    },
+)
+@query_budget(2)
+async def read_post_media(
+    post_id: UUID,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    """
+    Lista as mídias anexadas ao post.
+    """
+    if not await get_post(current_user_id, post_id, db):
+        raise post_not_found()
+    return await list_post_media(post_id, db)
+
+@router.put(
+    "/{post_id}/media/{media_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponse, "description": "Post or media not found"},
+    },
+)
+async def attach_media(
+    post_id: UUID,
+    media_id: UUID,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)],
+    position: Annotated[int, Query(ge=0)] = 0,
+):
+    """
+    Anexa uma mídia do usuário ao post (idempotente).
+    """
+    if not await get_post(current_user_id, post_id, db):
+        raise post_not_found()
+    media = await get_media(current_user_id, media_id, db)
+    if not media:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "NOT_FOUND", "message": "Mídia não encontrada."}
+        )
+    await attach_media_to_post(post_id, media, db, position=position)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@router.delete(
+    "/{post_id}/media/{media_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponse, "description": "Post or media not found"},
+    },
+)
+async def detach_media(
+    post_id: UUID,
+    media_id: UUID,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)],
+    db: Annotated[AsyncSession, Depends(get_async_session)]
+):
+    """
+    Remove o anexo da mídia no post.
+    """
+    if not await get_post(current_user_id, post_id, db):
+        raise post_not_found()
+    media = await get_media(current_user_id, media_id, db)
+    if not media or not await detach_media_from_post(post_id, media, db):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "NOT_FOUND", "message": "Mídia não anexada ao post."}
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
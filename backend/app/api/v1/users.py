@@ -1,11 +1,13 @@
 from typing import Annotated # Para usar Annotated para dependências
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.database import get_session # type: ignore
-from app.core.security import get_current_user # type: ignore # Importa a dependência de segurança
+from app.core.cache import CacheBackend, cached_json_response, get_cache, user_cache_key
+from app.core.database import get_async_session # type: ignore
+from app.core.query_budget import query_budget
+from app.core.security import get_current_user_id # type: ignore # Importa a dependência de segurança
 from app.services.user_service import get_user_by_id # type: ignore # Importa o serviço para buscar o usuário
 from app.schemas.user import UserResponse, ErrorResponse # Importa o schema de resposta para usuário
 
@@ -15,23 +17,32 @@ router = APIRouter(prefix="/users", tags=["Users"])
     "/me",
     response_model=UserResponse,
     responses={
+        status.HTTP_304_NOT_MODIFIED: {"description": "Not Modified (If-None-Match)"},
         status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse, "description": "Unauthorized"},
         status.HTTP_404_NOT_FOUND: {"model": ErrorResponse, "description": "User not found"},
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": ErrorResponse, "description": "Server Error"},
     },
 )
-def read_users_me(
-    current_user_id: Annotated[UUID, Depends(get_current_user)], # Injeta o ID do usuário autenticado
-    db: Annotated[Session, Depends(get_session)] # Injeta a sessão do banco de dados
+@query_budget(1)
+async def read_users_me(
+    request: Request,
+    current_user_id: Annotated[UUID, Depends(get_current_user_id)], # Injeta o ID do usuário autenticado
+    db: Annotated[AsyncSession, Depends(get_async_session)], # Injeta a sessão do banco de dados
+    cache: Annotated[CacheBackend, Depends(get_cache)] # Cache de respostas (perfil muda raramente)
 ):
     """
     Retorna informações sobre o usuário autenticado.
     Requer um token JWT válido no cabeçalho Authorization (Bearer token).
+    A resposta tem ETag; com If-None-Match igual, retorna 304 sem corpo.
     """
-    user = get_user_by_id(current_user_id, db)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail={"code": "NOT_FOUND", "message": "Usuário não encontrado."}
-        )
-    return user
\ No newline at end of file
+    async def build() -> bytes:
+        user = await get_user_by_id(current_user_id, db)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail={"code": "NOT_FOUND", "message": "Usuário não encontrado."}
+            )
+        return UserResponse.model_validate(user).model_dump_json().encode()
+
+    key = await user_cache_key(cache, current_user_id, "profile", "me")
+    return await cached_json_response(request, cache, key, build)
\ No newline at end of file
@@ -0,0 +1,199 @@
+# app/core/cache.py
+"""
+Cache de respostas de leitura (perfil, listas de posts, calendário).
+
+As chaves incluem uma versão por (usuário, escopo). Os caminhos de escrita dos
+serviços chamam invalidate_user_cache(), que troca a versão: as entradas antigas
+deixam de ser encontradas e expiram sozinhas pelo TTL, sem varrer o cache.
+
+Backends:
+- "memory": LRU com TTL dentro do processo (padrão). A invalidação só vale para o
+  processo que fez a escrita; com vários workers/réplicas, os demais servem dados
+  antigos até o TTL. Nesse caso use "redis".
+- "redis": qualquer servidor compatível com Redis (requer o pacote 'redis').
+- "none": desativa o cache (ETag/304 continuam funcionando).
+"""
+import hashlib
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+from uuid import UUID
+
+from fastapi import Request, Response, status
+
+from app.core.config import get_settings
+from app.core.container import resource
+
+# Sem TTL explícito, a versão de um escopo vive bem mais que as entradas que ela protege
+VERSION_TTL_SECONDS = 7 * 24 * 3600
+
+
+class CacheBackend(ABC):
+    """
+    Interface dos backends de cache (chave -> bytes).
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Valor da chave, ou None se ausente/expirado."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Grava o valor por `ttl` segundos."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove a chave (não falha se ela não existir)."""
+
+    async def aclose(self) -> None:
+        """Libera conexões abertas pelo backend."""
+
+
+class NullCache(CacheBackend):
+    async def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        pass
+
+    async def delete(self, key: str) -> None:
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """
+    LRU com TTL em memória. As operações não fazem I/O e não cedem o event loop.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class RedisCache(CacheBackend):
+    """
+    Backend compatível com Redis (Redis, Valkey, KeyDB, Dragonfly...).
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requer o pacote 'redis' (pip install redis).") from e
+        self._client = redis.Redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._client.set(key, value, px=int(ttl * 1000))
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(key)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+@resource(close=lambda cache: cache.aclose())
+def get_cache() -> CacheBackend:
+    """
+    Dependência FastAPI / acesso ao backend configurado em CACHE_BACKEND.
+    """
+    settings = get_settings()
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryCache(settings.CACHE_MAX_ENTRIES)
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCache(settings.CACHE_REDIS_URL)
+    if settings.CACHE_BACKEND == "none":
+        return NullCache()
+    raise ValueError(f"Backend de cache desconhecido: {settings.CACHE_BACKEND}")
+
+
+def _version_key(user_id: UUID, scope: str) -> str:
+    return f"cache:v:{user_id}:{scope}"
+
+
+async def user_cache_key(cache: CacheBackend, user_id: UUID, scope: str, *parts) -> str:
+    """
+    Chave de uma resposta do usuário no escopo (ex: "posts"), com a versão atual do escopo.
+    `parts` identifica a consulta (parâmetros da rota).
+    """
+    version_key = _version_key(user_id, scope)
+    version = await cache.get(version_key)
+    if version is None:
+        # Versão aleatória (não um contador): se ela for descartada pelo LRU, a nova nunca
+        # coincide com uma versão antiga e entradas velhas não voltam a ser servidas
+        version = uuid.uuid4().hex.encode()
+        await cache.set(version_key, version, VERSION_TTL_SECONDS)
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    return f"cache:{user_id}:{scope}:{version.decode()}:{digest}"
+
+
+async def invalidate_user_cache(user_id: UUID, *scopes: str) -> None:
+    """
+    Invalida as respostas em cache do usuário nos escopos informados.
+    Chamado pelos caminhos de escrita dos serviços depois do commit.
+    """
+    cache = get_cache()
+    for scope in scopes:
+        await cache.delete(_version_key(user_id, scope))
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+async def cached_json_response(
+    request: Request,
+    cache: CacheBackend,
+    key: Optional[str],
+    build: Callable[[], Awaitable[bytes]],
+) -> Response:
+    """
+    Devolve o JSON em cache (ou monta com `build`, que retorna o corpo já serializado)
+    com ETag. Se o cliente já tem a mesma versão (If-None-Match), responde 304 sem corpo,
+    sem serializar nada e, com o cache quente, sem tocar no banco.
+    key=None desativa o cache para esta requisição (só ETag).
+    """
+    settings = get_settings()
+    entry = await cache.get(key) if key else None
+    if entry is not None:
+        etag, body = entry.split(b"\n", 1)
+        etag = etag.decode()
+    else:
+        body = await build()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        if key:
+            await cache.set(key, etag.encode() + b"\n" + body, settings.CACHE_TTL_SECONDS)
+
+    # no-cache: o navegador pode guardar, mas revalida sempre (barato: 304)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
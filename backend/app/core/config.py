@@ -1,4 +1,5 @@
 # app/core/config.py
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
 
@@ -12,8 +13,192 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     SUPABASE_URL: str 
 
+    # Métricas (Prometheus em /metrics) e Server-Timing sob pedido (cabeçalho "X-Server-Timing: 1").
+    # Desligadas por padrão: expõem latência, erros e contadores internos
+    METRICS_ENABLED: bool = False
+    # Se definido, /metrics exige "Authorization: Bearer <METRICS_TOKEN>" (o scraper do Prometheus envia)
+    METRICS_TOKEN: Optional[str] = None
+    SERVER_TIMING_ENABLED: bool = True
+
+    # Banco de dados
+    # Loga todo SQL gerado (síncrono, só para depuração)
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Orçamento de consultas por requisição e detector de N+1 (desenvolvimento e testes/CI):
+    # "off", "warn" (loga) ou "raise" (a requisição falha ao estourar o @query_budget da rota
+    # ou ao repetir o mesmo SELECT QUERY_REPEAT_THRESHOLD vezes)
+    QUERY_BUDGET_MODE: str = "off"
+    QUERY_REPEAT_THRESHOLD: int = 5
+    # Orçamento das rotas sem @query_budget (None: só o detector de N+1)
+    QUERY_BUDGET_DEFAULT: Optional[int] = None
+
+    # Cria as tabelas na inicialização (desenvolvimento/benchmarks; em produção o Supabase já as tem)
+    DB_CREATE_TABLES: bool = False
+
+    # Posts
+    POSTS_PAGE_MAX_SIZE: int = 200
+    POSTS_CALENDAR_MAX_DAYS: int = 92
+    POSTS_CALENDAR_MAX_ITEMS: int = 5000
+    # Resumo do calendário/dashboard (rollups por dia): intervalo máximo, suficiente para um ano
+    POSTS_SUMMARY_MAX_DAYS: int = 366
+    # Busca por texto: resultados ordenados por relevância que podem ser paginados
+    POSTS_SEARCH_MAX_RESULTS: int = 1000
+    # Importação em massa: linhas por INSERT multi-linha (e por commit). Cada linha usa ~10
+    # parâmetros; o asyncpg aceita até 32767 por comando.
+    POSTS_IMPORT_CHUNK_SIZE: int = 500
+    POSTS_IMPORT_MAX_ERRORS: int = 100
+    # Tamanho máximo (em caracteres) de uma linha (NDJSON) ou registro (CSV) do arquivo importado
+    POSTS_IMPORT_MAX_LINE_LENGTH: int = 1024 * 1024
+    # Linhas lidas do cursor por vez na exportação (memória constante)
+    POSTS_EXPORT_BATCH_SIZE: int = 1000
+
+    # Publicador de posts agendados
+    # Roda o publicador neste processo (também pode rodar à parte: python -m app.worker)
+    SCHEDULER_ENABLED: bool = False
+    # "none" (nenhuma rede configurada), "fake" (publicador falso, para desenvolvimento e testes)
+    # ou "http" (adaptadores HTTP de PUBLISHER_HTTP_PLATFORMS)
+    PUBLISHER_BACKEND: str = "none"
+    # JSON por rede, ex: {"instagram": {"base_url": "...", "api_key": "...", "rate_per_second": 0.5,
+    # "burst": 5, "max_batch_size": 20}}
+    PUBLISHER_HTTP_PLATFORMS: dict[str, dict] = {}
+    # Espera para juntar posts da mesma conta numa chamada em lote
+    DISPATCH_BATCH_WINDOW_SECONDS: float = 0.05
+    # Lotes aceitos por conta à frente do limite de taxa; além disso o post volta para a fila
+    DISPATCH_LANE_DEPTH: int = 2
+    SCHEDULER_POLL_SECONDS: float = 5.0
+    # Posts que vencem dentro deste horizonte são reservados e mantidos em memória até o horário
+    SCHEDULER_LOOKAHEAD_SECONDS: int = 60
+    SCHEDULER_BATCH_SIZE: int = 500
+    # Máximo de posts reservados em memória por processo
+    SCHEDULER_MAX_PENDING: int = 10000
+    # Publicações simultâneas por rede social, por processo
+    SCHEDULER_PLATFORM_CONCURRENCY: int = 10
+    # Validade da reserva além do horizonte; um processo que morrer libera os posts após esse tempo
+    SCHEDULER_LEASE_SECONDS: int = 120
+    SCHEDULER_PUBLISH_TIMEOUT_SECONDS: float = 60.0
+    SCHEDULER_MAX_ATTEMPTS: int = 5
+    SCHEDULER_RETRY_BACKOFF_SECONDS: int = 30
+    SCHEDULER_RETRY_BACKOFF_MAX_SECONDS: int = 3600
+
+    # Cache de respostas de leitura (/users/me, listas e calendário de posts)
+    # "memory" (por processo), "redis" ou "none". Com vários workers/réplicas ou com o
+    # publicador rodando à parte (app.worker), use "redis": a invalidação do "memory"
+    # só vale no processo que fez a escrita e os demais ficam defasados até o TTL.
+    CACHE_BACKEND: str = "memory"
+    CACHE_TTL_SECONDS: float = 60.0
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Eventos em tempo real (SSE em /events)
+    # Broker entre processos: "memory" (um único processo), "redis" ou "relay" (relay TCP
+    # local: python -m benchmarks.event_relay_standin). Com vários workers, "memory" só
+    # entrega os eventos gerados no mesmo worker da conexão.
+    EVENTS_BROKER: str = "memory"
+    EVENTS_REDIS_URL: str = "redis://localhost:6379/0"
+    EVENTS_RELAY_ADDRESS: str = "127.0.0.1:9003"
+    # Eventos pendentes por conexão (um por post/mídia); ao estourar, a conexão recebe 'resync'
+    EVENTS_MAX_PENDING: int = 256
+    # Depois do primeiro evento, espera esse tempo para enviar a rajada de uma vez
+    EVENTS_COALESCE_SECONDS: float = 0.25
+    # Comentário enviado nas conexões ociosas (mantém proxies e load balancers abertos)
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    EVENTS_MAX_CONNECTIONS_PER_USER: int = 10
+
+    # Mídia
+    MEDIA_STORAGE_BACKEND: str = "local"
+    MEDIA_STORAGE_DIR: str = "media_storage"
+    # Tamanho dos blocos gravados no storage durante o streaming do upload
+    MEDIA_CHUNK_SIZE: int = 1024 * 1024
+    MEDIA_MAX_UPLOAD_BYTES: int = 5 * 1024 * 1024 * 1024
+    # Reserva de uma sessão durante um PUT/finalização (maior que a duração de um envio);
+    # vencida, outro processo pode retomar o upload (processo que morreu no meio)
+    MEDIA_UPLOAD_LEASE_SECONDS: int = 900
+    # Sessões de upload sem envio há mais tempo que isso são encerradas e os bytes apagados
+    MEDIA_UPLOAD_SESSION_TTL_SECONDS: int = 24 * 3600
+    # Coletor de lixo dos blobs sem referência
+    MEDIA_BLOB_GC_INTERVAL_SECONDS: int = 600
+    # Tempo mínimo com ref_count zero antes de apagar (protege re-uploads em andamento)
+    MEDIA_BLOB_GC_GRACE_SECONDS: int = 3600
+    MEDIA_BLOB_GC_BATCH_SIZE: int = 100
+    # Geração de miniaturas/prévias em pool de processos (desative em réplicas só de API)
+    MEDIA_WORKER_ENABLED: bool = True
+    MEDIA_WORKER_PROCESSES: int = 2
+    # Intervalo de consulta à fila quando não há aviso de novos jobs (ex: jobs de outras réplicas)
+    MEDIA_WORKER_POLL_SECONDS: float = 5.0
+    # Um job em processamento há mais tempo que isso é considerado abandonado e volta para a fila
+    MEDIA_JOB_LEASE_SECONDS: int = 300
+    MEDIA_JOB_MAX_ATTEMPTS: int = 3
+    MEDIA_JOB_RETRY_DELAY_SECONDS: int = 30
+    MEDIA_THUMBNAIL_SIZES: list[int] = [128, 256, 512]
+    MEDIA_PREVIEW_MAX_SIZE: int = 1280
+    MEDIA_DERIVATIVE_QUALITY: int = 80
+    # Instante do vídeo usado como capa (poster)
+    MEDIA_POSTER_OFFSET_SECONDS: float = 1.0
+
+    # Autenticação: "supabase" (Supabase Auth) ou "internal" (senhas com bcrypt na tabela users
+    # e tokens HS256 assinados com JWT_SECRET_KEY)
+    AUTH_BACKEND: str = "supabase"
+    # Custo do bcrypt (cada +1 dobra o tempo; 12 ~ 250ms). Ao mudar, os hashes antigos são
+    # regravados com o novo custo no próximo login de cada usuário.
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    # "thread" (o bcrypt libera o GIL) ou "process"; nunca roda no event loop
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 2
+    # Autenticações aguardando um worker; além disso o login responde 503 com Retry-After
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+
+    # Verificação local de JWT
+    # Audience esperada nos tokens do Supabase ("authenticated"). Tokens sem 'aud' continuam válidos.
+    JWT_AUDIENCE: Optional[str] = "authenticated"
+    # Se não informado, usa {SUPABASE_URL}/auth/v1/.well-known/jwks.json
+    JWKS_URL: Optional[str] = None
+    JWKS_CACHE_TTL_SECONDS: int = 600
+    # Intervalo mínimo entre refreshes forçados por 'kid' desconhecido (evita abuso com kids aleatórios)
+    JWKS_MIN_REFRESH_INTERVAL_SECONDS: int = 30
+    # Mantém o JWKS atualizado em background (desative se o projeto só usa HS256)
+    JWKS_BACKGROUND_REFRESH: bool = True
+    # Quantidade máxima de tokens já validados mantidos em memória (0 desativa o cache)
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+
+    # Cliente HTTP compartilhado do Supabase Auth
+    SUPABASE_HTTP2: bool = True
+    SUPABASE_MAX_CONNECTIONS: int = 100
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    SUPABASE_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    SUPABASE_TIMEOUT_SECONDS: float = 10.0
+    SUPABASE_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    # Tempo máximo esperando uma conexão livre no pool durante picos de login
+    SUPABASE_POOL_TIMEOUT_SECONDS: float = 5.0
+    SUPABASE_MAX_RETRIES: int = 2
+    SUPABASE_RETRY_BACKOFF_SECONDS: float = 0.2
+    SUPABASE_RETRY_BACKOFF_MAX_SECONDS: float = 2.0
+    SUPABASE_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    SUPABASE_CIRCUIT_RESET_SECONDS: float = 30.0
+
+    # Idempotency-Key em POST /auth/register e POST /posts: repetições com a mesma chave recebem
+    # a resposta gravada, e repetições simultâneas aguardam a primeira em vez de executar de novo
+    IDEMPOTENCY_ENABLED: bool = True
+    # Tempo em que a resposta fica disponível para repetições
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    # Uma chave em execução há mais tempo que isso (processo que morreu) pode ser assumida por outro
+    IDEMPOTENCY_LOCK_SECONDS: int = 60
+    # Espera máxima de uma repetição pela requisição em andamento antes de responder 409
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    # Respostas maiores que isso não são gravadas (a repetição executa de novo)
+    IDEMPOTENCY_MAX_RESPONSE_BYTES: int = 1048576
+    IDEMPOTENCY_GC_INTERVAL_SECONDS: int = 3600
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
+    @property
+    def jwks_url(self) -> str:
+        return self.JWKS_URL or f"{self.SUPABASE_URL}/auth/v1/.well-known/jwks.json"
+
 @lru_cache()
 def get_settings():
-    return Settings()
\ No newline at end of file
+    return Settings()
@@ -0,0 +1,103 @@
+# app/core/container.py
+"""
+Recursos compartilhados do processo (motores do banco, cliente do Supabase, cache, hub de
+eventos, pool de hashing...).
+
+Cada recurso é criado uma única vez, na primeira chamada do seu get_X() (decorado com
+@resource), e não na importação dos módulos: importar a aplicação não abre pools nem
+carrega drivers e bibliotecas que o processo talvez nunca use (psycopg2 na API, passlib
+quando o login é pelo Supabase). O lifespan da API e o worker criam explicitamente o que
+precisam antes de atender e chamam aclose_resources() ao encerrar, que fecha, na ordem
+inversa da criação, só o que chegou a ser criado.
+"""
+import inspect
+import logging
+import threading
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+# Recursos criados, na ordem de criação
+_created: list["Resource"] = []
+
+
+class Resource(Generic[T]):
+    """
+    get_X() de um recurso: chama a fábrica na primeira vez e devolve sempre a mesma instância
+    (como lru_cache). Pode ser usado como dependência FastAPI.
+    """
+
+    def __init__(self, factory: Callable[[], T], close: Optional[Callable[[T], Any]] = None):
+        self._factory = factory
+        self._close = close
+        self._instance: Any = _MISSING
+        # Dependências síncronas rodam em threads: evita duas instâncias no primeiro acesso
+        self._lock = threading.Lock()
+        self.__name__ = factory.__name__
+        self.__qualname__ = factory.__qualname__
+        self.__doc__ = factory.__doc__
+        self.__module__ = factory.__module__
+
+    def __call__(self) -> T:
+        if self._instance is _MISSING:
+            with self._lock:
+                if self._instance is _MISSING:
+                    self._instance = self._factory()
+                    _created.append(self)
+        return self._instance
+
+    @property
+    def created(self) -> bool:
+        return self._instance is not _MISSING
+
+    async def aclose(self) -> None:
+        """
+        Fecha a instância, se existir; a próxima chamada cria outra.
+        """
+        if self._instance is _MISSING:
+            return
+        instance, self._instance = self._instance, _MISSING
+        if self in _created:
+            _created.remove(self)
+        if self._close is not None:
+            result = self._close(instance)
+            if inspect.isawaitable(result):
+                await result
+
+    def cache_clear(self) -> None:
+        """
+        Esquece a instância sem fechá-la (mesma interface do lru_cache, usada em benchmarks).
+        """
+        self._instance = _MISSING
+        if self in _created:
+            _created.remove(self)
+
+
+def resource(close: Optional[Callable[[Any], Any]] = None) -> Callable[[Callable[[], T]], Resource[T]]:
+    """
+    Decorador de get_X(): o recurso é criado no primeiro uso e fechado por aclose_resources()
+    com `close(instância)` (síncrono ou assíncrono).
+    """
+    def decorator(factory: Callable[[], T]) -> Resource[T]:
+        return Resource(factory, close)
+    return decorator
+
+
+async def aclose_resources() -> None:
+    """
+    Fecha os recursos criados, do mais recente ao mais antigo (ex: o hub de eventos e o
+    publicador antes dos motores do banco). Uma falha ao fechar um recurso não impede os outros.
+    """
+    while _created:
+        res = _created[-1]
+        try:
+            await res.aclose()
+        except Exception:
+            logger.exception("Erro ao fechar %s", res.__name__)
+        finally:
+            if res in _created:
+                _created.remove(res)
@@ -1,27 +1,136 @@
-from sqlmodel import create_engine, Session
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlmodel import create_engine, Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.config import get_settings
+from app.core.container import resource
+from app.core.metrics import instrument_engine
+from app.core.query_budget import install_query_tracking
 
 # Carregar configurações
 settings = get_settings()
 
-# Criar o motor do banco de dados
-# echo=True é útil para depuração, pois mostra as queries SQL geradas
-engine = create_engine(settings.DATABASE_URL, echo=True)
+# Drivers assíncronos equivalentes aos drivers síncronos da DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
-def create_db_and_tables():
+def get_async_database_url(database_url: str) -> str:
+    """
+    Converte a DATABASE_URL (psycopg2) para o driver assíncrono correspondente.
+    URLs que já indicam um driver assíncrono são mantidas.
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if url.drivername in ASYNC_DRIVERS.values() or backend not in ASYNC_DRIVERS:
+        return database_url
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+def get_pool_options(database_url: str) -> dict:
+    """
+    Opções do pool de conexões lidas das configurações.
+    SQLite usa pools próprios do SQLAlchemy e não aceita essas opções.
+    """
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        # Descarta conexões antes que o pooler do Supabase as encerre por inatividade
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+def instrument(engine: Engine) -> None:
+    """
+    Contagem e duração das consultas (métricas e Server-Timing).
+    """
+    instrument_engine(engine)
+    if settings.QUERY_BUDGET_MODE != "off":
+        install_query_tracking(engine)
+
+@resource(close=lambda engine: engine.dispose())
+def get_engine() -> Engine:
+    """
+    Motor síncrono (psycopg2), usado por scripts e benchmarks; a API e o worker usam o
+    assíncrono, então esse driver nem chega a ser importado por eles.
+    """
+    # DB_ECHO=True é útil para depuração, pois mostra as queries SQL geradas (desligado por padrão:
+    # o log é síncrono e custa caro em produção)
+    engine = create_engine(
+        settings.DATABASE_URL,
+        echo=settings.DB_ECHO,
+        **get_pool_options(settings.DATABASE_URL),
+    )
+    instrument(engine)
+    return engine
+
+@resource(close=lambda engine: engine.dispose())
+def get_async_engine() -> AsyncEngine:
+    """
+    Motor assíncrono (asyncpg): queries lentas não bloqueiam o event loop do worker.
+    """
+    async_database_url = get_async_database_url(settings.DATABASE_URL)
+    engine = create_async_engine(
+        async_database_url,
+        echo=settings.DB_ECHO,
+        **get_pool_options(async_database_url),
+    )
+    instrument(engine.sync_engine)
+    return engine
+
+@resource()
+def get_async_session_maker() -> async_sessionmaker:
+    return async_sessionmaker(
+        get_async_engine(),
+        class_=AsyncSession,
+        # Evita um SELECT extra ao acessar atributos depois do commit
+        expire_on_commit=False,
+    )
+
+def async_session_maker() -> AsyncSession:
+    """
+    Nova AsyncSession (o motor é criado na primeira chamada).
+    """
+    return get_async_session_maker()()
+
+async def create_db_and_tables():
+    """
+    Cria as tabelas que ainda não existem (desenvolvimento local e benchmarks).
+    Em produção, o Supabase já terá as tabelas criadas.
+    """
     # Importe todos os modelos SQLModel aqui para que o metadata seja preenchido
     # antes de chamar create_all()
-    # Isso será feito nos próximos passos quando você criar os modelos.
-    # Ex: from app.models.user import User
-    # from app.models.post import Post
-    # from app.models.media import Media
+    from app.models.user import User, UserCredential  # noqa: F401
+    from app.models.post import (  # noqa: F401
+        Post, PostDailyCount, PostMedia, PostRollupVersion, PostSearchDocument, PostTag, PostTagCount,
+    )
+    from app.models.media import Media, MediaBlob, MediaDerivative, MediaJob, UploadSession  # noqa: F401
+    from app.models.idempotency import IdempotencyKey  # noqa: F401
 
-    # SQLModel.metadata.create_all(engine) # descomente quando tiver seus modelos definidos
+    async with get_async_engine().begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
 
-    # Por enquanto, apenas para garantir que o engine está funcionando
-    # Em produção, o Supabase já terá as tabelas criadas.
-    pass 
+def dialect_insert(db: AsyncSession, model):
+    """
+    INSERT do dialeto da sessão, com suporte a ON CONFLICT (PostgreSQL e SQLite).
+    """
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
 
 def get_session():
-    with Session(engine) as session:
-        yield session
\ No newline at end of file
+    with Session(get_engine()) as session:
+        yield session
+
+async def get_async_session():
+    """
+    Dependência FastAPI que fornece uma AsyncSession por requisição.
+    """
+    async with async_session_maker() as session:
+        yield session
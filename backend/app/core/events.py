@@ -0,0 +1,299 @@
+# app/core/events.py
+"""
+Eventos em tempo real por usuário (status de posts e mídias), entregues por SSE em /events.
+
+Os serviços chamam publish_event() depois do commit. O EventHub de cada processo entrega
+o evento às conexões abertas do usuário naquele processo; o broker leva o evento a todos
+os processos (workers do uvicorn, python -m app.worker):
+- "memory": só o próprio processo (um worker);
+- "redis": pub/sub de um servidor compatível com Redis (requer o pacote 'redis');
+- "relay": relay TCP local (benchmarks/event_relay_standin.py), para vários workers sem Redis.
+
+Cada conexão guarda no máximo EVENTS_MAX_PENDING eventos, um por recurso: eventos do mesmo
+post/mídia que chegam antes do envio substituem o anterior (uma rajada de mudanças vira um
+evento com o estado final). Se o limite estoura, os pendentes são descartados e a conexão
+recebe 'resync', indicando que o cliente deve recarregar os dados pela API.
+"""
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+from app.core.config import get_settings
+from app.core.container import resource
+from app.core.metrics import EVENT_STREAM_CONNECTIONS, EVENTS_DROPPED, EVENTS_PUBLISHED
+
+logger = logging.getLogger(__name__)
+
+RESYNC_EVENT = "resync"
+RELAY_RECONNECT_SECONDS = 1.0
+
+Deliver = Callable[[dict], None]
+
+
+class EventBroker(ABC):
+    """
+    Transporte de eventos entre processos. publish() envia a mensagem a todos os processos
+    (inclusive este) que chamaram start(); cada um a repassa para `deliver`.
+    """
+
+    async def start(self, deliver: Deliver) -> None:
+        """Começa a receber mensagens (só nos processos que servem /events)."""
+
+    @abstractmethod
+    async def publish(self, message: dict) -> None:
+        """Envia a mensagem a todos os processos."""
+
+    async def aclose(self) -> None:
+        """Encerra conexões e tarefas do broker."""
+
+
+class MemoryBroker(EventBroker):
+    """
+    Um único processo: a mensagem é entregue direto, sem I/O.
+    """
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def publish(self, message: dict) -> None:
+        if self._deliver is not None:
+            self._deliver(message)
+
+
+class RedisBroker(EventBroker):
+    """
+    Pub/sub de um servidor compatível com Redis (um canal para todos os usuários).
+    """
+
+    channel = "events"
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("EVENTS_BROKER=redis requer o pacote 'redis' (pip install redis).") from e
+        self._client = redis.Redis.from_url(url)
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._task = asyncio.create_task(self._listen(deliver))
+
+    async def _listen(self, deliver: Deliver) -> None:
+        while True:
+            try:
+                async with self._client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            deliver(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Conexão de eventos com o Redis perdida (%s); reconectando", e)
+                await asyncio.sleep(RELAY_RECONNECT_SECONDS)
+
+    async def publish(self, message: dict) -> None:
+        await self._client.publish(self.channel, json.dumps(message))
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        await self._client.aclose()
+
+
+class RelayBroker(EventBroker):
+    """
+    Cliente do relay TCP local: uma linha JSON por mensagem. A primeira linha da conexão
+    diz se o processo quer receber mensagens ({"subscribe": true}) ou só publicar.
+    """
+
+    def __init__(self, address: str):
+        host, _, port = address.rpartition(":")
+        self.host = host or "127.0.0.1"
+        self.port = int(port)
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self, subscribe: bool) -> asyncio.StreamReader:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        writer.write(json.dumps({"subscribe": subscribe}).encode() + b"\n")
+        await writer.drain()
+        self._writer = writer
+        return reader
+
+    async def start(self, deliver: Deliver) -> None:
+        self._task = asyncio.create_task(self._listen(deliver))
+
+    async def _listen(self, deliver: Deliver) -> None:
+        while True:
+            try:
+                reader = await self._connect(subscribe=True)
+                while line := await reader.readline():
+                    deliver(json.loads(line))
+                logger.warning("Relay de eventos fechou a conexão; reconectando")
+            except asyncio.CancelledError:
+                raise
+            except (OSError, ValueError) as e:
+                logger.warning("Relay de eventos indisponível (%s); reconectando", e)
+            self._writer = None
+            await asyncio.sleep(RELAY_RECONNECT_SECONDS)
+
+    async def publish(self, message: dict) -> None:
+        async with self._lock:
+            if self._writer is None:
+                if self._task is not None:
+                    raise ConnectionError("Relay de eventos desconectado.")
+                # Processo que só publica (ex: python -m app.worker)
+                await self._connect(subscribe=False)
+            try:
+                self._writer.write(json.dumps(message).encode() + b"\n")
+                await self._writer.drain()
+            except OSError:
+                self._writer = None
+                raise
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+
+
+class Subscription:
+    """
+    Eventos pendentes de uma conexão, no máximo um por recurso e `max_pending` no total.
+    """
+
+    def __init__(self, user_id: str, max_pending: int):
+        self.user_id = user_id
+        self.max_pending = max_pending
+        self._pending: OrderedDict[tuple[str, str], dict] = OrderedDict()
+        self._ready = asyncio.Event()
+        self._overflowed = False
+
+    def push(self, event: str, data: dict) -> None:
+        if self._overflowed:
+            return
+        key = (event, str(data.get("id", "")))
+        if key in self._pending:
+            # Mesmo recurso: fica só o estado mais recente, na posição do último evento
+            self._pending.pop(key)
+        elif len(self._pending) >= self.max_pending:
+            EVENTS_DROPPED.inc(len(self._pending) + 1)
+            self._pending.clear()
+            self._overflowed = True
+        if not self._overflowed:
+            self._pending[key] = {"event": event, "data": data}
+        self._ready.set()
+
+    async def next_batch(self, heartbeat: float, coalesce: float) -> Optional[list[dict]]:
+        """
+        Espera eventos por até `heartbeat` segundos (None: nada chegou) e, depois do primeiro,
+        mais `coalesce` segundos para agrupar a rajada. Retorna os eventos pendentes.
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), heartbeat)
+        except asyncio.TimeoutError:
+            return None
+        if coalesce > 0:
+            await asyncio.sleep(coalesce)
+        self._ready.clear()
+        if self._overflowed:
+            self._overflowed = False
+            return [{"event": RESYNC_EVENT, "data": {}}]
+        batch = list(self._pending.values())
+        self._pending.clear()
+        return batch
+
+
+class EventHub:
+    """
+    Assinaturas deste processo por usuário e publicação pelo broker.
+    """
+
+    def __init__(self, broker: EventBroker, max_pending: int, max_connections_per_user: int):
+        self.broker = broker
+        self.max_pending = max_pending
+        self.max_connections_per_user = max_connections_per_user
+        self._subscriptions: dict[str, set[Subscription]] = {}
+
+    async def start(self) -> None:
+        await self.broker.start(self._deliver)
+
+    def _deliver(self, message: dict) -> None:
+        for subscription in self._subscriptions.get(message["user_id"], ()):
+            subscription.push(message["event"], message["data"])
+
+    async def publish(self, user_id: UUID, event: str, data: dict) -> None:
+        """
+        Publica o evento para o usuário. Falhas do broker são registradas e não propagadas:
+        a escrita já foi confirmada e o cliente ainda vê o estado novo ao recarregar.
+        """
+        try:
+            await self.broker.publish({"user_id": str(user_id), "event": event, "data": data})
+            EVENTS_PUBLISHED.inc(event=event)
+        except Exception as e:
+            logger.warning("Falha ao publicar evento %s: %s", event, e)
+
+    def subscribe(self, user_id: UUID) -> Subscription:
+        subscriptions = self._subscriptions.setdefault(str(user_id), set())
+        if len(subscriptions) >= self.max_connections_per_user:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail={"code": "TOO_MANY_CONNECTIONS", "message": "Muitas conexões de eventos abertas."}
+            )
+        subscription = Subscription(str(user_id), self.max_pending)
+        subscriptions.add(subscription)
+        EVENT_STREAM_CONNECTIONS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.user_id]
+        EVENT_STREAM_CONNECTIONS.dec()
+
+    async def aclose(self) -> None:
+        await self.broker.aclose()
+
+
+@resource(close=lambda hub: hub.aclose())
+def get_event_hub() -> EventHub:
+    """
+    Dependência FastAPI / acesso ao hub configurado em EVENTS_BROKER.
+    """
+    settings = get_settings()
+    if settings.EVENTS_BROKER == "memory":
+        broker = MemoryBroker()
+    elif settings.EVENTS_BROKER == "redis":
+        broker = RedisBroker(settings.EVENTS_REDIS_URL)
+    elif settings.EVENTS_BROKER == "relay":
+        broker = RelayBroker(settings.EVENTS_RELAY_ADDRESS)
+    else:
+        raise ValueError(f"Broker de eventos desconhecido: {settings.EVENTS_BROKER}")
+    return EventHub(broker, settings.EVENTS_MAX_PENDING, settings.EVENTS_MAX_CONNECTIONS_PER_USER)
+
+
+async def publish_event(user_id: UUID, event: str, data: dict) -> None:
+    """
+    Publica um evento para as conexões do usuário (chamar depois do commit).
+    event: "post", "media" ou "posts" (importação em massa). data: JSON com o 'id' do recurso.
+    """
+    await get_event_hub().publish(user_id, event, data)
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
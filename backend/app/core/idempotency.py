@@ -0,0 +1,415 @@
+# app/core/idempotency.py
+"""
+Idempotency-Key nas rotas de escrita (POST /auth/register e POST /posts).
+
+Clientes móveis repetem a requisição quando a rede falha, sem saber se a primeira chegou.
+Com o cabeçalho Idempotency-Key (ex: um UUID gerado pelo cliente para cada operação):
+- a primeira requisição com a chave executa normalmente e a resposta é gravada em
+  idempotency_keys por IDEMPOTENCY_TTL_SECONDS;
+- repetições recebem a resposta gravada (com "Idempotent-Replayed: true"), sem chamar o
+  Supabase nem gravar no banco de novo;
+- repetições que chegam enquanto a primeira ainda executa aguardam o resultado dela: no
+  mesmo processo, pela mesma Future; em outras réplicas, consultando a tabela;
+- a mesma chave com outro corpo é recusada (422).
+Respostas que pedem nova tentativa (5xx, 401, 408, 429...) não são gravadas: a repetição
+executa de novo. Requisições sem o cabeçalho não passam por nada disso.
+"""
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from jose import JWTError
+from sqlalchemy import and_, delete, or_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.database import async_session_maker, dialect_insert
+from app.core.jwt_verifier import get_token_verifier
+from app.core.metrics import IDEMPOTENT_REQUESTS
+from app.models.idempotency import IdempotencyKey, IdempotencyStatus
+from app.models.post import utc_now
+from app.schemas.post import to_utc
+
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+# Respostas que pedem outra tentativa (ou outras credenciais): não são gravadas
+_RETRY_STATUS = {401, 408, 409, 425, 429}
+# Consulta à tabela enquanto outra réplica executa a mesma chave (backoff até o máximo)
+_POLL_SECONDS = 0.05
+_POLL_MAX_SECONDS = 1.0
+
+
+@dataclass
+class StoredResponse:
+    """
+    Resposta gravada de uma chave (status, cabeçalhos e corpo).
+    """
+    request_hash: str
+    status_code: int
+    headers: list[tuple[str, str]]
+    body: bytes
+
+    @classmethod
+    def from_row(cls, row: IdempotencyKey) -> "StoredResponse":
+        return cls(row.request_hash, row.status_code, [tuple(h) for h in row.headers or []], row.body or b"")
+
+    async def send(self, send: Send) -> None:
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in self.headers]
+        headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": self.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": self.body})
+
+
+def _sha256(*parts: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+# --- Armazenamento ---
+
+async def claim_key(db: AsyncSession, key: str, request_hash: str) -> tuple[bool, Optional[IdempotencyKey]]:
+    """
+    Reserva a chave para esta requisição (status 'processing' até IDEMPOTENCY_LOCK_SECONDS).
+    Retorna (reservou, registro existente). Chaves vencidas e reservas expiradas (processo que
+    morreu no meio) são reaproveitadas no mesmo comando.
+    """
+    now = utc_now()
+    # Repetições de chaves já gravadas (o caso comum) só leem, sem disputar a escrita
+    row = (await db.exec(select(IdempotencyKey).where(IdempotencyKey.key == key))).first()
+    if row is not None and to_utc(row.expires_at) > now and (
+        row.status == IdempotencyStatus.COMPLETED.value or to_utc(row.locked_until) > now
+    ):
+        await db.commit()
+        return False, row
+    values = {
+        "request_hash": request_hash,
+        "status": IdempotencyStatus.PROCESSING.value,
+        "locked_until": now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+        "status_code": None,
+        "headers": None,
+        "body": None,
+        "created_at": now,
+        "expires_at": now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+    }
+    statement = dialect_insert(db, IdempotencyKey).values(key=key, **values)
+    statement = statement.on_conflict_do_update(
+        index_elements=[IdempotencyKey.key],
+        set_=values,
+        where=or_(
+            IdempotencyKey.expires_at < now,
+            and_(IdempotencyKey.status == IdempotencyStatus.PROCESSING.value, IdempotencyKey.locked_until < now),
+        ),
+    ).returning(IdempotencyKey.key)
+    claimed = (await db.exec(statement)).first() is not None
+    await db.commit()
+    if claimed:
+        return True, None
+    return False, (await db.exec(select(IdempotencyKey).where(IdempotencyKey.key == key))).first()
+
+async def complete_key(db: AsyncSession, key: str, response: StoredResponse) -> None:
+    """
+    Grava a resposta da chave reservada por esta requisição.
+    """
+    await db.exec(
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.key == key,
+            IdempotencyKey.request_hash == response.request_hash,
+            IdempotencyKey.status == IdempotencyStatus.PROCESSING.value,
+        )
+        .values(
+            status=IdempotencyStatus.COMPLETED.value,
+            locked_until=None,
+            status_code=response.status_code,
+            headers=[list(header) for header in response.headers],
+            body=response.body,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+async def release_key(db: AsyncSession, key: str, request_hash: str) -> None:
+    """
+    Libera a chave sem resposta gravada: a próxima repetição executa de novo.
+    """
+    await db.exec(
+        delete(IdempotencyKey)
+        .where(
+            IdempotencyKey.key == key,
+            IdempotencyKey.request_hash == request_hash,
+            IdempotencyKey.status == IdempotencyStatus.PROCESSING.value,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+async def purge_expired_keys(db: AsyncSession) -> int:
+    """
+    Remove as chaves vencidas. Retorna quantas foram removidas.
+    """
+    result = await db.exec(
+        delete(IdempotencyKey)
+        .where(IdempotencyKey.expires_at < utc_now())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+async def run_idempotency_gc_loop() -> None:
+    """
+    Loop de limpeza das chaves vencidas (iniciado no lifespan da aplicação).
+    """
+    while True:
+        try:
+            async with async_session_maker() as db:
+                removed = await purge_expired_keys(db)
+            if removed:
+                logger.info("Limpeza removeu %d chave(s) de idempotência vencida(s)", removed)
+        except Exception:
+            logger.exception("Erro na limpeza das chaves de idempotência")
+        await asyncio.sleep(settings.IDEMPOTENCY_GC_INTERVAL_SECONDS)
+
+
+# --- Middleware ---
+
+class _ResponseCapture:
+    """
+    Repassa a resposta ao cliente e guarda uma cópia (até max_bytes) para gravar na chave.
+    """
+
+    def __init__(self, send: Send, max_bytes: int):
+        self._send = send
+        self.max_bytes = max_bytes
+        self.status_code: Optional[int] = None
+        self.headers: list[tuple[str, str]] = []
+        self.chunks: list[bytes] = []
+        self.size = 0
+        self.complete = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.status_code = message["status"]
+            self.headers = [(name.decode("latin-1"), value.decode("latin-1")) for name, value in message["headers"]]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            self.size += len(body)
+            if self.size <= self.max_bytes:
+                self.chunks.append(body)
+            self.complete = not message.get("more_body", False)
+        await self._send(message)
+
+    def stored(self, request_hash: str) -> Optional[StoredResponse]:
+        """
+        A resposta a gravar, ou None se ela não deve ser repetida (incompleta, grande demais ou temporária).
+        """
+        if (
+            not self.complete
+            or self.size > self.max_bytes
+            or self.status_code >= 500
+            or self.status_code in _RETRY_STATUS
+        ):
+            return None
+        return StoredResponse(request_hash, self.status_code, self.headers, b"".join(self.chunks))
+
+
+def _error(status_code: int, code: str, message: str, headers: Optional[dict] = None) -> JSONResponse:
+    return JSONResponse({"detail": {"code": code, "message": message}}, status_code=status_code, headers=headers)
+
+
+async def _token_subject(headers: Headers) -> Optional[str]:
+    """
+    Usuário (sub) do token Bearer da requisição, ou None se ausente/inválido.
+    """
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        claims = await get_token_verifier().verify(token)
+    except JWTError:
+        return None
+    return claims.get("sub")
+
+
+class IdempotencyMiddleware:
+    """
+    Middleware ASGI que aplica o Idempotency-Key às rotas `routes` ((método, caminho)).
+    Nelas, o espaço de chaves é o usuário do token (sub): a repetição feita depois de
+    renovar o token continua sendo a mesma operação. As rotas `anonymous_routes`
+    (ex: registro, ainda sem usuário) compartilham um único espaço de chaves.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        routes: Iterable[tuple[str, str]] = (),
+        anonymous_routes: Iterable[tuple[str, str]] = (),
+    ):
+        self.app = app
+        self.routes = set(routes)
+        self.anonymous_routes = set(anonymous_routes)
+        # Requisição em andamento neste processo por chave; a Future recebe a resposta gravada
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route = (scope["method"], scope["path"])
+        headers = Headers(scope=scope)
+        key = headers.get(IDEMPOTENCY_HEADER)
+        if key is None or (route not in self.routes and route not in self.anonymous_routes):
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            response = _error(400, "BAD_REQUEST", f"Idempotency-Key deve ter de 1 a {MAX_KEY_LENGTH} caracteres.")
+            await response(scope, receive, send)
+            return
+        if route in self.anonymous_routes:
+            namespace = "anonymous"
+        elif (subject := await _token_subject(headers)) is not None:
+            namespace = f"user:{subject}"
+        else:
+            # Sem usuário válido a rota responde 401, que nunca é gravado
+            await self.app(scope, receive, send)
+            return
+
+        body = await self._read_body(receive)
+        if body is None:
+            return
+        key_hash = _sha256(namespace.encode(), key.encode())
+        request_hash = _sha256(scope["method"].encode(), scope["path"].encode(), scope["query_string"], body)
+
+        while (leader := self._in_flight.get(key_hash)) is not None:
+            try:
+                stored = await asyncio.wait_for(asyncio.shield(leader), settings.IDEMPOTENCY_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                await self._conflict(scope, receive, send)
+                return
+            if stored is not None:
+                await self._replay(stored, request_hash, "coalesced", scope, receive, send)
+                return
+            # A requisição em andamento terminou sem resposta gravada: esta executa (ou aguarda a próxima)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key_hash] = future
+        stored = None
+        try:
+            stored = await self._handle(scope, receive, send, body, key_hash, request_hash)
+        finally:
+            del self._in_flight[key_hash]
+            future.set_result(stored)
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> Optional[bytes]:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    async def _handle(
+        self, scope: Scope, receive: Receive, send: Send, body: bytes, key_hash: str, request_hash: str
+    ) -> Optional[StoredResponse]:
+        """
+        Executa a requisição uma única vez entre todas as réplicas e retorna a resposta gravada.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.IDEMPOTENCY_WAIT_SECONDS
+        delay = _POLL_SECONDS
+        while True:
+            async with async_session_maker() as db:
+                claimed, row = await claim_key(db, key_hash, request_hash)
+            if claimed:
+                break
+            if row is None:
+                # Liberada entre o INSERT e o SELECT: tenta reservar de novo
+                continue
+            if row.request_hash != request_hash:
+                await self._mismatch(scope, receive, send)
+                return None
+            if row.status == IdempotencyStatus.COMPLETED.value:
+                stored = StoredResponse.from_row(row)
+                await self._replay(stored, request_hash, "replayed", scope, receive, send)
+                return stored
+            # Em andamento em outra réplica
+            if loop.time() >= deadline:
+                await self._conflict(scope, receive, send)
+                return None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _POLL_MAX_SECONDS)
+
+        IDEMPOTENT_REQUESTS.inc(result="executed")
+        sent = False
+
+        async def receive_body() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        capture = _ResponseCapture(send, settings.IDEMPOTENCY_MAX_RESPONSE_BYTES)
+        try:
+            await self.app(scope, receive_body, capture.send)
+        finally:
+            stored = capture.stored(request_hash)
+            # Mesmo com o cliente desconectado (cancelamento), a chave não pode ficar presa
+            await asyncio.shield(self._finish(key_hash, request_hash, stored))
+        return stored
+
+    @staticmethod
+    async def _finish(key_hash: str, request_hash: str, stored: Optional[StoredResponse]) -> None:
+        try:
+            async with async_session_maker() as db:
+                if stored is not None:
+                    await complete_key(db, key_hash, stored)
+                else:
+                    await release_key(db, key_hash, request_hash)
+        except Exception:
+            # Sem a gravação, a chave fica reservada até IDEMPOTENCY_LOCK_SECONDS e depois é reaproveitada
+            logger.exception("Erro ao gravar a chave de idempotência")
+
+    async def _replay(
+        self, stored: StoredResponse, request_hash: str, result: str, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if stored.request_hash != request_hash:
+            await self._mismatch(scope, receive, send)
+            return
+        IDEMPOTENT_REQUESTS.inc(result=result)
+        await stored.send(send)
+
+    @staticmethod
+    async def _mismatch(scope: Scope, receive: Receive, send: Send) -> None:
+        IDEMPOTENT_REQUESTS.inc(result="mismatch")
+        response = _error(
+            422, "IDEMPOTENCY_KEY_REUSED", "Esta Idempotency-Key já foi usada com outra requisição."
+        )
+        await response(scope, receive, send)
+
+    @staticmethod
+    async def _conflict(scope: Scope, receive: Receive, send: Send) -> None:
+        IDEMPOTENT_REQUESTS.inc(result="conflict")
+        response = _error(
+            409,
+            "CONFLICT",
+            "Uma requisição com esta Idempotency-Key ainda está em andamento; tente novamente em instantes.",
+            headers={"Retry-After": "1"},
+        )
+        await response(scope, receive, send)
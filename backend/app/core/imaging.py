@@ -0,0 +1,96 @@
+# app/core/imaging.py
+"""
+Geração de derivados de mídia (miniaturas, prévia comprimida e capa de vídeo).
+
+As funções deste módulo são CPU-bound e rodam em processos filhos
+(ProcessPoolExecutor), nunca no event loop. Por isso não dependem das
+configurações nem do banco: recebem tudo por parâmetro e só lidam com arquivos.
+"""
+import os
+import shutil
+import subprocess
+from typing import NamedTuple
+
+# Tempo máximo para extrair a capa de um vídeo
+FFMPEG_TIMEOUT_SECONDS = 60
+
+
+class DerivativeError(Exception):
+    """
+    Falha definitiva (ex: formato não suportado): o job não é tentado de novo.
+    """
+
+
+class Derivative(NamedTuple):
+    kind: str
+    path: str
+    content_type: str
+    width: int
+    height: int
+
+
+def extract_poster_frame(source_path: str, output_path: str, offset_seconds: float) -> None:
+    """
+    Extrai um quadro do vídeo com ffmpeg. Vídeos mais curtos que o offset usam o primeiro quadro.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        raise DerivativeError("ffmpeg não encontrado para gerar a capa do vídeo.")
+    for offset in (offset_seconds, 0):
+        # -ss antes de -i: busca pelo keyframe mais próximo, sem decodificar o vídeo desde o início
+        subprocess.run(
+            [ffmpeg, "-v", "error", "-y", "-ss", str(offset), "-i", source_path, "-frames:v", "1", output_path],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=FFMPEG_TIMEOUT_SECONDS,
+            check=False,
+        )
+        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            return
+    raise DerivativeError("Não foi possível extrair um quadro do vídeo.")
+
+
+def generate_derivatives(
+    source_path: str,
+    content_type: str,
+    output_dir: str,
+    thumbnail_sizes: list[int],
+    preview_max_size: int,
+    quality: int,
+    poster_offset_seconds: float,
+) -> list[Derivative]:
+    """
+    Gera a prévia (lado maior <= preview_max_size) e as miniaturas em WEBP dentro de
+    output_dir. Para vídeos, gera antes a capa (poster) e deriva as imagens dela.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    results = []
+    if content_type.startswith("video/"):
+        poster_path = os.path.join(output_dir, "poster.jpg")
+        extract_poster_frame(source_path, poster_path, poster_offset_seconds)
+        with Image.open(poster_path) as poster:
+            results.append(Derivative("poster", poster_path, "image/jpeg", *poster.size))
+        source_path = poster_path
+
+    try:
+        image = Image.open(source_path)
+    except UnidentifiedImageError:
+        raise DerivativeError(f"Formato de imagem não suportado ({content_type}).")
+
+    with image:
+        # Em JPEG, decodifica já reduzido (escala na DCT): bem mais barato que decodificar a foto inteira
+        image.draft("RGB", (preview_max_size, preview_max_size))
+        current = ImageOps.exif_transpose(image)
+        current = current.convert("RGBA" if current.mode in ("RGBA", "LA", "P", "PA") else "RGB")
+
+        # Cada tamanho é reduzido a partir do anterior (maior -> menor), não do original
+        targets = [("preview", preview_max_size)]
+        targets += [(f"thumb_{size}", size) for size in sorted(set(thumbnail_sizes), reverse=True)]
+        for kind, size in targets:
+            current = current.copy()
+            current.thumbnail((size, size), Image.Resampling.LANCZOS)
+            path = os.path.join(output_dir, f"{kind}.webp")
+            current.save(path, "WEBP", quality=quality, method=4)
+            results.append(Derivative(kind, path, "image/webp", *current.size))
+    return results
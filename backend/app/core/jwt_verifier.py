@@ -0,0 +1,269 @@
+# app/core/jwt_verifier.py
+"""
+Verificação local de tokens JWT.
+
+- Tokens HS256 são validados com o JWT_SECRET_KEY (sem rede).
+- Tokens assimétricos (RS256/ES256) são validados com as chaves públicas do
+  Supabase (JWKS), mantidas em cache com TTL, refresh em background e
+  refresh forçado quando aparece um 'kid' desconhecido (rotação de chaves).
+- Claims já validadas ficam num LRU indexado pelo hash do token até o 'exp',
+  então um mesmo token nunca paga a criptografia duas vezes.
+"""
+import asyncio
+import contextlib
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+from jose import JWTError, jwk, jwt
+
+from app.core.config import get_settings
+from app.core.container import resource
+
+logger = logging.getLogger(__name__)
+
+SYMMETRIC_ALGORITHMS = {"HS256", "HS384", "HS512"}
+ASYMMETRIC_ALGORITHMS = {"RS256", "RS384", "RS512", "ES256", "ES384", "ES512"}
+
+JWKSFetcher = Callable[[], Awaitable[dict]]
+
+
+class ClaimsCache:
+    """
+    LRU de claims já validadas, indexado pelo SHA-256 do token.
+    Cada entrada vale até o 'exp' do próprio token.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        # get_current_user pode rodar tanto no event loop quanto no threadpool
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        if self.max_size <= 0:
+            return None
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, claims = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def put(self, token: str, claims: dict) -> None:
+        if self.max_size <= 0:
+            return
+        exp = claims.get("exp")
+        # Tokens sem expiração não são cacheados
+        if not isinstance(exp, (int, float)) or exp <= time.time():
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (float(exp), claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class JWKSCache:
+    """
+    Cache em processo do JWKS do Supabase.
+    As chaves são construídas uma única vez (jwk.construct) e indexadas por 'kid'.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ttl_seconds: int,
+        min_refresh_interval_seconds: int,
+        fetcher: Optional[JWKSFetcher] = None,
+    ):
+        self.url = url
+        self.ttl_seconds = ttl_seconds
+        self.min_refresh_interval_seconds = min_refresh_interval_seconds
+        self.fetcher = fetcher or self._http_fetch
+        self._keys: dict[str, Any] = {}
+        self._fetched_at: float = 0.0
+        self._last_attempt: float = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def _http_fetch(self) -> dict:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            response = await client.get(self.url)
+            response.raise_for_status()
+            return response.json()
+
+    @property
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._fetched_at >= self.ttl_seconds
+
+    def get_cached_key(self, kid: Optional[str]) -> Optional[Any]:
+        """Retorna a chave já construída, sem nenhum I/O."""
+        return self._keys.get(kid)
+
+    async def refresh(self, force: bool = False) -> None:
+        """
+        Baixa o JWKS e substitui o conjunto de chaves.
+        Chamadas concorrentes compartilham o mesmo download.
+        """
+        started = time.monotonic()
+        async with self._lock:
+            # Outro coroutine já atualizou enquanto esperávamos o lock
+            if self._fetched_at >= started:
+                return
+            now = time.monotonic()
+            if not force and not self.is_stale:
+                return
+            if force and now - self._last_attempt < self.min_refresh_interval_seconds:
+                return
+            self._last_attempt = now
+            try:
+                jwks = await self.fetcher()
+            except Exception as e:
+                # Mantém as chaves antigas: melhor validar com chaves "stale" do que derrubar o login
+                logger.warning("Falha ao atualizar JWKS de %s: %s", self.url, e)
+                return
+
+            keys: dict[str, Any] = {}
+            for key_data in jwks.get("keys", []):
+                alg = key_data.get("alg")
+                if alg not in ASYMMETRIC_ALGORITHMS:
+                    continue
+                try:
+                    keys[key_data.get("kid")] = jwk.construct(key_data, alg)
+                except Exception as e:
+                    logger.warning("Chave JWKS inválida (kid=%s): %s", key_data.get("kid"), e)
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+
+    async def get_key(self, kid: Optional[str]) -> Optional[Any]:
+        """
+        Retorna a chave do 'kid'. Um 'kid' desconhecido força um refresh
+        (rotação de chaves); cache expirado é revalidado em background.
+        """
+        key = self._keys.get(kid)
+        if key is not None:
+            if self.is_stale:
+                self._schedule_refresh()
+            return key
+        await self.refresh(force=True)
+        return self._keys.get(kid)
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.refresh())
+
+    async def run_refresh_loop(self) -> None:
+        """Loop de refresh em background (iniciado no lifespan da aplicação)."""
+        while True:
+            await self.refresh(force=True)
+            # Renova antes de expirar para que nenhuma requisição encontre o cache vencido
+            await asyncio.sleep(max(self.ttl_seconds * 0.8, 1))
+
+    async def aclose(self) -> None:
+        """Cancela o refresh em background agendado por get_key(), se houver."""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._refresh_task
+        self._refresh_task = None
+
+
+class TokenVerifier:
+    """
+    Valida tokens localmente combinando o cache de claims e o cache de JWKS.
+    """
+
+    def __init__(
+        self,
+        secret_key: str,
+        algorithm: str,
+        audience: Optional[str],
+        jwks_cache: JWKSCache,
+        claims_cache: ClaimsCache,
+    ):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.audience = audience
+        self.jwks_cache = jwks_cache
+        self.claims_cache = claims_cache
+
+    def _decode(self, token: str, key: Any, algorithm: str) -> dict:
+        return jwt.decode(token, key, algorithms=[algorithm], audience=self.audience)
+
+    def verify_symmetric(self, token: str) -> dict:
+        """
+        Validação síncrona (somente HS*). Levanta JWTError se inválido.
+        """
+        claims = self.claims_cache.get(token)
+        if claims is not None:
+            return claims
+        claims = self._decode(token, self.secret_key, self.algorithm)
+        self.claims_cache.put(token, claims)
+        return claims
+
+    async def verify(self, token: str) -> dict:
+        """
+        Valida o token e retorna as claims. Levanta JWTError se inválido.
+        """
+        claims = self.claims_cache.get(token)
+        if claims is not None:
+            return claims
+
+        header = jwt.get_unverified_header(token)
+        alg = header.get("alg")
+        if alg in SYMMETRIC_ALGORITHMS:
+            if alg != self.algorithm:
+                raise JWTError("Algoritmo de token não permitido.")
+            claims = self._decode(token, self.secret_key, alg)
+        elif alg in ASYMMETRIC_ALGORITHMS:
+            key = await self.jwks_cache.get_key(header.get("kid"))
+            if key is None:
+                raise JWTError("Chave de assinatura desconhecida.")
+            claims = self._decode(token, key, alg)
+        else:
+            raise JWTError("Algoritmo de token não suportado.")
+
+        self.claims_cache.put(token, claims)
+        return claims
+
+    async def aclose(self) -> None:
+        await self.jwks_cache.aclose()
+
+
+@resource(close=lambda verifier: verifier.aclose())
+def get_token_verifier() -> TokenVerifier:
+    settings = get_settings()
+    jwks_cache = JWKSCache(
+        url=settings.jwks_url,
+        ttl_seconds=settings.JWKS_CACHE_TTL_SECONDS,
+        min_refresh_interval_seconds=settings.JWKS_MIN_REFRESH_INTERVAL_SECONDS,
+    )
+    return TokenVerifier(
+        secret_key=settings.JWT_SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+        audience=settings.JWT_AUDIENCE,
+        jwks_cache=jwks_cache,
+        claims_cache=ClaimsCache(settings.TOKEN_CACHE_MAX_SIZE),
+    )
@@ -0,0 +1,326 @@
+# app/core/metrics.py
+"""
+Métricas de desempenho no formato de texto do Prometheus (sem dependências externas).
+
+- MetricsMiddleware: latência por rota (histograma), requisições em andamento e,
+  sob pedido (cabeçalho "X-Server-Timing: 1"), o cabeçalho Server-Timing com o
+  tempo da requisição separado em auth, db, supabase, hash e o restante (app).
+- instrument_engine: quantidade e duração das consultas SQL (eventos do SQLAlchemy).
+- timed(): soma um trecho ao tempo da requisição atual (ex: chamadas ao Supabase).
+
+Cada processo tem o próprio registro: com vários workers, cada um deve ser coletado
+separadamente (ou agregado pelo Prometheus por instância).
+"""
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SERVER_TIMING_REQUEST_HEADER = "x-server-timing"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...], extra: str = "") -> str:
+        parts = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{self._labels(key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # chave -> [contagem por bucket (não cumulativa; o último é +Inf), soma, total]
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket{self._labels(key, le)} {cumulative}"
+            yield f"{self.name}_sum{self._labels(key)} {_format_value(total)}"
+            yield f"{self.name}_count{self._labels(key)} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Todas as métricas no formato de exposição de texto do Prometheus (0.0.4).
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "Requisições HTTP concluídas.", ("method", "route", "status")
+))
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP por rota.", ("method", "route")
+))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "Requisições HTTP em andamento."
+))
+DB_QUERIES = REGISTRY.register(Counter(
+    "db_queries_total", "Comandos SQL executados.", ("operation",)
+))
+DB_QUERY_DURATION = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "Duração dos comandos SQL.", ("operation",)
+))
+DB_QUERIES_PER_REQUEST = REGISTRY.register(Histogram(
+    "http_request_db_queries", "Comandos SQL por requisição HTTP.", ("method", "route"), buckets=QUERY_COUNT_BUCKETS
+))
+SUPABASE_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "supabase_request_duration_seconds",
+    "Latência de cada chamada HTTP ao Supabase Auth (cada tentativa).",
+    ("method", "endpoint", "outcome"),
+))
+EVENT_STREAM_CONNECTIONS = REGISTRY.register(Gauge(
+    "event_stream_connections", "Conexões abertas em /events neste processo."
+))
+EVENTS_PUBLISHED = REGISTRY.register(Counter(
+    "events_published_total", "Eventos publicados no broker.", ("event",)
+))
+EVENTS_DROPPED = REGISTRY.register(Counter(
+    "events_dropped_total", "Eventos descartados por conexões que estouraram o limite de pendentes (resync)."
+))
+IDEMPOTENT_REQUESTS = REGISTRY.register(Counter(
+    "idempotent_requests_total",
+    "Requisições com Idempotency-Key por resultado (executed, replayed, coalesced, conflict, mismatch).",
+    ("result",),
+))
+
+
+class RequestTimings:
+    """
+    Tempo gasto pela requisição atual em cada componente (segundos) e quantidade de chamadas.
+    """
+    __slots__ = ("durations", "counts")
+
+    def __init__(self):
+        self.durations: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def server_timing(self, total: float) -> str:
+        """
+        Valor do cabeçalho Server-Timing (durações em ms). 'app' é o que sobra do total
+        (rota, validação, serialização).
+        """
+        entries = []
+        for name, seconds in self.durations.items():
+            entries.append(f'{name};dur={seconds * 1000:.2f};desc="{self.counts[name]}x"')
+        app = max(0.0, total - sum(self.durations.values()))
+        entries.append(f"app;dur={app * 1000:.2f}")
+        entries.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(entries)
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current_timings.get()
+
+
+@contextmanager
+def timed(name: str) -> Iterator[Callable[[], float]]:
+    """
+    Soma a duração do bloco ao componente `name` da requisição atual (se houver uma).
+    Produz uma função que devolve a duração (até agora, ou total depois do bloco).
+    """
+    started = time.perf_counter()
+    ended = None
+
+    def elapsed() -> float:
+        return (ended or time.perf_counter()) - started
+
+    try:
+        yield elapsed
+    finally:
+        ended = time.perf_counter()
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add(name, ended - started)
+
+
+def _operation(statement: str) -> str:
+    verb = statement.lstrip()[:6].upper()
+    return verb if verb in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Registra contagem e duração de cada comando SQL do engine (no AsyncEngine, use .sync_engine).
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        operation = _operation(statement)
+        DB_QUERIES.inc(operation=operation)
+        DB_QUERY_DURATION.observe(elapsed, operation=operation)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add("db", elapsed)
+
+
+def _route_label(scope: Scope) -> str:
+    # Usa o template da rota (/api/v1/posts/{post_id}) e não o path, para não explodir a cardinalidade
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI (sem BaseHTTPMiddleware, que atrapalha o streaming) que mede cada requisição.
+    server_timing: permite que o cliente peça o cabeçalho Server-Timing com "X-Server-Timing: 1".
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        wants_timing = self.server_timing and Headers(scope=scope).get(SERVER_TIMING_REQUEST_HEADER) == "1"
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if wants_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", timings.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            method, route = scope["method"], _route_label(scope)
+            HTTP_REQUESTS.inc(method=method, route=route, status=status_code)
+            HTTP_REQUEST_DURATION.observe(elapsed, method=method, route=route)
+            DB_QUERIES_PER_REQUEST.observe(timings.counts.get("db", 0), method=method, route=route)
+            _current_timings.reset(token)
@@ -0,0 +1,49 @@
+# app/core/pagination.py
+"""
+Cursores opacos para paginação keyset.
+"""
+import base64
+import binascii
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+from app.schemas.post import to_utc
+
+def encode_cursor(position: datetime, item_id: UUID) -> str:
+    """
+    Cursor opaco com a posição (data, id) do último item da página
+    (ex: (scheduled_at, id) para posts).
+    """
+    raw = f"{to_utc(position).isoformat()}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        position, item_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return to_utc(datetime.fromisoformat(position)), UUID(item_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "BAD_REQUEST", "message": "Cursor inválido."}
+        )
+
+def encode_offset_cursor(offset: int) -> str:
+    """
+    Cursor opaco com a posição do próximo item, para resultados ordenados por relevância
+    (sem uma chave estável para keyset).
+    """
+    return base64.urlsafe_b64encode(f"offset|{offset}".encode()).decode()
+
+def decode_offset_cursor(cursor: str) -> int:
+    try:
+        kind, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        if kind != "offset" or int(offset) < 0:
+            raise ValueError(cursor)
+        return int(offset)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "BAD_REQUEST", "message": "Cursor inválido."}
+        )
@@ -0,0 +1,126 @@
+# app/core/password_hasher.py
+"""
+Hash de senhas (bcrypt) fora do event loop.
+
+Cada hash/verificação ocupa a CPU por ~250ms (custo 12). Chamado direto numa rota
+async, congela todas as outras requisições do worker durante esse tempo. Aqui as
+chamadas rodam num executor limitado (threads: o bcrypt libera o GIL; ou processos)
+e uma fila máxima descarta o excesso (PasswordHasherBusy) durante picos de login,
+em vez de acumular requisições que expirariam de qualquer forma.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Optional, TypeVar
+
+from app.core.config import get_settings
+from app.core.container import resource
+from app.core.metrics import timed
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusy(Exception):
+    """
+    A fila de hashing está cheia: a requisição deve ser recusada (503) e repetida depois.
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__("Muitas autenticações em andamento; tente novamente em instantes.")
+        self.retry_after = retry_after
+
+
+@lru_cache()
+def build_password_context(rounds: int) -> "CryptContext":
+    """
+    Contexto bcrypt com o custo configurado. Hashes com outro custo são marcados
+    para atualização (verify_and_update devolve o novo hash).
+    O passlib/bcrypt só é carregado aqui, no primeiro hash: processos que autenticam
+    pelo Supabase (ou não autenticam) nunca o importam.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+# Funções de módulo (e não métodos) para poderem ser enviadas a processos filhos
+
+def _hash(rounds: int, password: str) -> str:
+    return build_password_context(rounds).hash(password)
+
+
+def _verify_and_update(rounds: int, password: str, hashed: str) -> tuple[bool, Optional[str]]:
+    return build_password_context(rounds).verify_and_update(password, hashed)
+
+
+class PasswordHasher:
+    """
+    executor: "thread", "process" ou "inline" (no próprio event loop; só para comparação em benchmarks).
+    workers: hashes simultâneos. max_queue: chamadas aguardando além das que estão rodando.
+    """
+
+    def __init__(self, rounds: int, executor: str = "thread", workers: int = 2, max_queue: int = 32):
+        if executor not in ("thread", "process", "inline"):
+            raise ValueError(f"Executor de hashing desconhecido: {executor}")
+        self.rounds = rounds
+        self.executor_kind = executor
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        # Média móvel da duração de uma chamada (incluindo a fila), usada como Retry-After
+        self._avg_seconds = 0.25
+
+    def _get_executor(self) -> Executor:
+        # Criado no primeiro uso: processos da API que não autenticam não sobem workers
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="password-hasher")
+        return self._executor
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        if self._pending >= self.workers + self.max_queue:
+            raise PasswordHasherBusy(max(1.0, self._avg_seconds))
+        self._pending += 1
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            with timed("hash"):
+                if self.executor_kind == "inline":
+                    return fn(self.rounds, *args)
+                return await loop.run_in_executor(self._get_executor(), fn, self.rounds, *args)
+        finally:
+            self._pending -= 1
+            self._avg_seconds = 0.9 * self._avg_seconds + 0.1 * (loop.time() - started)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> tuple[bool, Optional[str]]:
+        """
+        Retorna (senha confere, novo hash). O novo hash vem preenchido quando o hash salvo
+        usa outro custo/esquema e deve ser regravado (rehash transparente no login).
+        """
+        return await self._run(_verify_and_update, password, hashed)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+@resource(close=lambda hasher: hasher.shutdown())
+def get_password_hasher() -> PasswordHasher:
+    settings = get_settings()
+    return PasswordHasher(
+        settings.PASSWORD_BCRYPT_ROUNDS,
+        executor=settings.PASSWORD_HASH_EXECUTOR,
+        workers=settings.PASSWORD_HASH_WORKERS,
+        max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    )
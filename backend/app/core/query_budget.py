@@ -0,0 +1,138 @@
+# app/core/query_budget.py
+"""
+Orçamento de consultas por requisição e detector de N+1 (desenvolvimento e testes).
+
+Com QUERY_BUDGET_MODE="warn" ou "raise", cada requisição conta os comandos SQL que executa
+(em qualquer sessão: get_session, get_async_session ou sessões próprias dos serviços):
+- rotas marcadas com @query_budget(n) não podem passar de n comandos;
+- o mesmo SELECT (mesmo SQL, parâmetros diferentes) repetido QUERY_REPEAT_THRESHOLD vezes
+  numa requisição indica N+1 (lazy loading de relacionamento ou consulta dentro de um loop).
+
+"warn" registra no log. "raise" levanta QueryBudgetExceeded antes do comando que estourou:
+a requisição falha com 500 e, com o TestClient, o teste falha mostrando o SQL repetido.
+"""
+import logging
+from collections import Counter
+from contextvars import ContextVar
+from typing import Callable, Optional, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable)
+
+QUERY_BUDGET_MODES = ("off", "warn", "raise")
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    A requisição passou do orçamento de consultas da rota ou repetiu a mesma consulta (N+1).
+    """
+
+
+def query_budget(max_queries: int) -> Callable[[F], F]:
+    """
+    Declara o máximo de comandos SQL da rota por requisição (verificado com QUERY_BUDGET_MODE ligado).
+
+        @router.get("")
+        @query_budget(1)
+        async def list_(...): ...
+    """
+
+    def decorator(endpoint: F) -> F:
+        endpoint.__query_budget__ = max_queries
+        return endpoint
+
+    return decorator
+
+
+class QueryTracker:
+    """
+    Comandos SQL de uma requisição.
+    """
+
+    def __init__(self, scope: Scope, mode: str, repeat_threshold: int, default_budget: Optional[int] = None):
+        self.scope = scope
+        self.mode = mode
+        self.repeat_threshold = repeat_threshold
+        self.default_budget = default_budget
+        self.count = 0
+        self.shapes: Counter[str] = Counter()
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path", "?")
+
+    def budget(self) -> Optional[int]:
+        # A rota só é conhecida depois do roteamento, então o orçamento é lido a cada comando
+        endpoint = getattr(self.scope.get("route"), "endpoint", None)
+        return getattr(endpoint, "__query_budget__", self.default_budget)
+
+    def _violation(self, message: str) -> None:
+        if self.mode == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        budget = self.budget()
+        if budget is not None and self.count == budget + 1:
+            self._violation(
+                f"{self.scope['method']} {self.route}: mais de {budget} comandos SQL por requisição "
+                f"(orçamento da rota). Comando excedente: {statement[:300]}"
+            )
+        if statement.lstrip()[:6].upper() == "SELECT":
+            shape = " ".join(statement.split())
+            self.shapes[shape] += 1
+            if self.shapes[shape] == self.repeat_threshold:
+                self._violation(
+                    f"{self.scope['method']} {self.route}: possível N+1, o mesmo SELECT foi executado "
+                    f"{self.repeat_threshold} vezes: {shape[:300]}"
+                )
+
+
+_current_tracker: ContextVar[Optional[QueryTracker]] = ContextVar("query_tracker", default=None)
+
+
+def current_query_tracker() -> Optional[QueryTracker]:
+    return _current_tracker.get()
+
+
+def install_query_tracking(engine: Engine) -> None:
+    """
+    Conta os comandos do engine na requisição atual (no AsyncEngine, use .sync_engine).
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        tracker = _current_tracker.get()
+        if tracker is not None:
+            tracker.record(statement)
+
+
+class QueryBudgetMiddleware:
+    """
+    Abre um QueryTracker por requisição HTTP.
+    """
+
+    def __init__(self, app: ASGIApp, mode: str, repeat_threshold: int, default_budget: Optional[int] = None):
+        if mode not in QUERY_BUDGET_MODES:
+            raise ValueError(f"QUERY_BUDGET_MODE inválido: {mode}")
+        self.app = app
+        self.mode = mode
+        self.repeat_threshold = repeat_threshold
+        self.default_budget = default_budget
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.mode == "off":
+            await self.app(scope, receive, send)
+            return
+        token = _current_tracker.set(QueryTracker(scope, self.mode, self.repeat_threshold, self.default_budget))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_tracker.reset(token)
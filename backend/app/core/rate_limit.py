@@ -0,0 +1,60 @@
+# app/core/rate_limit.py
+"""
+Token bucket para limitar a taxa de chamadas a serviços externos.
+"""
+import asyncio
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """
+    Bucket com `capacity` tokens, reabastecido a `rate` tokens por segundo.
+    Cada chamada consome um token; rajadas de até `capacity` chamadas passam sem espera.
+    Não é thread-safe: foi feito para ser usado dentro de um único event loop.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        # Pausa imposta pelo serviço (ex: HTTP 429 com Retry-After)
+        self._blocked_until = 0.0
+
+    def _refill(self) -> float:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return now
+
+    def delay(self, tokens: float = 1.0) -> float:
+        """
+        Segundos até que `tokens` estejam disponíveis (0 se já estão).
+        """
+        now = self._refill()
+        wait = max(0.0, (tokens - self._tokens) / self.rate)
+        return max(wait, self._blocked_until - now)
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        if self.delay(tokens) > 0:
+            return False
+        self._tokens -= tokens
+        return True
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """
+        Espera até haver `tokens` disponíveis e os consome.
+        """
+        while (wait := self.delay(tokens)) > 0:
+            await asyncio.sleep(wait)
+        self._tokens -= tokens
+
+    def pause(self, seconds: float) -> None:
+        """
+        Bloqueia o bucket por `seconds` e zera os tokens (o serviço pediu para esperar).
+        """
+        now = self._refill()
+        self._blocked_until = max(self._blocked_until, now + seconds)
+        self._tokens = 0.0
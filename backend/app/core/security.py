@@ -1,27 +1,70 @@
-from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from typing import Optional
+from uuid import UUID
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 
 from app.core.config import get_settings # Importar as configurações
+from app.core.jwt_verifier import get_token_verifier
+from app.core.metrics import timed
+from app.core.password_hasher import PasswordHasherBusy, build_password_context, get_password_hasher
 
-# Contexto para hashing de senhas
-# O esquema 'bcrypt' é recomendado para segurança
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def pwd_context():
+    """
+    Contexto para hashing de senhas, criado no primeiro uso.
+    O esquema 'bcrypt' é recomendado para segurança (custo em PASSWORD_BCRYPT_ROUNDS)
+    """
+    return build_password_context(get_settings().PASSWORD_BCRYPT_ROUNDS)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifica se uma senha em texto puro corresponde a uma senha hasheada.
+    Bloqueia a CPU por ~250ms: em rotas async, use averify_password.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """
     Gera o hash de uma senha em texto puro.
+    Bloqueia a CPU por ~250ms: em rotas async, use ahash_password.
     """
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
+
+def _hasher_busy(e: PasswordHasherBusy) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail={"code": "SERVICE_UNAVAILABLE", "message": str(e)},
+        headers={"Retry-After": str(round(e.retry_after))},
+    )
+
+async def averify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """
+    Verifica a senha no pool de hashing, sem bloquear o event loop.
+    Retorna (senha confere, novo hash); o novo hash vem preenchido quando o custo configurado
+    mudou e deve ser gravado no lugar do antigo.
+    Levanta HTTPException 503 se houver autenticações demais na fila.
+    """
+    try:
+        return await get_password_hasher().verify_and_update(plain_password, hashed_password)
+    except PasswordHasherBusy as e:
+        raise _hasher_busy(e)
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Versão assíncrona de verify_password (roda no pool de hashing).
+    """
+    valid, _ = await averify_and_update_password(plain_password, hashed_password)
+    return valid
+
+async def ahash_password(password: str) -> str:
+    """
+    Versão assíncrona de get_password_hash (roda no pool de hashing).
+    """
+    try:
+        return await get_password_hasher().hash(password)
+    except PasswordHasherBusy as e:
+        raise _hasher_busy(e)
 
 settings = get_settings()
 
@@ -50,9 +93,10 @@ def decode_token(token: str) -> dict:
     """
     Decodifica um token JWT e retorna os dados contidos nele.
     Levanta HTTPException se o token for inválido ou expirado.
+    Tokens já validados são servidos do cache de claims até expirarem.
     """
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = get_token_verifier().verify_symmetric(token)
         # Aqui você pode adicionar validações adicionais ao payload, se necessário
         return payload
     except JWTError:
@@ -61,17 +105,33 @@ def decode_token(token: str) -> dict:
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+async def adecode_token(token: str) -> dict:
+    """
+    Versão assíncrona de decode_token que também aceita tokens assimétricos
+    do Supabase (RS256/ES256), validados com o JWKS em cache.
+    """
+    try:
+        return await get_token_verifier().verify(token)
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
         
 # Continuar no arquivo app/core/security.py
 
 # Para este exemplo, get_current_user irá apenas retornar o 'sub' (subject, que será o user_id)
 # Em um passo futuro, ela poderá buscar o objeto User completo do banco de dados.
-def get_current_user(token: str = Depends(oauth2_scheme)) -> str:
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> str:
     """
     Retorna o ID do usuário autenticado a partir do token JWT.
     Levanta HTTPException se o token for inválido ou ausente.
+    A validação é local (sem round trip ao Supabase) e cacheada por token.
     """
-    payload = decode_token(token)
+    with timed("auth"):
+        payload = await adecode_token(token)
     user_id: str = payload.get("sub") # 'sub' é uma convenção para o subject (identificador do usuário)
     if user_id is None:
         raise HTTPException(
@@ -81,4 +141,18 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> str:
         )
     # Por enquanto, retornamos o ID do usuário.
     # No futuro, aqui você poderia buscar o usuário no DB para retornar um objeto User completo.
-    return user_id
\ No newline at end of file
+    return user_id
+
+async def get_current_user_id(user_id: str = Depends(get_current_user)) -> UUID:
+    """
+    Igual a get_current_user, mas já converte o 'sub' para UUID
+    (formato usado como chave primária na tabela 'users').
+    """
+    try:
+        return UUID(user_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -0,0 +1,187 @@
+# app/core/storage.py
+"""
+Armazenamento de arquivos de mídia.
+
+Os serviços só conhecem a interface StorageBackend (chaves -> bytes);
+a implementação local grava no sistema de arquivos e permite rodar e
+testar o fluxo de upload sem nenhum serviço externo.
+"""
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.container import resource
+
+
+class StorageWriter:
+    """
+    Escritor incremental devolvido por StorageBackend.open_append.
+    """
+
+    def __init__(self, file: BinaryIO):
+        self._file = file
+
+    async def write(self, data: bytes) -> None:
+        # Escrita em disco fora do event loop
+        await run_in_threadpool(self._file.write, data)
+
+
+class StorageBackend(ABC):
+    """
+    Interface dos backends de armazenamento. Chaves usam '/' como separador.
+    """
+
+    @abstractmethod
+    def open_append(self, key: str):
+        """Context manager assíncrono que devolve um StorageWriter posicionado no fim do objeto."""
+
+    @abstractmethod
+    async def size(self, key: str) -> int:
+        """Tamanho atual do objeto (0 se não existir)."""
+
+    @abstractmethod
+    async def truncate(self, key: str, size: int) -> None:
+        """Descarta bytes após `size` (usado ao retomar um upload interrompido)."""
+
+    @abstractmethod
+    async def move(self, src_key: str, dst_key: str) -> None:
+        """Move um objeto sem copiar os bytes quando possível."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove o objeto (não falha se ele não existir)."""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Indica se o objeto existe."""
+
+    @abstractmethod
+    def read(self, key: str, chunk_size: int, end: int | None = None) -> AsyncIterator[bytes]:
+        """Lê o objeto em blocos de `chunk_size` bytes (até `end`, se informado)."""
+
+    @asynccontextmanager
+    async def local_path(self, key: str) -> AsyncIterator[str]:
+        """
+        Caminho de um arquivo local com o conteúdo do objeto (para ferramentas que
+        precisam de um arquivo, como Pillow/ffmpeg). Por padrão baixa para um temporário.
+        """
+        fd, path = await run_in_threadpool(tempfile.mkstemp)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                async for chunk in self.read(key, 1024 * 1024):
+                    await run_in_threadpool(file.write, chunk)
+            yield path
+        finally:
+            await run_in_threadpool(os.unlink, path)
+
+    async def put_file(self, key: str, path: str) -> None:
+        """
+        Grava (substituindo) o objeto com o conteúdo de um arquivo local, que é consumido.
+        """
+        await self.delete(key)
+        async with self.open_append(key) as writer:
+            with open(path, "rb") as file:
+                while chunk := await run_in_threadpool(file.read, 1024 * 1024):
+                    await writer.write(chunk)
+        await run_in_threadpool(os.unlink, path)
+
+    async def aclose(self) -> None:
+        """Libera conexões abertas pelo backend (o local não mantém nenhuma)."""
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Backend que grava os objetos em um diretório local.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        # Impede que uma chave escape do diretório raiz (ex: "../../etc/passwd")
+        if self.root not in path.parents:
+            raise ValueError(f"Chave de armazenamento inválida: {key}")
+        return path
+
+    @asynccontextmanager
+    async def open_append(self, key: str) -> AsyncIterator[StorageWriter]:
+        path = self.path_for(key)
+        await run_in_threadpool(path.parent.mkdir, parents=True, exist_ok=True)
+        file = await run_in_threadpool(open, path, "ab")
+        try:
+            yield StorageWriter(file)
+            await run_in_threadpool(file.flush)
+            await run_in_threadpool(os.fsync, file.fileno())
+        finally:
+            await run_in_threadpool(file.close)
+
+    async def size(self, key: str) -> int:
+        path = self.path_for(key)
+        try:
+            return (await run_in_threadpool(path.stat)).st_size
+        except FileNotFoundError:
+            return 0
+
+    async def truncate(self, key: str, size: int) -> None:
+        path = self.path_for(key)
+        if await run_in_threadpool(path.exists):
+            await run_in_threadpool(os.truncate, path, size)
+
+    async def move(self, src_key: str, dst_key: str) -> None:
+        src, dst = self.path_for(src_key), self.path_for(dst_key)
+        await run_in_threadpool(dst.parent.mkdir, parents=True, exist_ok=True)
+        # rename é atômico no mesmo sistema de arquivos; shutil.move cobre volumes diferentes
+        await run_in_threadpool(shutil.move, src, dst)
+
+    async def delete(self, key: str) -> None:
+        await run_in_threadpool(self.path_for(key).unlink, missing_ok=True)
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(self.path_for(key).exists)
+
+    @asynccontextmanager
+    async def local_path(self, key: str) -> AsyncIterator[str]:
+        path = self.path_for(key)
+        if not await run_in_threadpool(path.exists):
+            raise FileNotFoundError(key)
+        yield str(path)
+
+    async def put_file(self, key: str, path: str) -> None:
+        dst = self.path_for(key)
+        await run_in_threadpool(dst.parent.mkdir, parents=True, exist_ok=True)
+        await run_in_threadpool(shutil.move, path, dst)
+
+    async def read(self, key: str, chunk_size: int, end: int | None = None) -> AsyncIterator[bytes]:
+        file = await run_in_threadpool(open, self.path_for(key), "rb")
+        try:
+            remaining = end
+            while remaining is None or remaining > 0:
+                size = chunk_size if remaining is None else min(chunk_size, remaining)
+                chunk = await run_in_threadpool(file.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await run_in_threadpool(file.close)
+
+
+@resource(close=lambda storage: storage.aclose())
+def get_storage() -> StorageBackend:
+    """
+    Dependência FastAPI / acesso ao backend configurado em MEDIA_STORAGE_BACKEND.
+    """
+    settings = get_settings()
+    if settings.MEDIA_STORAGE_BACKEND == "local":
+        return LocalStorageBackend(settings.MEDIA_STORAGE_DIR)
+    raise ValueError(f"Backend de armazenamento desconhecido: {settings.MEDIA_STORAGE_BACKEND}")
@@ -0,0 +1,248 @@
+# app/core/supabase.py
+"""
+Cliente HTTP compartilhado para o Supabase Auth.
+
+Um único httpx.AsyncClient por processo (criado no lifespan da aplicação)
+reaproveita conexões TCP/TLS entre requisições, com limites de pool,
+HTTP/2, timeouts por chamada, retry com backoff exponencial + jitter e um
+circuit breaker que corta chamadas enquanto o Supabase estiver fora do ar.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Optional
+
+import httpx
+from fastapi import Request
+
+from app.core.config import Settings, get_settings
+from app.core.container import resource
+from app.core.metrics import SUPABASE_REQUEST_DURATION, timed
+
+logger = logging.getLogger(__name__)
+
+# Erros em que a requisição certamente não chegou ao Supabase (seguro repetir qualquer método)
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Erros de transporte em que a requisição pode ter sido processada
+TRANSPORT_ERRORS = (httpx.ReadTimeout, httpx.ReadError, httpx.WriteError, httpx.RemoteProtocolError)
+
+RETRYABLE_STATUS = {500, 502, 503, 504}
+# Para chamadas não idempotentes (ex: signup) só repetimos quando o gateway indica que não processou
+RETRYABLE_STATUS_NON_IDEMPOTENT = {502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """O circuito está aberto: o Supabase falhou repetidamente e as chamadas estão suspensas."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples (closed -> open -> half-open).
+    Após `failure_threshold` falhas consecutivas, abre por `reset_timeout` segundos;
+    depois disso deixa passar uma chamada de teste.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self) -> None:
+        state = self.state
+        if state == "open" or (state == "half-open" and self._trial_in_flight):
+            raise CircuitOpenError("Supabase Auth indisponível (circuit breaker aberto).")
+        if state == "half-open":
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        # Chamada de teste cancelada sem resultado: libera para a próxima tentar
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._trial_in_flight = False
+        if self._opened_at is not None or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+
+class SupabaseAuthClient:
+    """
+    Wrapper do Supabase Auth sobre um httpx.AsyncClient de vida longa.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        *,
+        limits: httpx.Limits,
+        timeout: httpx.Timeout,
+        http2: bool = True,
+        max_retries: int = 2,
+        backoff_base: float = 0.2,
+        backoff_max: float = 2.0,
+        breaker: Optional[CircuitBreaker] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker(failure_threshold=5, reset_timeout=30.0)
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"apikey": api_key, "Content-Type": "application/json"},
+            limits=limits,
+            timeout=timeout,
+            http2=http2,
+            transport=transport,
+        )
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": espalha as retentativas para não sincronizar uma rajada de logins
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _timed_request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        Uma tentativa da chamada, medida no histograma do Supabase e no Server-Timing da requisição.
+        """
+        outcome = "error"
+        try:
+            with timed("supabase") as elapsed:
+                response = await self._client.request(method, url, **kwargs)
+            outcome = str(response.status_code)
+            return response
+        except httpx.TransportError as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            SUPABASE_REQUEST_DURATION.observe(elapsed(), method=method, endpoint=url, outcome=outcome)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        idempotent: bool = True,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Executa a chamada com retry e circuit breaker.
+        Respostas 4xx são devolvidas normalmente (cabe ao serviço tratá-las).
+        Levanta CircuitOpenError se o circuito estiver aberto.
+        """
+        retry_status = RETRYABLE_STATUS if idempotent else RETRYABLE_STATUS_NON_IDEMPOTENT
+        retry_errors = CONNECT_ERRORS + TRANSPORT_ERRORS if idempotent else CONNECT_ERRORS
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+
+        self.breaker.before_call()
+        try:
+            attempt = 0
+            while True:
+                try:
+                    response = await self._timed_request(method, url, **kwargs)
+                except retry_errors as e:
+                    if attempt >= self.max_retries:
+                        self.breaker.record_failure()
+                        raise
+                    logger.warning("Erro de conexão com o Supabase (%s), tentativa %d", e.__class__.__name__, attempt + 1)
+                except httpx.TransportError:
+                    self.breaker.record_failure()
+                    raise
+                else:
+                    if response.status_code not in retry_status:
+                        if response.status_code >= 500:
+                            self.breaker.record_failure()
+                        else:
+                            self.breaker.record_success()
+                        return response
+                    if attempt >= self.max_retries:
+                        self.breaker.record_failure()
+                        return response
+                    logger.warning("Supabase respondeu %d, tentativa %d", response.status_code, attempt + 1)
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+        except BaseException:
+            self.breaker.release_trial()
+            raise
+
+    async def sign_up(self, payload: dict) -> httpx.Response:
+        # Signup não é idempotente: evita repetir quando o Supabase pode ter criado o usuário
+        return await self.request("POST", "/auth/v1/signup", json=payload, idempotent=False)
+
+    async def sign_in_with_password(self, payload: dict) -> httpx.Response:
+        return await self.request(
+            "POST", "/auth/v1/token", params={"grant_type": "password"}, json=payload
+        )
+
+    async def get_jwks(self) -> dict:
+        response = await self.request("GET", "/auth/v1/.well-known/jwks.json")
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+def create_supabase_client(
+    settings: Settings, transport: Optional[httpx.AsyncBaseTransport] = None
+) -> SupabaseAuthClient:
+    """
+    Cria o cliente a partir das configurações. `transport` permite usar
+    um httpx.MockTransport como Supabase local.
+    """
+    return SupabaseAuthClient(
+        settings.SUPABASE_URL,
+        settings.SUPABASE_KEY,
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(
+            settings.SUPABASE_TIMEOUT_SECONDS,
+            connect=settings.SUPABASE_CONNECT_TIMEOUT_SECONDS,
+            pool=settings.SUPABASE_POOL_TIMEOUT_SECONDS,
+        ),
+        http2=settings.SUPABASE_HTTP2,
+        max_retries=settings.SUPABASE_MAX_RETRIES,
+        backoff_base=settings.SUPABASE_RETRY_BACKOFF_SECONDS,
+        backoff_max=settings.SUPABASE_RETRY_BACKOFF_MAX_SECONDS,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.SUPABASE_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.SUPABASE_CIRCUIT_RESET_SECONDS,
+        ),
+        transport=transport,
+    )
+
+
+@resource(close=lambda client: client.aclose())
+def get_auth_client() -> SupabaseAuthClient:
+    """
+    Cliente do processo (usado pelo lifespan para preencher app.state.supabase).
+    """
+    return create_supabase_client(get_settings())
+
+
+def get_supabase_client(request: Request) -> SupabaseAuthClient:
+    """
+    Dependência FastAPI: retorna o cliente criado no lifespan da aplicação.
+    """
+    return request.app.state.supabase
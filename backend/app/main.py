@@ -1,13 +1,83 @@
-from fastapi import FastAPI
+import asyncio
+import contextlib
+import secrets
+from contextlib import asynccontextmanager
+from typing import Annotated, Optional
+
+from fastapi import FastAPI, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.core.config import get_settings
+from app.core.container import aclose_resources
+from app.core.database import create_db_and_tables, get_async_engine
+from app.core.events import get_event_hub
+from app.core.idempotency import IdempotencyMiddleware, run_idempotency_gc_loop
+from app.core.jwt_verifier import get_token_verifier
+from app.core.metrics import REGISTRY, MetricsMiddleware
+from app.core.query_budget import QueryBudgetMiddleware
+from app.core.storage import get_storage
+from app.core.supabase import get_auth_client
+from app.services.derivative_service import run_derivative_worker
+from app.services.media_service import run_blob_gc_loop
+from app.services.post_rollup_service import backfill_post_rollups
+from app.services.post_search_service import backfill_search_index
+from app.services.publishers import get_publisher_registry
+from app.services.scheduler_service import PublishingEngine
 from app.api.v1.auth import router as auth_router
 from app.api.v1.users import router as users_router
+from app.api.v1.post import router as posts_router
+from app.api.v1.media import router as media_router
+from app.api.v1.events import router as events_router
 
 settings = get_settings()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Recursos de todas as requisições são criados aqui, antes de aceitar conexões; os demais
+    # (pool de hashing, armazenamento, publicador...) no primeiro uso. Importar app.main não
+    # cria nenhum deles.
+    get_async_engine()
+    if settings.DB_CREATE_TABLES:
+        await create_db_and_tables()
+        # Posts criados antes das tabelas de rollups e de busca existirem
+        await backfill_post_rollups()
+        await backfill_search_index()
+
+    # Um único cliente HTTP (pool + keep-alive) para todas as chamadas ao Supabase Auth
+    app.state.supabase = get_auth_client()
+    verifier = get_token_verifier()
+    if not settings.JWKS_URL:
+        verifier.jwks_cache.fetcher = app.state.supabase.get_jwks
+
+    # Eventos publicados por qualquer processo chegam às conexões de /events deste worker
+    await get_event_hub().start()
+
+    # Mantém o JWKS do Supabase aquecido para que nenhuma requisição espere pela rede
+    background_tasks = []
+    if settings.JWKS_BACKGROUND_REFRESH:
+        background_tasks.append(asyncio.create_task(verifier.jwks_cache.run_refresh_loop()))
+    # Limpeza das respostas gravadas por Idempotency-Key já vencidas
+    if settings.IDEMPOTENCY_ENABLED:
+        background_tasks.append(asyncio.create_task(run_idempotency_gc_loop()))
+    # Coletor de lixo dos blobs de mídia sem referência
+    background_tasks.append(asyncio.create_task(run_blob_gc_loop(get_storage())))
+    # Miniaturas/prévias geradas em processos filhos, fora do caminho da requisição
+    if settings.MEDIA_WORKER_ENABLED:
+        background_tasks.append(asyncio.create_task(run_derivative_worker(get_storage())))
+    # Publicação dos posts agendados
+    if settings.SCHEDULER_ENABLED:
+        background_tasks.append(asyncio.create_task(PublishingEngine(get_publisher_registry()).run()))
+    yield
+    for task in background_tasks:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    # Fecha só o que chegou a ser criado, na ordem inversa
+    await aclose_resources()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     # NOVAS LINHAS AQUI:
     docs_url=f"{settings.API_V1_STR}/docs",    
@@ -25,6 +95,44 @@ app.add_middleware(
     allow_headers=["*"],  # Permite todos os headers
 )
 
+# Orçamento de consultas/N+1 por requisição (desenvolvimento e testes)
+if settings.QUERY_BUDGET_MODE != "off":
+    app.add_middleware(
+        QueryBudgetMiddleware,
+        mode=settings.QUERY_BUDGET_MODE,
+        repeat_threshold=settings.QUERY_REPEAT_THRESHOLD,
+        default_budget=settings.QUERY_BUDGET_DEFAULT,
+    )
+
+# Idempotency-Key nas rotas de escrita que os clientes repetem quando a rede falha
+# (fora do orçamento de consultas: as consultas da chave não contam para a rota)
+if settings.IDEMPOTENCY_ENABLED:
+    app.add_middleware(
+        IdempotencyMiddleware,
+        routes=[("POST", f"{settings.API_V1_STR}/posts")],
+        anonymous_routes=[("POST", f"{settings.API_V1_STR}/auth/register")],
+    )
+
+# Latência por rota, consultas SQL por requisição e Server-Timing (o mais externo, mede tudo)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, server_timing=settings.SERVER_TIMING_ENABLED)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics(authorization: Annotated[Optional[str], Header()] = None):
+        """
+        Métricas deste processo no formato de texto do Prometheus.
+        Com METRICS_TOKEN definido, exige o token no cabeçalho Authorization.
+        """
+        if settings.METRICS_TOKEN and not secrets.compare_digest(
+            (authorization or "").encode(), f"Bearer {settings.METRICS_TOKEN}".encode()
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail={"code": "UNAUTHORIZED", "message": "Token de métricas inválido."},
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def read_root():
     return {"message": "Bem-vindo ao Social Media Content Manager API!"}
@@ -32,12 +140,9 @@ def read_root():
 # Incluir o router de autenticação
 app.include_router(auth_router, prefix=settings.API_V1_STR) 
 app.include_router(users_router, prefix=settings.API_V1_STR)
+app.include_router(posts_router, prefix=settings.API_V1_STR)
+app.include_router(media_router, prefix=settings.API_V1_STR)
+app.include_router(events_router, prefix=settings.API_V1_STR)
 
 # Você adicionará os routers de API aqui posteriormente:
-# from app.api.v1.auth import router as auth_router
-# app.include_router(auth_router, prefix=settings.API_V1_STR)
-
-# from app.api.v1.posts import router as posts_router
-# app.include_router(posts_router, prefix=settings.API_V1_STR)
-
 # ... e assim por diante para outros routers
\ No newline at end of file
@@ -0,0 +1,39 @@
+from enum import Enum
+from typing import Optional
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, LargeBinary, String
+from sqlmodel import Field, SQLModel
+
+from app.models.post import utc_now
+
+class IdempotencyStatus(str, Enum):
+    """
+    Estados de uma chave de idempotência.
+    """
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+
+# Define o modelo SQLModel para a tabela 'idempotency_keys'
+class IdempotencyKey(SQLModel, table=True):
+    __tablename__ = "idempotency_keys"
+    """
+    Resposta de uma requisição de escrita enviada com o cabeçalho Idempotency-Key:
+    repetições com a mesma chave recebem a resposta gravada, sem executar de novo.
+    """
+    # sha256 do usuário do token (sub) + Idempotency-Key: cada usuário tem o seu espaço de
+    # chaves, que não muda quando o token é renovado
+    key: str = Field(sa_type=String(64), primary_key=True)
+    # sha256 de método, caminho e corpo: a mesma chave com outro corpo é recusada (422)
+    request_hash: str = Field(sa_type=String(64), nullable=False)
+    status: str = Field(default=IdempotencyStatus.PROCESSING.value, nullable=False)
+    # Enquanto 'processing', a requisição é executada por um único processo até esse instante;
+    # depois disso (processo morreu no meio), outra réplica pode assumir a chave
+    locked_until: Optional[datetime] = Field(default=None, sa_type=DateTime(timezone=True))
+    # Resposta gravada (status 'completed')
+    status_code: Optional[int] = Field(default=None)
+    headers: Optional[list] = Field(default=None, sa_type=JSON(none_as_null=True))
+    body: Optional[bytes] = Field(default=None, sa_type=LargeBinary)
+    created_at: datetime = Field(default_factory=utc_now, sa_type=DateTime(timezone=True), nullable=False)
+    # Limpeza das chaves vencidas (IDEMPOTENCY_TTL_SECONDS)
+    expires_at: datetime = Field(sa_type=DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,140 @@
+from enum import Enum
+from typing import Optional
+from uuid import UUID, uuid4
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Index
+from sqlmodel import Field, SQLModel
+
+from app.models.post import utc_now
+
+class UploadStatus(str, Enum):
+    """
+    Estados de uma sessão de upload retomável. Em 'finalizing' os bytes já podem ter saído
+    do arquivo temporário para o blob: a sessão não aceita mais envios, só a finalização.
+    """
+    ACTIVE = "active"
+    FINALIZING = "finalizing"
+    COMPLETED = "completed"
+    ABORTED = "aborted"
+
+class DerivativeStatus(str, Enum):
+    """
+    Estado da geração de miniaturas/prévias (no job e na mídia).
+    """
+    PENDING = "pending"
+    PROCESSING = "processing"
+    READY = "ready"
+    FAILED = "failed"
+    # Tipo de conteúdo sem derivados (ex: PDF)
+    SKIPPED = "skipped"
+
+# Define o modelo SQLModel para a tabela 'media_blobs'
+class MediaBlob(SQLModel, table=True):
+    __tablename__ = "media_blobs"
+    """
+    Conteúdo armazenado uma única vez, endereçado pelo SHA-256 (índice de deduplicação).
+    ref_count conta as mídias e os anexos em posts que usam o blob; blobs com
+    ref_count zero são removidos pelo coletor de lixo.
+    """
+    __table_args__ = (
+        # Varredura do coletor de lixo (ref_count = 0 há mais tempo que o período de carência)
+        Index("ix_media_blobs_ref_count_updated_at", "ref_count", "updated_at"),
+    )
+
+    sha256: str = Field(primary_key=True, max_length=64)
+    size: int = Field(sa_type=BigInteger, nullable=False)
+    storage_key: str = Field(nullable=False)
+    ref_count: int = Field(default=0, nullable=False)
+    created_at: datetime = Field(default_factory=utc_now, sa_type=DateTime(timezone=True), nullable=False)
+    updated_at: datetime = Field(default_factory=utc_now, sa_type=DateTime(timezone=True), nullable=False)
+
+# Define o modelo SQLModel para a tabela 'media'
+class Media(SQLModel, table=True):
+    __tablename__ = "media"
+    """
+    Representa um arquivo de mídia (imagem/vídeo) já armazenado.
+    """
+    __table_args__ = (
+        # Biblioteca de mídia do usuário, mais recentes primeiro
+        Index("ix_media_user_id_created_at", "user_id", "created_at", "id"),
+    )
+
+    id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
+    user_id: UUID = Field(foreign_key="users.id", nullable=False)
+    filename: str = Field(nullable=False)
+    content_type: str = Field(nullable=False)
+    size: int = Field(sa_type=BigInteger, nullable=False)
+    # SHA-256 (hex) do conteúdo, calculado enquanto os bytes chegam; aponta para o blob deduplicado
+    sha256: str = Field(max_length=64, foreign_key="media_blobs.sha256", nullable=False, index=True)
+    storage_key: str = Field(nullable=False)
+    derivatives_status: str = Field(default=DerivativeStatus.PENDING.value, nullable=False)
+    created_at: datetime = Field(default_factory=utc_now, sa_type=DateTime(timezone=True), nullable=False)
+
+# Define o modelo SQLModel para a tabela 'media_jobs'
+class MediaJob(SQLModel, table=True):
+    __tablename__ = "media_jobs"
+    """
+    Fila local (no próprio banco) de geração de derivados. Um job por blob:
+    a chave primária no SHA-256 deduplica uploads repetidos do mesmo conteúdo.
+    """
+    __table_args__ = (
+        # Busca do próximo job disponível
+        Index("ix_media_jobs_status_available_at", "status", "available_at"),
+    )
+
+    sha256: str = Field(primary_key=True, max_length=64, foreign_key="media_blobs.sha256")
+    content_type: str = Field(nullable=False)
+    status: str = Field(default=DerivativeStatus.PENDING.value, nullable=False)
+    attempts: int = Field(default=0, nullable=False)
+    last_error: Optional[str] = Field(default=None)
+    # Pendente: só roda a partir deste instante (retry com atraso).
+    # Em processamento: fim do lease; depois disso o job volta a ficar disponível.
+    available_at: datetime = Field(default_factory=utc_now, sa_type=DateTime(timezone=True), nullable=False)
+    created_at: datetime = Field(default_factory=utc_now, sa_type=DateTime(timezone=True), nullable=False)
+    updated_at: datetime = Field(default_factory=utc_now, sa_type=DateTime(timezone=True), nullable=False)
+
+# Define o modelo SQLModel para a tabela 'media_derivatives'
+class MediaDerivative(SQLModel, table=True):
+    __tablename__ = "media_derivatives"
+    """
+    Arquivo derivado de um blob (miniatura, prévia comprimida, capa de vídeo).
+    Compartilhado por todas as mídias com o mesmo conteúdo.
+    """
+    sha256: str = Field(primary_key=True, max_length=64, foreign_key="media_blobs.sha256")
+    kind: str = Field(primary_key=True, max_length=32)
+    storage_key: str = Field(nullable=False)
+    content_type: str = Field(nullable=False)
+    width: int = Field(nullable=False)
+    height: int = Field(nullable=False)
+    size: int = Field(sa_type=BigInteger, nullable=False)
+    created_at: datetime = Field(default_factory=utc_now, sa_type=DateTime(timezone=True), nullable=False)
+
+# Define o modelo SQLModel para a tabela 'upload_sessions'
+class UploadSession(SQLModel, table=True):
+    __tablename__ = "upload_sessions"
+    """
+    Sessão de upload retomável: o cliente envia blocos a partir de 'received_bytes'
+    e, ao final, confirma (finalize) para gerar o registro em 'media'.
+    """
+    id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
+    user_id: UUID = Field(foreign_key="users.id", nullable=False, index=True)
+    filename: str = Field(nullable=False)
+    content_type: str = Field(nullable=False)
+    # Tamanho total declarado pelo cliente (opcional)
+    total_size: Optional[int] = Field(default=None, sa_type=BigInteger)
+    # Offset confirmado: bytes já gravados de forma durável no storage
+    received_bytes: int = Field(default=0, sa_type=BigInteger, nullable=False)
+    status: str = Field(default=UploadStatus.ACTIVE.value, nullable=False)
+    media_id: Optional[UUID] = Field(default=None, foreign_key="media.id")
+    # SHA-256 do conteúdo, gravado ao começar a finalização (uma nova tentativa o reaproveita)
+    sha256: Optional[str] = Field(default=None, max_length=64)
+    # Envio/finalização em andamento (em qualquer processo) e até quando a reserva vale
+    lease_owner: Optional[str] = Field(default=None)
+    lease_expires_at: Optional[datetime] = Field(default=None, sa_type=DateTime(timezone=True))
+    created_at: datetime = Field(default_factory=utc_now, sa_type=DateTime(timezone=True), nullable=False)
+    updated_at: datetime = Field(default_factory=utc_now, sa_type=DateTime(timezone=True), nullable=False)
+
+    @property
+    def storage_key(self) -> str:
+        return f"uploads/{self.id}.part"
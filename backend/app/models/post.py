@@ -0,0 +1,170 @@
+from enum import Enum
+from typing import Optional
+from uuid import UUID, uuid4
+from datetime import date, datetime, timezone
+
+from sqlalchemy import DDL, BigInteger, DateTime, Index, Integer, String, event
+from sqlmodel import Field, SQLModel
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+class PostStatus(str, Enum):
+    """
+    Estados possíveis de um post.
+    """
+    DRAFT = "draft"
+    SCHEDULED = "scheduled"
+    PUBLISHING = "publishing"
+    PUBLISHED = "published"
+    FAILED = "failed"
+
+# Define o modelo SQLModel para a tabela 'posts'
+class Post(SQLModel, table=True):
+    __tablename__ = "posts"
+    """
+    Representa um post (agendado ou não) de um usuário em uma rede social.
+    """
+    __table_args__ = (
+        # Listagem paginada por cursor e consultas de calendário: um único range scan por usuário.
+        # O 'id' entra como desempate, deixando a ordenação (scheduled_at, id) inteira no índice.
+        Index("ix_posts_user_id_scheduled_at", "user_id", "scheduled_at", "id"),
+        # Filtros por status (ex: rascunhos, falhas) do usuário
+        Index("ix_posts_user_id_status", "user_id", "status"),
+        # Fila do publicador: "posts agendados que vencem antes de T", lidos em lote por ordem de horário
+        Index("ix_posts_status_scheduled_at", "status", "scheduled_at"),
+    )
+
+    id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
+    user_id: UUID = Field(foreign_key="users.id", nullable=False)
+    content: str = Field(nullable=False)
+    platform: str = Field(nullable=False)
+    # Conta/página na rede social usada na publicação (None: conta padrão do usuário)
+    account_id: Optional[str] = Field(default=None)
+    status: str = Field(default=PostStatus.DRAFT.value, nullable=False)
+    # Datas sempre em UTC
+    scheduled_at: datetime = Field(sa_type=DateTime(timezone=True), nullable=False)
+    published_at: Optional[datetime] = Field(default=None, sa_type=DateTime(timezone=True))
+    # Publicação: ID do post na rede social e último erro (se houver)
+    external_id: Optional[str] = Field(default=None)
+    last_error: Optional[str] = Field(default=None)
+    attempts: int = Field(default=0, nullable=False)
+    # Reserva do post por um processo do publicador. Enquanto o lease vale, outros processos
+    # ignoram o post; se o processo morrer, o post volta para a fila quando o lease expirar.
+    # Sem dono, lease_expires_at indica quando uma nova tentativa pode ser feita.
+    lease_owner: Optional[str] = Field(default=None)
+    lease_expires_at: Optional[datetime] = Field(default=None, sa_type=DateTime(timezone=True))
+    created_at: datetime = Field(default_factory=utc_now, sa_type=DateTime(timezone=True), nullable=False)
+    updated_at: datetime = Field(default_factory=utc_now, sa_type=DateTime(timezone=True), nullable=False)
+
+# Define o modelo SQLModel para a tabela 'post_media'
+class PostMedia(SQLModel, table=True):
+    __tablename__ = "post_media"
+    """
+    Mídias anexadas a um post. Cada anexo conta uma referência no blob da mídia.
+    """
+    post_id: UUID = Field(foreign_key="posts.id", primary_key=True)
+    media_id: UUID = Field(foreign_key="media.id", primary_key=True, index=True)
+    position: int = Field(default=0, nullable=False)
+    created_at: datetime = Field(default_factory=utc_now, sa_type=DateTime(timezone=True), nullable=False)
+
+# Define o modelo SQLModel para a tabela 'post_daily_counts'
+class PostDailyCount(SQLModel, table=True):
+    __tablename__ = "post_daily_counts"
+    """
+    Rollup do calendário: quantidade de posts por (usuário, dia UTC de scheduled_at, status, rede).
+    Mantido junto com cada escrita em posts (mesma transação). Linhas que chegam a zero são
+    mantidas, para que o modo de diferenças informe o dia que ficou vazio.
+    """
+
+    # A chave primária (user_id, day, ...) já serve o mês/trimestre do calendário: um range scan por usuário
+    user_id: UUID = Field(foreign_key="users.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    status: str = Field(primary_key=True)
+    platform: str = Field(primary_key=True)
+    count: int = Field(default=0, nullable=False)
+    # Versão do usuário (PostRollupVersion) na última alteração desta linha
+    version: int = Field(default=0, nullable=False)
+
+# Define o modelo SQLModel para a tabela 'post_rollup_versions'
+class PostRollupVersion(SQLModel, table=True):
+    __tablename__ = "post_rollup_versions"
+    """
+    Versão dos rollups de cada usuário, incrementada a cada alteração. O UPDATE trava a linha
+    até o commit, então as versões de um usuário são gravadas em ordem.
+    """
+    user_id: UUID = Field(foreign_key="users.id", primary_key=True)
+    version: int = Field(default=0, nullable=False)
+
+# Configuração de texto do PostgreSQL usada no índice de busca. 'simple' não remove stopwords
+# nem reduz palavras ao radical (as legendas misturam idiomas); acentos e caixa são
+# normalizados antes, no texto gravado em post_search.
+SEARCH_TEXT_CONFIG = "simple"
+
+# Tamanho máximo de uma tag (com o '#' ou '@')
+MAX_TAG_LENGTH = 100
+
+# Ordem por bytes ("C") no PostgreSQL: o autocomplete por prefixo é um range scan na chave primária
+TAG_TYPE = String(MAX_TAG_LENGTH).with_variant(String(MAX_TAG_LENGTH, collation="C"), "postgresql")
+
+# Define o modelo SQLModel para a tabela 'post_search'
+class PostSearchDocument(SQLModel, table=True):
+    __tablename__ = "post_search"
+    """
+    Texto pesquisável de cada post (legenda em minúsculas e sem acentos), mantido junto com
+    cada escrita em posts (mesma transação). O índice de texto completo fica no banco:
+    - PostgreSQL: coluna gerada 'document' (tsvector) com índice GIN;
+    - SQLite: tabela FTS5 'post_search_fts' sobre esta tabela, sincronizada por triggers.
+    """
+    # INTEGER no SQLite: é o rowid, usado pela tabela FTS5 para apontar para a linha
+    id: Optional[int] = Field(default=None, primary_key=True, sa_type=BigInteger().with_variant(Integer(), "sqlite"))
+    post_id: UUID = Field(foreign_key="posts.id", unique=True, nullable=False)
+    user_id: UUID = Field(foreign_key="users.id", index=True, nullable=False)
+    text: str = Field(nullable=False)
+
+for statement in (
+    f"ALTER TABLE post_search ADD COLUMN document tsvector "
+    f"GENERATED ALWAYS AS (to_tsvector('{SEARCH_TEXT_CONFIG}', text)) STORED",
+    "CREATE INDEX ix_post_search_document ON post_search USING GIN (document)",
+):
+    event.listen(PostSearchDocument.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+for statement in (
+    "CREATE VIRTUAL TABLE post_search_fts USING fts5("
+    "text, content='post_search', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER post_search_ai AFTER INSERT ON post_search BEGIN "
+    "INSERT INTO post_search_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER post_search_ad AFTER DELETE ON post_search BEGIN "
+    "INSERT INTO post_search_fts(post_search_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER post_search_au AFTER UPDATE ON post_search BEGIN "
+    "INSERT INTO post_search_fts(post_search_fts, rowid, text) VALUES ('delete', old.id, old.text); "
+    "INSERT INTO post_search_fts(rowid, text) VALUES (new.id, new.text); END",
+):
+    event.listen(PostSearchDocument.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+# Define o modelo SQLModel para a tabela 'post_tags'
+class PostTag(SQLModel, table=True):
+    __tablename__ = "post_tags"
+    """
+    Hashtags ('#verao') e menções ('@marca') de cada post, normalizadas (minúsculas, sem acentos).
+    """
+    __table_args__ = (
+        # Posts de uma tag, mais recentes primeiro, com paginação keyset direto no índice
+        Index("ix_post_tags_user_id_tag_scheduled_at", "user_id", "tag", "scheduled_at", "post_id"),
+    )
+
+    post_id: UUID = Field(foreign_key="posts.id", primary_key=True)
+    tag: str = Field(sa_type=TAG_TYPE, primary_key=True)
+    user_id: UUID = Field(foreign_key="users.id", nullable=False)
+    # Cópia de posts.scheduled_at (atualizada quando o post é reagendado)
+    scheduled_at: datetime = Field(sa_type=DateTime(timezone=True), nullable=False)
+
+# Define o modelo SQLModel para a tabela 'post_tag_counts'
+class PostTagCount(SQLModel, table=True):
+    __tablename__ = "post_tag_counts"
+    """
+    Quantidade de posts do usuário com cada tag (autocomplete). Linhas que chegam a zero são mantidas.
+    """
+    user_id: UUID = Field(foreign_key="users.id", primary_key=True)
+    tag: str = Field(sa_type=TAG_TYPE, primary_key=True)
+    count: int = Field(default=0, nullable=False)
@@ -13,11 +13,6 @@ class User(SQLModel, table=True):
     id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True, index=True)
     email: str = Field(unique=True, index=True, nullable=False)
     name: str = Field(nullable=False)
-    # password_hash não é um campo Field pois será gerenciado pelo Supabase Auth,
-    # ou se usarmos auth interno, seria um Field. Por enquanto,
-    # vamos focar nos dados que armazenamos diretamente após a criação do usuário via Supabase Auth.
-    # Se você for armazenar o hash no seu próprio DB, adicione:
-    # password_hash: str = Field(nullable=False)
     role: str = Field(default="user", nullable=False)
     created_at: datetime = Field(default_factory=datetime.now, nullable=False)
     updated_at: datetime = Field(default_factory=datetime.now, nullable=False)
@@ -29,4 +24,15 @@ class User(SQLModel, table=True):
     class Config:
         # Garante que os campos são populados mesmo se não fornecidos
         # (útil para campos com default_factory)
-        populate_by_name = True
\ No newline at end of file
+        populate_by_name = True
+
+# Define o modelo SQLModel para a tabela 'user_credentials'
+class UserCredential(SQLModel, table=True):
+    __tablename__ = "user_credentials"
+    """
+    Hash bcrypt da senha, só com AUTH_BACKEND="internal" (com o Supabase Auth a senha fica no
+    Supabase). Fica fora de 'users' para que nenhuma consulta a usuários dependa desta tabela.
+    """
+    user_id: UUID = Field(foreign_key="users.id", primary_key=True)
+    password_hash: str = Field(nullable=False)
+    updated_at: datetime = Field(default_factory=datetime.now, nullable=False)
@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from pydantic import BaseModel, Field
+
+# --- Schemas de Entrada (Request Models) ---
+
+class UploadSessionCreate(BaseModel):
+    """
+    Schema para abrir uma sessão de upload retomável.
+    filename: nome original do arquivo.
+    content_type: MIME type (ex: "video/mp4").
+    total_size: tamanho total em bytes, se conhecido (validado no finalize).
+    """
+    filename: str = Field(min_length=1, max_length=255)
+    content_type: str = Field(min_length=1, max_length=100)
+    total_size: Optional[int] = Field(default=None, ge=0)
+
+class UploadFinalize(BaseModel):
+    """
+    Schema opcional para finalizar um upload.
+    sha256: hash esperado pelo cliente; se informado, precisa bater com o calculado.
+    """
+    sha256: Optional[str] = Field(default=None, min_length=64, max_length=64)
+
+class MediaFromHash(BaseModel):
+    """
+    Schema para criar uma mídia a partir de um conteúdo já armazenado (deduplicação).
+    sha256: hash do arquivo calculado pelo cliente.
+    """
+    sha256: str = Field(min_length=64, max_length=64, pattern="^[0-9a-fA-F]{64}$")
+    filename: str = Field(min_length=1, max_length=255)
+    content_type: str = Field(min_length=1, max_length=100)
+
+# --- Schemas de Saída (Response Models) ---
+
+class UploadSessionResponse(BaseModel):
+    """
+    Estado de uma sessão de upload.
+    offset: próximo byte esperado (envie o próximo bloco a partir daqui).
+    chunk_size: tamanho de bloco recomendado.
+    """
+    id: UUID
+    filename: str
+    content_type: str
+    total_size: Optional[int] = None
+    offset: int
+    status: str
+    chunk_size: int
+    media_id: Optional[UUID] = None
+
+class MediaResponse(BaseModel):
+    """
+    Schema para representar uma mídia na resposta da API.
+    """
+    id: UUID
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    # Geração de miniaturas/prévias: pending, processing, ready, failed ou skipped
+    derivatives_status: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class MediaDerivativeResponse(BaseModel):
+    """
+    Derivado de uma mídia (kind: preview, thumb_<tamanho> ou poster).
+    """
+    kind: str
+    content_type: str
+    width: int
+    height: int
+    size: int
+
+    class Config:
+        from_attributes = True
+
+class MediaPage(BaseModel):
+    """
+    Página da biblioteca de mídia (paginação por cursor).
+    """
+    items: list[MediaResponse]
+    next_cursor: Optional[str] = None
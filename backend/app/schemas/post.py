@@ -0,0 +1,176 @@
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Optional
+from uuid import UUID
+from pydantic import BaseModel, Field, field_validator
+
+from app.models.post import PostStatus
+
+def to_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Normaliza datas para UTC. Datas sem fuso são interpretadas como UTC.
+    """
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+# --- Schemas de Entrada (Request Models) ---
+
+class PostInputStatus(str, Enum):
+    """
+    Estados que o cliente pode definir. 'publishing', 'published' e 'failed'
+    são definidos apenas pelo publicador.
+    """
+    DRAFT = PostStatus.DRAFT.value
+    SCHEDULED = PostStatus.SCHEDULED.value
+
+class PostCreate(BaseModel):
+    """
+    Schema para criação de um post.
+    content: texto/legenda do post.
+    platform: rede social de destino (ex: "instagram").
+    account_id: conta/página na rede social (opcional).
+    scheduled_at: data/hora de publicação (convertida para UTC).
+    status: "draft" ou "scheduled" (padrão "draft").
+    """
+    content: str = Field(min_length=1)
+    platform: str = Field(min_length=1, max_length=50)
+    account_id: Optional[str] = Field(default=None, max_length=255)
+    scheduled_at: datetime
+    status: PostInputStatus = PostInputStatus.DRAFT
+
+    _normalize_scheduled_at = field_validator("scheduled_at")(to_utc)
+
+class PostUpdate(BaseModel):
+    """
+    Schema para atualização parcial de um post. Apenas os campos enviados são alterados.
+    account_id: null remove a conta (o post volta a usar a conta padrão do usuário);
+    os demais campos são obrigatórios no post e não aceitam null.
+    status: "draft" ou "scheduled".
+    """
+    content: Optional[str] = Field(default=None, min_length=1)
+    platform: Optional[str] = Field(default=None, min_length=1, max_length=50)
+    account_id: Optional[str] = Field(default=None, max_length=255)
+    scheduled_at: Optional[datetime] = None
+    status: Optional[PostInputStatus] = None
+
+    @field_validator("content", "platform", "scheduled_at", "status")
+    @classmethod
+    def _reject_null(cls, value):
+        # Só roda para campos enviados: omitir o campo mantém o valor atual
+        if value is None:
+            raise ValueError("não pode ser null; omita o campo para manter o valor atual")
+        return value
+
+    _normalize_scheduled_at = field_validator("scheduled_at")(to_utc)
+
+class PostFileFormat(str, Enum):
+    """
+    Formatos aceitos na importação/exportação em massa.
+    """
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+class PostImportRow(PostCreate):
+    """
+    Uma linha da importação em massa (NDJSON: um objeto por linha; CSV: colunas com estes nomes).
+    id: opcional. Reimportar o mesmo arquivo com ids não duplica posts (as linhas repetidas são ignoradas).
+    """
+    id: Optional[UUID] = None
+
+# --- Schemas de Saída (Response Models) ---
+
+class PostResponse(BaseModel):
+    """
+    Schema para representar um post na resposta da API.
+    Com seleção esparsa de campos (?fields=...), apenas os campos pedidos são retornados.
+    """
+    id: UUID
+    user_id: Optional[UUID] = None
+    content: Optional[str] = None
+    platform: Optional[str] = None
+    account_id: Optional[str] = None
+    status: Optional[str] = None
+    scheduled_at: Optional[datetime] = None
+    published_at: Optional[datetime] = None
+    external_id: Optional[str] = None
+    last_error: Optional[str] = None
+    attempts: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class PostPage(BaseModel):
+    """
+    Página de posts com paginação por cursor.
+    next_cursor: cursor opaco para a próxima página (None quando não há mais itens).
+    """
+    items: list[PostResponse]
+    next_cursor: Optional[str] = None
+
+class PostCalendarResponse(BaseModel):
+    """
+    Posts agendados dentro de um intervalo de datas [start, end).
+    next_cursor: presente quando o intervalo tem mais posts que o limite por resposta;
+    envie como 'cursor' para receber os seguintes.
+    """
+    start: datetime
+    end: datetime
+    items: list[PostResponse]
+    next_cursor: Optional[str] = None
+
+class PostDaySummary(BaseModel):
+    """
+    Quantidade de posts de um dia (UTC), no total, por status e por rede social.
+    """
+    day: date
+    total: int
+    by_status: dict[str, int]
+    by_platform: dict[str, int]
+
+class PostCalendarSummary(BaseModel):
+    """
+    Resumo do calendário/dashboard em [start, end).
+    version: versão dos dados; envie como 'since' para receber só os dias alterados depois dela.
+    since: versão pedida (None: todos os dias com posts). Com 'since', um dia que ficou
+    sem posts aparece com total 0.
+    total/by_status/by_platform: totais do intervalo inteiro.
+    """
+    start: date
+    end: date
+    version: int
+    since: Optional[int] = None
+    total: int
+    by_status: dict[str, int]
+    by_platform: dict[str, int]
+    days: list[PostDaySummary]
+
+class PostTagSuggestion(BaseModel):
+    """
+    Tag do autocomplete (ex: "#verao" ou "@marca") e quantos posts do usuário a usam.
+    """
+    tag: str
+    count: int
+
+class PostImportError(BaseModel):
+    """
+    Erro de uma linha da importação (line: número da linha no arquivo, começando em 1).
+    """
+    line: int
+    message: str
+
+class PostImportResult(BaseModel):
+    """
+    Resultado da importação em massa.
+    inserted: posts criados.
+    skipped: linhas válidas ignoradas por já existir um post com o mesmo id.
+    failed: linhas com erro (apenas as primeiras POSTS_IMPORT_MAX_ERRORS aparecem em 'errors').
+    """
+    inserted: int = 0
+    skipped: int = 0
+    failed: int = 0
+    errors: list[PostImportError] = []
@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import delete, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import async_session_maker, dialect_insert
+from app.core.events import publish_event
+from app.core.imaging import DerivativeError, generate_derivatives
+from app.core.storage import StorageBackend
+from app.models.media import DerivativeStatus, Media, MediaBlob, MediaDerivative, MediaJob
+from app.models.post import utc_now
+
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+# Acorda o worker deste processo assim que um job é enfileirado (sem esperar o polling)
+_wakeup: Optional[asyncio.Event] = None
+
+def supports_derivatives(content_type: str) -> bool:
+    return content_type.startswith(("image/", "video/"))
+
+def derivative_key(sha256: str, kind: str, content_type: str) -> str:
+    """
+    Chave do derivado, ao lado do blob de origem (ex: derivatives/ab/cd/abcd.../thumb_256.webp).
+    """
+    extension = content_type.split("/")[-1]
+    return f"derivatives/{sha256[:2]}/{sha256[2:4]}/{sha256}/{kind}.{extension}"
+
+async def enqueue_derivatives(media: Media, db: AsyncSession) -> None:
+    """
+    Enfileira a geração de derivados do conteúdo da mídia e copia o estado atual do job
+    para a mídia. O mesmo conteúdo nunca é processado duas vezes (um job por SHA-256).
+    Não faz commit: chame notify_worker() depois do commit.
+    """
+    if not supports_derivatives(media.content_type):
+        media.derivatives_status = DerivativeStatus.SKIPPED.value
+        return
+    await db.exec(
+        dialect_insert(db, MediaJob)
+        .values(sha256=media.sha256, content_type=media.content_type, available_at=utc_now(),
+                created_at=utc_now(), updated_at=utc_now())
+        .on_conflict_do_nothing(index_elements=[MediaJob.sha256])
+    )
+    job_status = (await db.exec(select(MediaJob.status).where(MediaJob.sha256 == media.sha256))).one()
+    media.derivatives_status = job_status
+
+def notify_worker() -> None:
+    if _wakeup is not None:
+        _wakeup.set()
+
+async def list_derivatives(sha256: str, db: AsyncSession) -> list[MediaDerivative]:
+    statement = select(MediaDerivative).where(MediaDerivative.sha256 == sha256).order_by(MediaDerivative.kind)
+    return list((await db.exec(statement)).all())
+
+async def get_derivative(sha256: str, kind: str, db: AsyncSession) -> Optional[MediaDerivative]:
+    statement = select(MediaDerivative).where(MediaDerivative.sha256 == sha256, MediaDerivative.kind == kind)
+    return (await db.exec(statement)).first()
+
+async def forget_derivatives(sha256: str, db: AsyncSession) -> list[str]:
+    """
+    Remove o job e os registros de derivados de um blob (usado pelo coletor de lixo).
+    Não faz commit. Retorna as chaves dos arquivos a apagar do storage.
+    """
+    keys = (await db.exec(select(MediaDerivative.storage_key).where(MediaDerivative.sha256 == sha256))).all()
+    await db.exec(delete(MediaDerivative).where(MediaDerivative.sha256 == sha256))
+    await db.exec(delete(MediaJob).where(MediaJob.sha256 == sha256))
+    return list(keys)
+
+async def _set_media_status(db: AsyncSession, sha256: str, job_status: DerivativeStatus) -> list[tuple[UUID, UUID]]:
+    """
+    Copia o estado do job para todas as mídias com o mesmo conteúdo. Não faz commit.
+    Retorna (id, user_id) das mídias alteradas, para publish_media_status() depois do commit.
+    """
+    statement = (
+        update(Media)
+        .where(Media.sha256 == sha256)
+        .values(derivatives_status=job_status.value)
+        .returning(Media.id, Media.user_id)
+        .execution_options(synchronize_session=False)
+    )
+    return list((await db.exec(statement)).all())
+
+async def publish_media_status(media_rows: list[tuple[UUID, UUID]], job_status: DerivativeStatus) -> None:
+    """
+    Avisa os donos das mídias (GET /events) da mudança de estado dos derivados.
+    """
+    for media_id, user_id in media_rows:
+        await publish_event(
+            user_id, "media", {"id": str(media_id), "action": "updated", "derivatives_status": job_status.value}
+        )
+
+async def _set_status(
+    db: AsyncSession, sha256: str, job_status: DerivativeStatus, **values
+) -> list[tuple[UUID, UUID]]:
+    """
+    Atualiza o job e o estado exibido em todas as mídias com o mesmo conteúdo.
+    Não faz commit; retorna as mídias alteradas (ver _set_media_status).
+    """
+    now = utc_now()
+    await db.exec(
+        update(MediaJob).where(MediaJob.sha256 == sha256).values(status=job_status.value, updated_at=now, **values)
+    )
+    return await _set_media_status(db, sha256, job_status)
+
+async def claim_next_job(db: AsyncSession) -> Optional[tuple[MediaJob, str]]:
+    """
+    Reserva o próximo job disponível: pendente ou com lease expirado (worker que morreu).
+    A reserva é um UPDATE condicional, então duas réplicas nunca pegam o mesmo job.
+    Retorna o job e a chave do blob de origem.
+    """
+    now = utc_now()
+    available = (
+        MediaJob.status.in_([DerivativeStatus.PENDING.value, DerivativeStatus.PROCESSING.value]),
+        MediaJob.available_at <= now,
+    )
+    candidates = (await db.exec(
+        select(MediaJob.sha256).where(*available).order_by(MediaJob.available_at).limit(10)
+    )).all()
+    for sha256 in candidates:
+        result = await db.exec(
+            update(MediaJob)
+            .where(MediaJob.sha256 == sha256, *available)
+            .values(
+                status=DerivativeStatus.PROCESSING.value,
+                attempts=MediaJob.attempts + 1,
+                available_at=now + timedelta(seconds=settings.MEDIA_JOB_LEASE_SECONDS),
+                updated_at=now,
+            )
+        )
+        if result.rowcount == 0:
+            # Outro worker reservou primeiro
+            continue
+        media_rows = await _set_media_status(db, sha256, DerivativeStatus.PROCESSING)
+        job = (await db.exec(select(MediaJob).where(MediaJob.sha256 == sha256))).one()
+        source_key = (await db.exec(select(MediaBlob.storage_key).where(MediaBlob.sha256 == sha256))).one()
+        await db.commit()
+        await publish_media_status(media_rows, DerivativeStatus.PROCESSING)
+        return job, source_key
+    await db.commit()
+    return None
+
+async def process_job(
+    job: MediaJob, source_key: str, storage: StorageBackend, executor: ProcessPoolExecutor
+) -> None:
+    """
+    Gera os derivados no pool de processos, grava no storage e registra o resultado.
+    Falhas temporárias voltam para a fila com atraso, até MEDIA_JOB_MAX_ATTEMPTS.
+    """
+    loop = asyncio.get_running_loop()
+    output_dir = tempfile.mkdtemp(prefix="derivatives_")
+    try:
+        async with storage.local_path(source_key) as source_path:
+            derivatives = await loop.run_in_executor(
+                executor,
+                generate_derivatives,
+                source_path,
+                job.content_type,
+                output_dir,
+                settings.MEDIA_THUMBNAIL_SIZES,
+                settings.MEDIA_PREVIEW_MAX_SIZE,
+                settings.MEDIA_DERIVATIVE_QUALITY,
+                settings.MEDIA_POSTER_OFFSET_SECONDS,
+            )
+        rows = []
+        for derivative in derivatives:
+            key = derivative_key(job.sha256, derivative.kind, derivative.content_type)
+            size = await asyncio.to_thread(os.path.getsize, derivative.path)
+            await storage.put_file(key, derivative.path)
+            rows.append({
+                "sha256": job.sha256,
+                "kind": derivative.kind,
+                "storage_key": key,
+                "content_type": derivative.content_type,
+                "width": derivative.width,
+                "height": derivative.height,
+                "size": size,
+                "created_at": utc_now(),
+            })
+    except Exception as e:
+        retry = not isinstance(e, DerivativeError) and job.attempts < settings.MEDIA_JOB_MAX_ATTEMPTS
+        logger.warning("Falha ao gerar derivados de %s (tentativa %d): %s", job.sha256, job.attempts, e)
+        job_status = DerivativeStatus.PENDING if retry else DerivativeStatus.FAILED
+        async with async_session_maker() as db:
+            if retry:
+                media_rows = await _set_status(
+                    db, job.sha256, job_status, last_error=str(e)[:500],
+                    available_at=utc_now() + timedelta(seconds=settings.MEDIA_JOB_RETRY_DELAY_SECONDS),
+                )
+            else:
+                media_rows = await _set_status(db, job.sha256, job_status, last_error=str(e)[:500])
+            await db.commit()
+        await publish_media_status(media_rows, job_status)
+        return
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    async with async_session_maker() as db:
+        if rows:
+            statement = dialect_insert(db, MediaDerivative).values(rows)
+            statement = statement.on_conflict_do_update(
+                index_elements=[MediaDerivative.sha256, MediaDerivative.kind],
+                set_={
+                    column: statement.excluded[column]
+                    for column in ("storage_key", "content_type", "width", "height", "size")
+                },
+            )
+            await db.exec(statement)
+        media_rows = await _set_status(db, job.sha256, DerivativeStatus.READY, last_error=None)
+        await db.commit()
+    await publish_media_status(media_rows, DerivativeStatus.READY)
+
+async def run_derivative_worker(storage: StorageBackend) -> None:
+    """
+    Loop do worker de derivados (iniciado no lifespan da aplicação).
+    Processa até MEDIA_WORKER_PROCESSES jobs ao mesmo tempo, um por processo filho,
+    para que o trabalho de CPU nunca rode no event loop do uvicorn.
+    """
+    global _wakeup
+    _wakeup = asyncio.Event()
+    # 'spawn': não herda threads/event loop do processo do servidor (fork com threads é inseguro)
+    executor = ProcessPoolExecutor(
+        max_workers=settings.MEDIA_WORKER_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+    )
+    slots = asyncio.Semaphore(settings.MEDIA_WORKER_PROCESSES)
+    running: set[asyncio.Task] = set()
+
+    def on_done(task: asyncio.Task) -> None:
+        running.discard(task)
+        slots.release()
+        if not task.cancelled() and task.exception():
+            logger.error("Erro no job de derivados", exc_info=task.exception())
+
+    try:
+        while True:
+            await slots.acquire()
+            # Limpa antes de consultar: um aviso durante a consulta não se perde
+            _wakeup.clear()
+            try:
+                async with async_session_maker() as db:
+                    claimed = await claim_next_job(db)
+            except Exception:
+                logger.exception("Erro ao buscar jobs de derivados")
+                claimed = None
+            if claimed is None:
+                slots.release()
+                try:
+                    await asyncio.wait_for(_wakeup.wait(), timeout=settings.MEDIA_WORKER_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            task = asyncio.create_task(process_job(*claimed, storage, executor))
+            running.add(task)
+            task.add_done_callback(on_done)
+    finally:
+        # Jobs interrompidos voltam para a fila quando o lease expirar
+        for task in running:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+        _wakeup = None
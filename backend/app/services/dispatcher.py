@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import math
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from app.core.config import get_settings
+from app.core.rate_limit import TokenBucket
+from app.models.post import Post
+from app.services.publishers import PublishError, Publisher, PublisherRegistry
+
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+# Uma fila de conta sem posts por esse tempo é descartada (se o bucket já estiver cheio)
+LANE_IDLE_SECONDS = 60.0
+
+class DispatcherBusy(Exception):
+    """
+    A fila da conta está cheia: o post deve voltar para a fila do publicador
+    e ser tentado de novo depois de `retry_after` segundos (não conta como falha).
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Fila cheia; tente novamente em {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+class _Lane:
+    """
+    Fila de chamadas de uma (rede, conta), com o token bucket da conta.
+    """
+
+    def __init__(self, publisher: Publisher):
+        self.publisher = publisher
+        self.bucket = TokenBucket(publisher.rate_per_second, publisher.burst) if publisher.rate_per_second else None
+        # Sem limite de taxa, a concorrência já é limitada pelo publicador (vagas por rede)
+        self.capacity = publisher.max_batch_size * settings.DISPATCH_LANE_DEPTH if self.bucket else None
+        self.admitted = 0
+        self.queue: asyncio.Queue[tuple[Post, asyncio.Future]] = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+        # Chamadas em andamento (em paralelo; a próxima só depende do token, não da resposta)
+        self.calls: set[asyncio.Task] = set()
+
+    @property
+    def full(self) -> bool:
+        return self.capacity is not None and self.admitted >= self.capacity
+
+    def retry_after(self) -> float:
+        """
+        Estimativa de quando a fila terá vaga: tempo para o bucket liberar os lotes já aceitos.
+        """
+        batches_ahead = math.ceil(self.admitted / self.publisher.max_batch_size)
+        return max(1.0, self.bucket.delay(batches_ahead + 1))
+
+class PublishDispatcher:
+    """
+    Camada entre o publicador e os adaptadores das redes.
+
+    - Limita a taxa de chamadas com um token bucket por (rede, conta).
+    - Junta posts da mesma conta em chamadas em lote quando a rede suporta
+      (max_batch_size > 1): enquanto espera o token, a fila continua acumulando.
+    - Aplica backpressure: quando a fila de uma conta está cheia, admit() recusa o post
+      (DispatcherBusy) e o publicador o devolve para o banco com atraso, em vez de
+      empilhar chamadas que falhariam por limite de taxa e gerariam novas tentativas.
+    """
+
+    def __init__(self, registry: PublisherRegistry):
+        self.registry = registry
+        self._lanes: dict[tuple[str, str], _Lane] = {}
+
+    def _lane(self, platform: str, account: str) -> Optional[_Lane]:
+        lane = self._lanes.get((platform, account))
+        if lane is None:
+            publisher = self.registry.get(platform)
+            if publisher is None:
+                return None
+            lane = self._lanes[(platform, account)] = _Lane(publisher)
+        return lane
+
+    @contextmanager
+    def admit(self, platform: str, account: str) -> Iterator[None]:
+        """
+        Reserva uma vaga na fila da conta enquanto o post é publicado.
+        Levanta DispatcherBusy se a fila estiver cheia.
+        """
+        lane = self._lane(platform, account)
+        if lane is None:
+            # Sem adaptador: submit() falha com erro definitivo
+            yield
+            return
+        if lane.full:
+            raise DispatcherBusy(lane.retry_after())
+        lane.admitted += 1
+        try:
+            yield
+        finally:
+            lane.admitted -= 1
+
+    async def submit(self, post: Post, account: str) -> str:
+        """
+        Enfileira o post na fila da conta e espera o resultado (ID externo).
+        Levanta PublishError em caso de falha.
+        """
+        lane = self._lane(post.platform, account)
+        if lane is None:
+            raise PublishError(f"Nenhum publicador configurado para '{post.platform}'.", retryable=False)
+        future = asyncio.get_running_loop().create_future()
+        lane.queue.put_nowait((post, future))
+        if lane.task is None or lane.task.done():
+            lane.task = asyncio.create_task(self._run_lane((post.platform, account), lane))
+        return await future
+
+    def _is_idle(self, lane: _Lane) -> bool:
+        """
+        Fila sem posts, chamadas nem vagas reservadas, com o bucket cheio e sem pausa:
+        descartá-la não muda nada, uma fila nova para a conta começaria no mesmo estado.
+        """
+        if not lane.queue.empty() or lane.calls or lane.admitted:
+            return False
+        return lane.bucket is None or lane.bucket.delay(lane.bucket.capacity) == 0
+
+    async def _run_lane(self, key: tuple[str, str], lane: _Lane) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                batch = [await asyncio.wait_for(lane.queue.get(), timeout=LANE_IDLE_SECONDS)]
+            except asyncio.TimeoutError:
+                if not self._is_idle(lane):
+                    continue
+                # Sem isso, cada conta que já publicou ficaria para sempre em _lanes
+                if self._lanes.get(key) is lane:
+                    del self._lanes[key]
+                lane.task = None
+                return
+            if lane.publisher.max_batch_size > 1:
+                # Junta posts até o lote encher ou o token ficar disponível (no mínimo a janela de lote)
+                wait = max(settings.DISPATCH_BATCH_WINDOW_SECONDS, lane.bucket.delay() if lane.bucket else 0)
+                deadline = loop.time() + wait
+                while len(batch) < lane.publisher.max_batch_size:
+                    if not lane.queue.empty():
+                        batch.append(lane.queue.get_nowait())
+                        continue
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(lane.queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+            if lane.bucket:
+                await lane.bucket.acquire()
+            call = asyncio.create_task(self._call(lane, batch))
+            lane.calls.add(call)
+            call.add_done_callback(lane.calls.discard)
+
+    async def _call(self, lane: _Lane, batch: list[tuple[Post, asyncio.Future]]) -> None:
+        posts = [post for post, _ in batch]
+        try:
+            results = await asyncio.wait_for(
+                lane.publisher.publish_batch(posts), timeout=settings.SCHEDULER_PUBLISH_TIMEOUT_SECONDS
+            )
+        except PublishError as e:
+            results = [e] * len(posts)
+        except asyncio.TimeoutError:
+            results = [PublishError("Tempo esgotado ao publicar.")] * len(posts)
+        except Exception as e:
+            logger.exception("Erro inesperado no adaptador de %s", posts[0].platform)
+            results = [PublishError(f"{type(e).__name__}: {e}")] * len(posts)
+        if len(results) != len(posts):
+            results = [PublishError("Resposta em lote incompleta da rede.")] * len(posts)
+
+        retry_after = max((r.retry_after or 0 for r in results if isinstance(r, PublishError)), default=0)
+        if retry_after and lane.bucket:
+            # A rede pediu para esperar: pausa a conta inteira, não só estes posts
+            lane.bucket.pause(retry_after)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, PublishError):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def aclose(self) -> None:
+        """
+        Encerra as filas; posts ainda não enviados falham como temporários.
+        """
+        for lane in self._lanes.values():
+            if lane.task:
+                lane.task.cancel()
+            for call in lane.calls:
+                call.cancel()
+            while not lane.queue.empty():
+                _, future = lane.queue.get_nowait()
+                if not future.done():
+                    future.set_exception(PublishError("Publicador encerrado."))
@@ -0,0 +1,715 @@
+import asyncio
+import contextlib
+import hashlib
+import logging
+from collections import Counter
+from datetime import timedelta
+from typing import AsyncIterator, NoReturn, Optional
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, exists, or_, tuple_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.requests import ClientDisconnect
+
+from app.core.config import get_settings
+from app.core.database import async_session_maker, dialect_insert
+from app.core.events import publish_event
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.storage import StorageBackend
+from app.models.media import Media, MediaBlob, UploadSession, UploadStatus
+from app.models.post import PostMedia, utc_now
+from app.schemas.media import UploadSessionCreate, UploadSessionResponse
+from app.services.derivative_service import enqueue_derivatives, forget_derivatives, notify_worker
+
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+# Estado do SHA-256 de cada upload em andamento neste processo: upload_id -> (offset, hasher).
+# hashlib não serializa o estado; se o upload for retomado em outro processo (ou após
+# um restart), o hash é reconstruído lendo os bytes já gravados. Só recebe sessões que
+# confirmaram bytes; as encerradas saem em expire_stale_uploads.
+# Envios simultâneos na mesma sessão são barrados pela reserva (lease) na tabela.
+_upload_hashers: dict[UUID, tuple[int, "hashlib._Hash"]] = {}
+
+def blob_key(sha256: str) -> str:
+    """
+    Chave do conteúdo endereçado pelo hash (ex: blobs/ab/cd/abcd...).
+    """
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+async def adjust_blob_refs(db: AsyncSession, deltas: dict[str, int]) -> None:
+    """
+    Soma `delta` ao ref_count de cada blob com um UPDATE atômico
+    (ref_count = ref_count + delta). Não faz commit: roda na transação do chamador.
+    """
+    now = utc_now()
+    for sha256, delta in deltas.items():
+        if delta:
+            await db.exec(
+                update(MediaBlob)
+                .where(MediaBlob.sha256 == sha256)
+                .values(ref_count=MediaBlob.ref_count + delta, updated_at=now)
+            )
+
+async def _store_blob(sha256: str, size: int, staged_key: str, db: AsyncSession, storage: StorageBackend) -> str:
+    """
+    Garante que o conteúdo esteja no storage e registra uma referência ao blob.
+    Se o blob já existia, os bytes recém-enviados são descartados em vez de gravados de novo.
+    A linha do blob é gravada (com commit) antes do arquivo: se a requisição falhar
+    depois, o arquivo nunca fica sem linha, e o coletor de lixo o remove após a carência.
+    A referência (ref_count + 1) entra na transação do chamador, sem commit.
+    Retorna a chave do blob.
+    """
+    now = utc_now()
+    key = blob_key(sha256)
+    # Blob novo entra com ref_count 0; o updated_at renovado protege o arquivo do coletor
+    # (MEDIA_BLOB_GC_GRACE_SECONDS) até a referência ser confirmada
+    statement = dialect_insert(db, MediaBlob).values(
+        sha256=sha256, size=size, storage_key=key, ref_count=0, created_at=now, updated_at=now
+    )
+    statement = statement.on_conflict_do_update(index_elements=[MediaBlob.sha256], set_={"updated_at": now})
+    await db.exec(statement)
+    await db.commit()
+    if await storage.exists(key):
+        await storage.delete(staged_key)
+    else:
+        await storage.move(staged_key, key)
+    await adjust_blob_refs(db, {sha256: 1})
+    return key
+
+def media_event(media: Media, action: str) -> dict:
+    """
+    Dados do evento "media" (GET /events).
+    """
+    return {"id": str(media.id), "action": action, "derivatives_status": media.derivatives_status}
+
+def session_to_response(upload: UploadSession) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        id=upload.id,
+        filename=upload.filename,
+        content_type=upload.content_type,
+        total_size=upload.total_size,
+        offset=upload.received_bytes,
+        status=upload.status,
+        chunk_size=settings.MEDIA_CHUNK_SIZE,
+        media_id=upload.media_id,
+    )
+
+async def _stream_to_storage(
+    stream: AsyncIterator[bytes],
+    storage: StorageBackend,
+    key: str,
+    hasher: "hashlib._Hash",
+    max_bytes: int,
+    resumable: bool = False,
+) -> int:
+    """
+    Grava o stream no storage em blocos de MEDIA_CHUNK_SIZE, atualizando o hash
+    à medida que os bytes passam. Nunca mantém mais de um bloco em memória.
+    Com `resumable`, uma desconexão do cliente mantém o que já chegou
+    (o upload pode ser retomado desse ponto).
+    Retorna a quantidade de bytes gravados.
+    """
+    chunk_size = settings.MEDIA_CHUNK_SIZE
+    buffer = bytearray()
+    written = 0
+    async with storage.open_append(key) as writer:
+        try:
+            async for piece in stream:
+                if not piece:
+                    continue
+                if written + len(buffer) + len(piece) > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail={"code": "PAYLOAD_TOO_LARGE", "message": "Arquivo maior que o tamanho permitido."}
+                    )
+                hasher.update(piece)
+                buffer.extend(piece)
+                while len(buffer) >= chunk_size:
+                    await writer.write(bytes(buffer[:chunk_size]))
+                    del buffer[:chunk_size]
+                    written += chunk_size
+        except ClientDisconnect:
+            if not resumable:
+                raise
+        if buffer:
+            await writer.write(bytes(buffer))
+            written += len(buffer)
+    return written
+
+async def _get_hasher(upload: UploadSession, storage: StorageBackend) -> "hashlib._Hash":
+    """
+    Retorna o hash incremental do upload posicionado em received_bytes.
+    """
+    cached = _upload_hashers.get(upload.id)
+    if cached and cached[0] == upload.received_bytes:
+        return cached[1]
+    hasher = hashlib.sha256()
+    if upload.received_bytes:
+        async for chunk in storage.read(upload.storage_key, settings.MEDIA_CHUNK_SIZE, end=upload.received_bytes):
+            hasher.update(chunk)
+    return hasher
+
+# Estados em que a sessão ainda pode ser finalizada (ou retomada na finalização) e cancelada
+_OPEN_UPLOAD_STATUSES = (UploadStatus.ACTIVE.value, UploadStatus.FINALIZING.value)
+
+async def _get_active_upload(
+    user_id: UUID, upload_id: UUID, db: AsyncSession, statuses: tuple[str, ...] = (UploadStatus.ACTIVE.value,)
+) -> UploadSession:
+    upload = await get_upload_session(user_id, upload_id, db)
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "NOT_FOUND", "message": "Sessão de upload não encontrada."}
+        )
+    if upload.status not in statuses:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"code": "CONFLICT", "message": f"Sessão de upload está '{upload.status}'."}
+        )
+    return upload
+
+async def create_upload_session(user_id: UUID, data: UploadSessionCreate, db: AsyncSession) -> UploadSession:
+    """
+    Abre uma sessão de upload retomável.
+    """
+    if data.total_size is not None and data.total_size > settings.MEDIA_MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail={"code": "PAYLOAD_TOO_LARGE", "message": "Arquivo maior que o tamanho permitido."}
+        )
+    upload = UploadSession(
+        user_id=user_id,
+        filename=data.filename,
+        content_type=data.content_type,
+        total_size=data.total_size,
+    )
+    db.add(upload)
+    await db.commit()
+    await db.refresh(upload)
+    return upload
+
+async def get_upload_session(user_id: UUID, upload_id: UUID, db: AsyncSession) -> Optional[UploadSession]:
+    """
+    Busca uma sessão de upload do usuário.
+    """
+    statement = select(UploadSession).where(UploadSession.id == upload_id, UploadSession.user_id == user_id)
+    return (await db.exec(statement)).first()
+
+def _upload_lease_free(now):
+    """
+    Sessão sem envio em andamento (ou com a reserva vencida: processo que morreu no meio).
+    """
+    return or_(UploadSession.lease_owner.is_(None), UploadSession.lease_expires_at < now)
+
+async def _raise_upload_conflict(
+    user_id: UUID,
+    upload_id: UUID,
+    offset: int,
+    db: AsyncSession,
+    statuses: tuple[str, ...] = (UploadStatus.ACTIVE.value,),
+) -> NoReturn:
+    """
+    Explica por que a sessão não pôde ser reservada: inexistente (404), encerrada,
+    offset diferente do confirmado ou outro envio em andamento (409).
+    """
+    await db.rollback()
+    upload = await _get_active_upload(user_id, upload_id, db, statuses)
+    if offset != upload.received_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "code": "OFFSET_MISMATCH",
+                "message": f"Offset esperado: {upload.received_bytes}.",
+            }
+        )
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={"code": "CONFLICT", "message": "Já existe um envio em andamento para este upload."}
+    )
+
+async def _claim_upload(
+    user_id: UUID,
+    upload_id: UUID,
+    offset: int,
+    db: AsyncSession,
+    statuses: tuple[str, ...] = (UploadStatus.ACTIVE.value,),
+) -> str:
+    """
+    Reserva a sessão (lease) para um único envio/finalização entre todos os processos,
+    com um UPDATE condicional ao offset confirmado. Faz commit, liberando a conexão
+    do pool enquanto o corpo é recebido. Retorna o dono da reserva.
+    """
+    owner = uuid4().hex
+    now = utc_now()
+    result = await db.exec(
+        update(UploadSession)
+        .where(
+            UploadSession.id == upload_id,
+            UploadSession.user_id == user_id,
+            UploadSession.status.in_(statuses),
+            UploadSession.received_bytes == offset,
+            _upload_lease_free(now),
+        )
+        .values(lease_owner=owner, lease_expires_at=now + timedelta(seconds=settings.MEDIA_UPLOAD_LEASE_SECONDS))
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        await _raise_upload_conflict(user_id, upload_id, offset, db, statuses)
+    await db.commit()
+    return owner
+
+async def _release_upload(upload_id: UUID, owner: str, db: AsyncSession) -> None:
+    """
+    Devolve a reserva depois de um envio que falhou (o upload pode ser retomado em seguida).
+    """
+    await db.rollback()
+    with contextlib.suppress(Exception):
+        await db.exec(
+            update(UploadSession)
+            .where(UploadSession.id == upload_id, UploadSession.lease_owner == owner)
+            .values(lease_owner=None, lease_expires_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+def _lost_upload_lease() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={"code": "CONFLICT", "message": "A sessão de upload foi alterada durante o envio; consulte o offset atual."}
+    )
+
+async def append_upload_chunk(
+    user_id: UUID,
+    upload_id: UUID,
+    offset: int,
+    stream: AsyncIterator[bytes],
+    db: AsyncSession,
+    storage: StorageBackend,
+) -> UploadSession:
+    """
+    Anexa os bytes do stream ao upload a partir de `offset`, que precisa ser
+    igual ao offset confirmado da sessão (senão 409 com o offset atual).
+    Enquanto os bytes chegam, a sessão fica reservada: um PUT concorrente, em
+    qualquer processo, recebe 409 em vez de gravar no mesmo arquivo.
+    """
+    upload = await _get_active_upload(user_id, upload_id, db)
+    owner = await _claim_upload(user_id, upload_id, offset, db)
+
+    try:
+        # Bytes gravados por uma tentativa anterior que não chegou a ser confirmada são descartados
+        if await storage.size(upload.storage_key) > offset:
+            await storage.truncate(upload.storage_key, offset)
+
+        hasher = await _get_hasher(upload, storage)
+        limit = upload.total_size if upload.total_size is not None else settings.MEDIA_MAX_UPLOAD_BYTES
+        written = await _stream_to_storage(
+            stream, storage, upload.storage_key, hasher, limit - offset, resumable=True
+        )
+
+        # Confirma o novo offset só se a reserva ainda for deste envio
+        upload = (await db.exec(
+            update(UploadSession)
+            .where(
+                UploadSession.id == upload_id,
+                UploadSession.lease_owner == owner,
+                UploadSession.received_bytes == offset,
+                UploadSession.status == UploadStatus.ACTIVE.value,
+            )
+            .values(received_bytes=offset + written, updated_at=utc_now(), lease_owner=None, lease_expires_at=None)
+            .returning(UploadSession)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )).scalar_one_or_none()
+        if upload is None:
+            raise _lost_upload_lease()
+        await db.commit()
+    except BaseException:
+        # O estado do hash pode ter avançado além do que foi confirmado
+        _upload_hashers.pop(upload_id, None)
+        await _release_upload(upload_id, owner, db)
+        raise
+
+    _upload_hashers[upload_id] = (offset + written, hasher)
+    return upload
+
+async def finalize_upload(
+    user_id: UUID,
+    upload_id: UUID,
+    db: AsyncSession,
+    storage: StorageBackend,
+    expected_sha256: Optional[str] = None,
+) -> Media:
+    """
+    Confirma o upload: valida tamanho/hash e cria o registro de mídia.
+    Antes de os bytes saírem do arquivo temporário, a sessão passa para 'finalizing' com o
+    hash gravado: se a finalização falhar depois disso, a sessão não aceita mais envios
+    (o arquivo temporário pode não existir) e uma nova chamada retoma a partir do blob.
+    """
+    upload = await _get_active_upload(user_id, upload_id, db, _OPEN_UPLOAD_STATUSES)
+    if upload.total_size is not None and upload.received_bytes != upload.total_size:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "code": "INCOMPLETE_UPLOAD",
+                "message": f"Recebidos {upload.received_bytes} de {upload.total_size} bytes.",
+            }
+        )
+    owner = await _claim_upload(user_id, upload_id, upload.received_bytes, db, _OPEN_UPLOAD_STATUSES)
+
+    try:
+        sha256 = upload.sha256 or (await _get_hasher(upload, storage)).hexdigest()
+        if expected_sha256 and expected_sha256.lower() != sha256:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={"code": "CHECKSUM_MISMATCH", "message": "SHA-256 não confere com o conteúdo recebido."}
+            )
+        if upload.status == UploadStatus.ACTIVE.value:
+            result = await db.exec(
+                update(UploadSession)
+                .where(UploadSession.id == upload_id, UploadSession.lease_owner == owner)
+                .values(status=UploadStatus.FINALIZING.value, sha256=sha256, updated_at=utc_now())
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
+                raise _lost_upload_lease()
+            await db.commit()
+            _upload_hashers.pop(upload_id, None)
+
+        media_id = uuid4()
+        try:
+            key = await _store_blob(sha256, upload.received_bytes, upload.storage_key, db, storage)
+        except FileNotFoundError:
+            # Nem o arquivo temporário nem o blob existem mais (blob sem referência coletado
+            # depois de uma finalização que falhou): o upload precisa ser enviado de novo
+            await db.rollback()
+            await db.exec(
+                update(UploadSession)
+                .where(UploadSession.id == upload_id, UploadSession.lease_owner == owner)
+                .values(status=UploadStatus.ABORTED.value, updated_at=utc_now(), lease_owner=None, lease_expires_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"code": "UPLOAD_LOST", "message": "Os bytes do upload não estão mais disponíveis; envie o arquivo novamente."}
+            )
+        media = Media(
+            id=media_id,
+            user_id=user_id,
+            filename=upload.filename,
+            content_type=upload.content_type,
+            size=upload.received_bytes,
+            sha256=sha256,
+            storage_key=key,
+        )
+        await enqueue_derivatives(media, db)
+        db.add(media)
+        result = await db.exec(
+            update(UploadSession)
+            .where(UploadSession.id == upload_id, UploadSession.lease_owner == owner)
+            .values(
+                status=UploadStatus.COMPLETED.value,
+                media_id=media_id,
+                updated_at=utc_now(),
+                lease_owner=None,
+                lease_expires_at=None,
+            )
+        )
+        if result.rowcount == 0:
+            raise _lost_upload_lease()
+        await db.commit()
+    except BaseException:
+        await _release_upload(upload_id, owner, db)
+        raise
+
+    await db.refresh(media)
+    notify_worker()
+    await publish_event(user_id, "media", media_event(media, "created"))
+    _upload_hashers.pop(upload_id, None)
+    return media
+
+async def abort_upload(user_id: UUID, upload_id: UUID, db: AsyncSession, storage: StorageBackend) -> None:
+    """
+    Cancela o upload e descarta os bytes recebidos (409 se houver um envio em andamento).
+    """
+    upload = await _get_active_upload(user_id, upload_id, db, _OPEN_UPLOAD_STATUSES)
+    result = await db.exec(
+        update(UploadSession)
+        .where(
+            UploadSession.id == upload_id,
+            UploadSession.status.in_(_OPEN_UPLOAD_STATUSES),
+            _upload_lease_free(utc_now()),
+        )
+        .values(status=UploadStatus.ABORTED.value, updated_at=utc_now())
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        await _raise_upload_conflict(user_id, upload_id, upload.received_bytes, db, _OPEN_UPLOAD_STATUSES)
+    await db.commit()
+    # Em 'finalizing' o arquivo temporário pode já ter virado blob: sem referência, o coletor o remove
+    await storage.delete(upload.storage_key)
+    _upload_hashers.pop(upload_id, None)
+
+async def expire_stale_uploads(db: AsyncSession, storage: StorageBackend) -> int:
+    """
+    Encerra as sessões de upload paradas há mais de MEDIA_UPLOAD_SESSION_TTL_SECONDS
+    (apaga os bytes recebidos) e esquece o estado em memória das sessões que não estão
+    mais ativas, inclusive as encerradas por outro processo.
+    Retorna a quantidade de sessões encerradas.
+    """
+    now = utc_now()
+    cutoff = now - timedelta(seconds=settings.MEDIA_UPLOAD_SESSION_TTL_SECONDS)
+    stale = (await db.exec(
+        update(UploadSession)
+        .where(
+            UploadSession.status.in_(_OPEN_UPLOAD_STATUSES),
+            UploadSession.updated_at < cutoff,
+            _upload_lease_free(now),
+        )
+        .values(status=UploadStatus.ABORTED.value, updated_at=now)
+        .returning(UploadSession.id)
+        .execution_options(synchronize_session=False)
+    )).all()
+    await db.commit()
+    for (upload_id,) in stale:
+        await storage.delete(f"uploads/{upload_id}.part")
+
+    if _upload_hashers:
+        cached = list(_upload_hashers)
+        active = set((await db.exec(
+            select(UploadSession.id).where(
+                UploadSession.id.in_(cached), UploadSession.status == UploadStatus.ACTIVE.value
+            )
+        )).all())
+        await db.commit()
+        for upload_id in cached:
+            if upload_id not in active:
+                _upload_hashers.pop(upload_id, None)
+    return len(stale)
+
+async def upload_media_stream(
+    user_id: UUID,
+    filename: str,
+    content_type: str,
+    stream: AsyncIterator[bytes],
+    db: AsyncSession,
+    storage: StorageBackend,
+) -> Media:
+    """
+    Upload em uma única requisição: o corpo vai direto para o storage em blocos,
+    sem passar por UploadFile/arquivo temporário em memória.
+    """
+    media_id = uuid4()
+    staging_key = f"uploads/{media_id}.part"
+    hasher = hashlib.sha256()
+    try:
+        size = await _stream_to_storage(stream, storage, staging_key, hasher, settings.MEDIA_MAX_UPLOAD_BYTES)
+        sha256 = hasher.hexdigest()
+        key = await _store_blob(sha256, size, staging_key, db, storage)
+    except BaseException:
+        await storage.delete(staging_key)
+        raise
+
+    media = Media(
+        id=media_id,
+        user_id=user_id,
+        filename=filename,
+        content_type=content_type,
+        size=size,
+        sha256=sha256,
+        storage_key=key,
+    )
+    await enqueue_derivatives(media, db)
+    db.add(media)
+    await db.commit()
+    await db.refresh(media)
+    notify_worker()
+    await publish_event(user_id, "media", media_event(media, "created"))
+    return media
+
+async def get_media(user_id: UUID, media_id: UUID, db: AsyncSession) -> Optional[Media]:
+    """
+    Busca uma mídia do usuário pelo ID.
+    """
+    statement = select(Media).where(Media.id == media_id, Media.user_id == user_id)
+    return (await db.exec(statement)).first()
+
+async def list_media(
+    user_id: UUID, db: AsyncSession, *, limit: int = 50, cursor: Optional[str] = None
+) -> tuple[list[Media], Optional[str]]:
+    """
+    Lista a biblioteca de mídia do usuário (mais recentes primeiro) com paginação por cursor.
+    """
+    statement = select(Media).where(Media.user_id == user_id)
+    if cursor:
+        before_created_at, before_id = decode_cursor(cursor)
+        statement = statement.where(tuple_(Media.created_at, Media.id) < tuple_(before_created_at, before_id))
+    statement = statement.order_by(Media.created_at.desc(), Media.id.desc()).limit(limit + 1)
+    rows = (await db.exec(statement)).all()
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    return items, next_cursor
+
+async def create_media_from_hash(
+    user_id: UUID, sha256: str, filename: str, content_type: str, db: AsyncSession
+) -> Optional[Media]:
+    """
+    Cria uma mídia reaproveitando um blob já armazenado, sem reenviar os bytes.
+    Só vale para conteúdo que o usuário já tem na biblioteca: o hash sozinho não prova
+    a posse dos bytes, e aceitar o blob de outro usuário exporia o conteúdo dele.
+    Retorna None se o usuário não tiver uma mídia com esse hash (o cliente deve fazer o
+    upload), sem revelar se o blob existe para outros usuários.
+    """
+    sha256 = sha256.lower()
+    owned = exists().where(Media.user_id == user_id, Media.sha256 == sha256)
+    result = await db.exec(
+        update(MediaBlob)
+        .where(MediaBlob.sha256 == sha256, owned)
+        .values(ref_count=MediaBlob.ref_count + 1, updated_at=utc_now())
+    )
+    if result.rowcount == 0:
+        await db.rollback()
+        return None
+    blob = (await db.exec(select(MediaBlob).where(MediaBlob.sha256 == sha256))).one()
+    media = Media(
+        user_id=user_id,
+        filename=filename,
+        content_type=content_type,
+        size=blob.size,
+        sha256=sha256,
+        storage_key=blob.storage_key,
+    )
+    await enqueue_derivatives(media, db)
+    db.add(media)
+    await db.commit()
+    await db.refresh(media)
+    notify_worker()
+    await publish_event(user_id, "media", media_event(media, "created"))
+    return media
+
+async def delete_media(user_id: UUID, media_id: UUID, db: AsyncSession) -> bool:
+    """
+    Remove a mídia (e seus anexos em posts), liberando as referências no blob.
+    O arquivo só é apagado pelo coletor de lixo quando nenhuma referência restar.
+    Retorna False se a mídia não existir.
+    """
+    media = await get_media(user_id, media_id, db)
+    if not media:
+        return False
+    detached = await db.exec(delete(PostMedia).where(PostMedia.media_id == media.id))
+    await db.delete(media)
+    event = media_event(media, "deleted")
+    await adjust_blob_refs(db, {media.sha256: -(1 + detached.rowcount)})
+    await db.commit()
+    await publish_event(user_id, "media", event)
+    return True
+
+async def attach_media_to_post(post_id: UUID, media: Media, db: AsyncSession, position: int = 0) -> bool:
+    """
+    Anexa a mídia ao post (idempotente) e incrementa a referência do blob na mesma transação.
+    Retorna False se a mídia já estava anexada.
+    """
+    statement = dialect_insert(db, PostMedia).values(
+        post_id=post_id, media_id=media.id, position=position, created_at=utc_now()
+    ).on_conflict_do_nothing(index_elements=[PostMedia.post_id, PostMedia.media_id])
+    result = await db.exec(statement)
+    attached = result.rowcount > 0
+    if attached:
+        await adjust_blob_refs(db, {media.sha256: 1})
+    await db.commit()
+    return attached
+
+async def detach_media_from_post(post_id: UUID, media: Media, db: AsyncSession) -> bool:
+    """
+    Remove o anexo e decrementa a referência do blob. Retorna False se não estava anexada.
+    """
+    result = await db.exec(
+        delete(PostMedia).where(PostMedia.post_id == post_id, PostMedia.media_id == media.id)
+    )
+    detached = result.rowcount > 0
+    if detached:
+        await adjust_blob_refs(db, {media.sha256: -1})
+    await db.commit()
+    return detached
+
+async def detach_all_media(post_id: UUID, db: AsyncSession) -> None:
+    """
+    Remove todos os anexos de um post (usado ao excluir o post). Não faz commit.
+    """
+    hashes = (await db.exec(
+        select(Media.sha256).join(PostMedia, PostMedia.media_id == Media.id).where(PostMedia.post_id == post_id)
+    )).all()
+    if not hashes:
+        return
+    await db.exec(delete(PostMedia).where(PostMedia.post_id == post_id))
+    await adjust_blob_refs(db, {sha256: -count for sha256, count in Counter(hashes).items()})
+
+async def list_post_media(post_id: UUID, db: AsyncSession) -> list[Media]:
+    """
+    Mídias anexadas ao post, na ordem de 'position'.
+    """
+    statement = (
+        select(Media)
+        .join(PostMedia, PostMedia.media_id == Media.id)
+        .where(PostMedia.post_id == post_id)
+        .order_by(PostMedia.position, PostMedia.created_at)
+    )
+    return list((await db.exec(statement)).all())
+
+async def collect_unreferenced_blobs(db: AsyncSession, storage: StorageBackend) -> int:
+    """
+    Apaga blobs com ref_count zero há mais de MEDIA_BLOB_GC_GRACE_SECONDS.
+    O arquivo é removido antes do commit do DELETE: um upload concorrente do mesmo
+    conteúdo espera o bloqueio da linha e, em seguida, grava o arquivo de novo.
+    Retorna a quantidade de blobs removidos.
+    """
+    cutoff = utc_now() - timedelta(seconds=settings.MEDIA_BLOB_GC_GRACE_SECONDS)
+    unreferenced = (MediaBlob.ref_count <= 0, MediaBlob.updated_at < cutoff)
+    candidates = (await db.exec(
+        select(MediaBlob.sha256, MediaBlob.storage_key).where(*unreferenced).limit(settings.MEDIA_BLOB_GC_BATCH_SIZE)
+    )).all()
+    await db.commit()
+
+    removed = 0
+    for sha256, key in candidates:
+        # Derivados e job referenciam o blob: saem antes (e voltam no rollback)
+        derivative_keys = await forget_derivatives(sha256, db)
+        result = await db.exec(delete(MediaBlob).where(MediaBlob.sha256 == sha256, *unreferenced))
+        if result.rowcount == 0:
+            # Ganhou uma referência desde a varredura
+            await db.rollback()
+            continue
+        try:
+            for derivative_key in derivative_keys:
+                await storage.delete(derivative_key)
+            await storage.delete(key)
+        except Exception as e:
+            logger.warning("Falha ao apagar blob %s: %s", sha256, e)
+            await db.rollback()
+            continue
+        await db.commit()
+        removed += 1
+    return removed
+
+async def run_blob_gc_loop(storage: StorageBackend) -> None:
+    """
+    Loop do coletor de lixo de blobs e de sessões de upload abandonadas
+    (iniciado no lifespan da aplicação).
+    """
+    while True:
+        try:
+            async with async_session_maker() as db:
+                expired = await expire_stale_uploads(db, storage)
+                removed = await collect_unreferenced_blobs(db, storage)
+            if expired:
+                logger.info("Coletor encerrou %d sessão(ões) de upload abandonada(s)", expired)
+            if removed:
+                logger.info("Coletor de blobs removeu %d blob(s) sem referência", removed)
+        except Exception:
+            logger.exception("Erro no coletor de lixo de blobs")
+        await asyncio.sleep(settings.MEDIA_BLOB_GC_INTERVAL_SECONDS)
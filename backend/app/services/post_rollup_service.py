@@ -0,0 +1,206 @@
+# app/services/post_rollup_service.py
+"""
+Rollups do calendário/dashboard: quantidade de posts por (usuário, dia, status, rede).
+
+As escritas em posts (post_service, importação e publicador) aplicam a variação nos
+rollups na mesma transação, então o resumo de um mês ou trimestre é uma única leitura
+de poucas linhas pela chave primária, em vez de baixar todos os posts.
+
+Cada alteração incrementa a versão do usuário e marca as linhas alteradas com ela: o
+cliente guarda a versão recebida e pede depois só os dias alterados (?since=versão).
+
+Para carregar os rollups de posts já existentes (ou corrigi-los), sem escritas em andamento:
+    python -m app.services.post_rollup_service
+"""
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import invalidate_user_cache
+from app.core.config import get_settings
+from app.core.container import aclose_resources
+from app.core.database import async_session_maker, dialect_insert
+from app.models.post import Post, PostDailyCount, PostRollupVersion, PostStatus
+from app.schemas.post import to_utc
+
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+# (dia UTC, status, rede)
+RollupKey = tuple[date, str, str]
+
+def rollup_status(post_status: str) -> str:
+    """
+    'publishing' dura só o tempo da chamada à rede social: conta como 'scheduled',
+    e o publicador não precisa alterar os rollups ao começar a publicar.
+    """
+    return PostStatus.SCHEDULED.value if post_status == PostStatus.PUBLISHING.value else post_status
+
+def rollup_key(scheduled_at: datetime, post_status: str, platform: str) -> RollupKey:
+    return to_utc(scheduled_at).date(), rollup_status(post_status), platform
+
+def post_rollup_key(post: Post) -> RollupKey:
+    return rollup_key(post.scheduled_at, post.status, post.platform)
+
+async def apply_rollup_changes(user_id: UUID, changes: Counter, db: AsyncSession) -> Optional[int]:
+    """
+    Soma as variações (chave -> +n/-n) aos rollups do usuário. Não faz commit: deve rodar
+    na transação que altera os posts. Retorna a nova versão (None se nada mudou).
+    """
+    changes = {key: delta for key, delta in changes.items() if delta}
+    if not changes:
+        return None
+
+    bump = dialect_insert(db, PostRollupVersion).values(user_id=user_id, version=1)
+    bump = bump.on_conflict_do_update(
+        index_elements=[PostRollupVersion.user_id],
+        set_={"version": PostRollupVersion.version + 1},
+    ).returning(PostRollupVersion.version)
+    version = (await db.exec(bump)).scalar_one()
+
+    upsert = dialect_insert(db, PostDailyCount).values([
+        {"user_id": user_id, "day": day, "status": post_status, "platform": platform, "count": delta, "version": version}
+        for (day, post_status, platform), delta in changes.items()
+    ])
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[PostDailyCount.user_id, PostDailyCount.day, PostDailyCount.status, PostDailyCount.platform],
+        set_={"count": PostDailyCount.count + upsert.excluded["count"], "version": upsert.excluded["version"]},
+    )
+    await db.exec(upsert)
+    return version
+
+async def get_calendar_summary(
+    user_id: UUID,
+    start: date,
+    end: date,
+    db: AsyncSession,
+    *,
+    since: Optional[int] = None,
+) -> dict:
+    """
+    Resumo de [start, end) (dias UTC): totais do período e contagens por dia, por status e por rede.
+    Com `since`, 'days' traz só os dias alterados depois dessa versão (inclusive os que ficaram
+    vazios, com total 0). A 'version' da resposta é o `since` da próxima chamada.
+    """
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "BAD_REQUEST", "message": "'end' deve ser posterior a 'start'."}
+        )
+    if end - start > timedelta(days=settings.POSTS_SUMMARY_MAX_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "code": "BAD_REQUEST",
+                "message": f"Intervalo máximo do resumo é de {settings.POSTS_SUMMARY_MAX_DAYS} dias.",
+            }
+        )
+
+    statement = select(
+        PostDailyCount.day, PostDailyCount.status, PostDailyCount.platform, PostDailyCount.count, PostDailyCount.version
+    ).where(
+        PostDailyCount.user_id == user_id,
+        PostDailyCount.day >= start,
+        PostDailyCount.day < end,
+    )
+    rows = (await db.exec(statement)).all()
+
+    # As versões de um usuário são gravadas em ordem (a linha de versão fica travada até o
+    # commit), então a maior versão lida cobre tudo o que já mudou no intervalo
+    version = max([since or 0] + [row.version for row in rows])
+    totals = {"total": 0, "by_status": Counter(), "by_platform": Counter()}
+    days: dict[date, dict] = {}
+    for day, post_status, platform, count, row_version in rows:
+        entry = days.setdefault(
+            day, {"day": day, "total": 0, "by_status": Counter(), "by_platform": Counter(), "version": 0}
+        )
+        entry["version"] = max(entry["version"], row_version)
+        for target in (entry, totals):
+            target["total"] += count
+            target["by_status"][post_status] += count
+            target["by_platform"][platform] += count
+
+    if since is None:
+        selected = [entry for entry in days.values() if entry["total"]]
+    else:
+        selected = [entry for entry in days.values() if entry["version"] > since]
+    selected.sort(key=lambda entry: entry["day"])
+    return {
+        "start": start,
+        "end": end,
+        "version": version,
+        "since": since,
+        "total": totals["total"],
+        "by_status": _positive(totals["by_status"]),
+        "by_platform": _positive(totals["by_platform"]),
+        "days": [
+            {
+                "day": entry["day"],
+                "total": entry["total"],
+                "by_status": _positive(entry["by_status"]),
+                "by_platform": _positive(entry["by_platform"]),
+            }
+            for entry in selected
+        ],
+    }
+
+def _positive(counts: Counter) -> dict[str, int]:
+    return {key: value for key, value in sorted(counts.items()) if value}
+
+async def rebuild_post_rollups(db: AsyncSession) -> int:
+    """
+    Recalcula os rollups a partir da tabela posts e faz commit. Só as linhas que divergem
+    são corrigidas, com uma nova versão (clientes no modo de diferenças recebem esses dias).
+    Retorna quantos posts foram contados.
+    """
+    changes: dict[UUID, Counter] = defaultdict(Counter)
+    statement = select(Post.user_id, Post.scheduled_at, Post.status, Post.platform).execution_options(
+        yield_per=settings.POSTS_EXPORT_BATCH_SIZE
+    )
+    total = 0
+    async for user_id, scheduled_at, post_status, platform in await db.stream(statement):
+        changes[user_id][rollup_key(scheduled_at, post_status, platform)] += 1
+        total += 1
+
+    current = select(
+        PostDailyCount.user_id, PostDailyCount.day, PostDailyCount.status, PostDailyCount.platform, PostDailyCount.count
+    ).where(PostDailyCount.count != 0)
+    for user_id, day, post_status, platform, count in (await db.exec(current)).all():
+        changes[user_id][(day, post_status, platform)] -= count
+
+    changed = [user_id for user_id, user_changes in changes.items() if await apply_rollup_changes(user_id, user_changes, db)]
+    await db.commit()
+    for user_id in changed:
+        await invalidate_user_cache(user_id, "posts")
+    return total
+
+async def backfill_post_rollups() -> None:
+    """
+    Na inicialização (DB_CREATE_TABLES): monta os rollups se a tabela ainda está vazia e já existem posts.
+    """
+    async with async_session_maker() as db:
+        has_rollups = (await db.exec(select(func.count()).select_from(PostRollupVersion))).one()
+        if has_rollups or not (await db.exec(select(Post.id).limit(1))).first():
+            return
+        total = await rebuild_post_rollups(db)
+    logger.info("Rollups do calendário montados a partir de %d posts", total)
+
+
+async def main() -> None:
+    async with async_session_maker() as db:
+        total = await rebuild_post_rollups(db)
+    await aclose_resources()
+    print(f"Rollups do calendário recalculados a partir de {total} posts.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,300 @@
+# app/services/post_search_service.py
+"""
+Busca de posts: texto completo na legenda, hashtags e menções.
+
+As escritas em posts (post_service e importação) atualizam o índice na mesma transação:
+- post_search: legenda normalizada (minúsculas, sem acentos), indexada pelo banco
+  (tsvector + GIN no PostgreSQL, FTS5 no SQLite; ver app/models/post.py);
+- post_tags: hashtags ('#') e menções ('@') de cada post, para filtros exatos por data;
+- post_tag_counts: posts do usuário por tag, para o autocomplete por prefixo.
+Buscas e autocomplete leem só o índice, nunca um LIKE '%termo%' sobre posts.
+
+Para indexar os posts já existentes (ou refazer o índice), sem escritas em andamento:
+    python -m app.services.post_search_service
+"""
+import asyncio
+import logging
+import re
+import unicodedata
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import column, delete, func, insert, literal_column, table, tuple_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import get_settings
+from app.core.container import aclose_resources
+from app.core.database import async_session_maker, dialect_insert
+from app.core.pagination import decode_cursor, decode_offset_cursor, encode_cursor, encode_offset_cursor
+from app.models.post import MAX_TAG_LENGTH, SEARCH_TEXT_CONFIG, Post, PostSearchDocument, PostTag, PostTagCount
+
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+# '#' ou '@' no início de uma palavra (não em 'a#b' nem em e-mails como 'a@b.com')
+TAG_PATTERN = re.compile(r"(?<![\w#@])([#@])(\w+)")
+# Termos da busca: "frase exata", palavra, com '-' para excluir
+QUERY_TERM_PATTERN = re.compile(r'(-?)"([^"]*)"?|(-?)(\S+)')
+
+# (id, legenda, scheduled_at) de um post a indexar
+IndexedPost = tuple[UUID, str, datetime]
+
+def fold(value: str) -> str:
+    """
+    Minúsculas e sem acentos ('Verão' -> 'verao'): busca e tags ignoram caixa e acentuação.
+    """
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+def extract_tags(content: str) -> set[str]:
+    """
+    Hashtags e menções normalizadas da legenda (ex: {'#verao', '@marca'}).
+    """
+    return {(sigil + fold(name))[:MAX_TAG_LENGTH] for sigil, name in TAG_PATTERN.findall(content)}
+
+def normalize_tag(value: str, *, prefix: bool = False) -> str:
+    """
+    Tag informada na API ('verao', '#Verão' ou '@marca'): sem '#'/'@' é hashtag.
+    Com prefix=True aceita só o sinal ('#'), para listar todas as tags do tipo.
+    """
+    value = value.strip()
+    sigil = value[0] if value[:1] in ("#", "@") else "#"
+    name = fold(value.lstrip("#@"))
+    if not re.fullmatch(r"\w*" if prefix else r"\w+", name):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "BAD_REQUEST", "message": f"Tag inválida: {value}"}
+        )
+    return (sigil + name)[:MAX_TAG_LENGTH]
+
+async def update_search_index(
+    user_id: UUID,
+    db: AsyncSession,
+    *,
+    removed: Iterable[UUID] = (),
+    added: Iterable[IndexedPost] = (),
+) -> None:
+    """
+    Tira `removed` do índice e indexa `added` (texto e tags). Não faz commit: deve rodar na
+    transação que altera os posts. Para reindexar um post alterado, passe-o nos dois.
+    """
+    removed = list(removed)
+    added = list(added)
+    tag_changes = Counter()
+    if removed:
+        tag_changes.subtract((await db.exec(select(PostTag.tag).where(PostTag.post_id.in_(removed)))).all())
+        await db.exec(delete(PostTag).where(PostTag.post_id.in_(removed)))
+        await db.exec(delete(PostSearchDocument).where(PostSearchDocument.post_id.in_(removed)))
+    if added:
+        await db.exec(insert(PostSearchDocument).values([
+            {"post_id": post_id, "user_id": user_id, "text": fold(content)} for post_id, content, _ in added
+        ]))
+        tag_rows = [
+            {"post_id": post_id, "tag": tag, "user_id": user_id, "scheduled_at": scheduled_at}
+            for post_id, content, scheduled_at in added
+            for tag in extract_tags(content)
+        ]
+        if tag_rows:
+            await db.exec(insert(PostTag).values(tag_rows))
+            tag_changes.update(row["tag"] for row in tag_rows)
+    await _apply_tag_count_changes(user_id, tag_changes, db)
+
+async def _apply_tag_count_changes(user_id: UUID, changes: Counter, db: AsyncSession) -> None:
+    # Ordenado: importações concorrentes do mesmo usuário travam as linhas na mesma ordem
+    changes = sorted((tag, delta) for tag, delta in changes.items() if delta)
+    if not changes:
+        return
+    upsert = dialect_insert(db, PostTagCount).values([
+        {"user_id": user_id, "tag": tag, "count": delta} for tag, delta in changes
+    ])
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[PostTagCount.user_id, PostTagCount.tag],
+        set_={"count": PostTagCount.count + upsert.excluded["count"]},
+    )
+    await db.exec(upsert)
+
+def _fts5_query(query: str) -> Optional[str]:
+    """
+    Converte a sintaxe de busca web (a mesma de websearch_to_tsquery no PostgreSQL) para FTS5:
+    termos entre aspas, E implícito, 'or' e '-' para excluir. None se não há termo positivo.
+    """
+    groups: list[list[str]] = [[]]
+    for match in QUERY_TERM_PATTERN.finditer(query):
+        negated = match.group(1) or match.group(3)
+        words = re.findall(r"\w+", match.group(2) if match.group(2) is not None else match.group(4))
+        if match.group(4) == "or" and not negated:
+            groups.append([])
+            continue
+        if not words:
+            continue
+        # Só palavras (\w) entre aspas: nenhuma sintaxe do FTS5 vem do usuário
+        phrase = '"' + " ".join(words) + '"'
+        groups[-1].append(f"NOT {phrase}" if negated else phrase)
+
+    parts = []
+    for terms in groups:
+        positive = [term for term in terms if not term.startswith("NOT ")]
+        if positive:
+            negative = [term for term in terms if term.startswith("NOT ")]
+            parts.append(" ".join(positive + negative))
+    return " OR ".join(parts) or None
+
+def _tagged(user_id: UUID, tag: str):
+    return select(PostTag.post_id).where(PostTag.user_id == user_id, PostTag.tag == tag)
+
+async def search_posts(
+    user_id: UUID,
+    db: AsyncSession,
+    *,
+    query: Optional[str] = None,
+    tags: Iterable[str] = (),
+    status_filter: Optional[str] = None,
+    platform: Optional[str] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> tuple[list[dict], Optional[str]]:
+    """
+    Busca posts do usuário pela legenda (`query`) e/ou por tags (o post precisa ter todas).
+    - Com `query` (palavras, "frase exata", -excluir, or): mais relevantes primeiro, depois
+      os mais recentes. Paginação por posição, até POSTS_SEARCH_MAX_RESULTS resultados.
+    - Só com tags: mais recentes primeiro, paginação keyset no índice de post_tags.
+    Retorna (itens, next_cursor).
+    """
+    tags = list(dict.fromkeys(normalize_tag(tag) for tag in tags))
+    folded = fold(query or "")
+    if not re.search(r"\w", folded) and not tags:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "BAD_REQUEST", "message": "Informe um texto ou uma tag para buscar."}
+        )
+
+    if not re.search(r"\w", folded):
+        # Só tags: a primeira conduz a leitura pelo índice (user_id, tag, scheduled_at, post_id)
+        statement = select(Post).join(PostTag, PostTag.post_id == Post.id).where(
+            PostTag.user_id == user_id, PostTag.tag == tags[0]
+        )
+        for tag in tags[1:]:
+            statement = statement.where(Post.id.in_(_tagged(user_id, tag)))
+        statement = _filter(statement, status_filter, platform)
+        if cursor:
+            before_scheduled_at, before_id = decode_cursor(cursor)
+            statement = statement.where(
+                tuple_(PostTag.scheduled_at, PostTag.post_id) < tuple_(before_scheduled_at, before_id)
+            )
+        statement = statement.order_by(PostTag.scheduled_at.desc(), PostTag.post_id.desc()).limit(limit + 1)
+        rows = (await db.exec(statement)).all()
+        items = rows[:limit]
+        next_cursor = encode_cursor(items[-1].scheduled_at, items[-1].id) if len(rows) > limit else None
+        return [post.model_dump() for post in items], next_cursor
+
+    statement = select(Post).join(PostSearchDocument, PostSearchDocument.post_id == Post.id).where(
+        PostSearchDocument.user_id == user_id
+    )
+    if db.bind.dialect.name == "postgresql":
+        tsquery = func.websearch_to_tsquery(literal_column(f"'{SEARCH_TEXT_CONFIG}'::regconfig"), folded)
+        document = literal_column("post_search.document")
+        statement = statement.where(document.op("@@")(tsquery))
+        rank = func.ts_rank_cd(document, tsquery)
+    else:
+        match = _fts5_query(folded)
+        if match is None:
+            return [], None
+        fts = table("post_search_fts", column("rowid"))
+        statement = statement.join(fts, fts.c.rowid == PostSearchDocument.id).where(
+            literal_column("post_search_fts").op("MATCH")(match)
+        )
+        # bm25: menor é mais relevante
+        rank = -literal_column("bm25(post_search_fts)")
+    for tag in tags:
+        statement = statement.where(Post.id.in_(_tagged(user_id, tag)))
+    statement = _filter(statement, status_filter, platform)
+
+    offset = decode_offset_cursor(cursor) if cursor else 0
+    limit = min(limit, settings.POSTS_SEARCH_MAX_RESULTS - offset)
+    if limit <= 0:
+        return [], None
+    statement = statement.order_by(rank.desc(), Post.scheduled_at.desc(), Post.id.desc())
+    rows = (await db.exec(statement.offset(offset).limit(limit + 1))).all()
+    next_cursor = encode_offset_cursor(offset + limit) if len(rows) > limit else None
+    return [post.model_dump() for post in rows[:limit]], next_cursor
+
+def _filter(statement, status_filter: Optional[str], platform: Optional[str]):
+    if status_filter:
+        statement = statement.where(Post.status == status_filter)
+    if platform:
+        statement = statement.where(Post.platform == platform)
+    return statement
+
+async def suggest_tags(user_id: UUID, prefix: str, db: AsyncSession, *, limit: int = 10) -> list[dict]:
+    """
+    Autocomplete: tags do usuário que começam com `prefix` (hashtags se não começar com '@'),
+    das mais usadas para as menos usadas. Um range scan na chave primária (user_id, tag).
+    """
+    start = normalize_tag(prefix, prefix=True)
+    statement = (
+        select(PostTagCount.tag, PostTagCount.count)
+        .where(
+            PostTagCount.user_id == user_id,
+            PostTagCount.tag >= start,
+            PostTagCount.tag < start + "\U0010ffff",
+            PostTagCount.count > 0,
+        )
+        .order_by(PostTagCount.count.desc(), PostTagCount.tag)
+        .limit(limit)
+    )
+    return [{"tag": tag, "count": count} for tag, count in (await db.exec(statement)).all()]
+
+async def rebuild_search_index(db: AsyncSession) -> int:
+    """
+    Refaz o índice de busca a partir da tabela posts, com um commit a cada
+    POSTS_EXPORT_BATCH_SIZE posts. Retorna quantos posts foram indexados.
+    """
+    await db.exec(delete(PostTag))
+    await db.exec(delete(PostTagCount))
+    await db.exec(delete(PostSearchDocument))
+    total = 0
+    last_id = None
+    while True:
+        statement = select(Post.id, Post.user_id, Post.content, Post.scheduled_at).order_by(Post.id)
+        if last_id is not None:
+            statement = statement.where(Post.id > last_id)
+        rows = (await db.exec(statement.limit(settings.POSTS_EXPORT_BATCH_SIZE))).all()
+        if not rows:
+            break
+        by_user: dict[UUID, list[IndexedPost]] = {}
+        for post_id, user_id, content, scheduled_at in rows:
+            by_user.setdefault(user_id, []).append((post_id, content, scheduled_at))
+        for user_id, posts in by_user.items():
+            await update_search_index(user_id, db, added=posts)
+        await db.commit()
+        total += len(rows)
+        last_id = rows[-1][0]
+    await db.commit()
+    return total
+
+async def backfill_search_index() -> None:
+    """
+    Na inicialização (DB_CREATE_TABLES): indexa os posts se o índice ainda está vazio e já existem posts.
+    """
+    async with async_session_maker() as db:
+        has_index = (await db.exec(select(PostSearchDocument.id).limit(1))).first()
+        if has_index or not (await db.exec(select(Post.id).limit(1))).first():
+            return
+        total = await rebuild_search_index(db)
+    logger.info("Índice de busca montado a partir de %d posts", total)
+
+
+async def main() -> None:
+    async with async_session_maker() as db:
+        total = await rebuild_search_index(db)
+    await aclose_resources()
+    print(f"Índice de busca refeito a partir de {total} posts.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
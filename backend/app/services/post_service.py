@@ -0,0 +1,265 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import invalidate_user_cache
+from app.core.config import get_settings
+from app.core.events import publish_event
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models.post import Post, PostStatus, utc_now
+from app.schemas.post import PostCreate, PostInputStatus, PostResponse, PostUpdate, to_utc
+from app.services.media_service import detach_all_media
+from app.services.post_rollup_service import apply_rollup_changes, post_rollup_key
+from app.services.post_search_service import update_search_index
+
+settings = get_settings()
+
+# Campos que podem ser pedidos na seleção esparsa (?fields=...)
+SELECTABLE_FIELDS = tuple(PostResponse.model_fields)
+
+def parse_fields(fields: Optional[str]) -> Optional[list[str]]:
+    """
+    Converte "id,status,scheduled_at" na lista de campos pedidos.
+    None significa "todos os campos". O 'id' é sempre incluído.
+    """
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in SELECTABLE_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "BAD_REQUEST", "message": f"Campos inválidos: {', '.join(unknown)}"}
+        )
+    return ["id"] + [f for f in dict.fromkeys(requested) if f != "id"]
+
+def post_event(post: Post, action: str, **changes) -> dict:
+    """
+    Dados do evento "post" (GET /events): ação e estado atual do post.
+    """
+    data = {
+        "id": str(post.id),
+        "action": action,
+        "status": post.status,
+        "scheduled_at": to_utc(post.scheduled_at).isoformat(),
+    }
+    data.update(changes)
+    return data
+
+async def _lock_post_for_write(user_id: UUID, post_id: UUID, db: AsyncSession) -> Optional[Post]:
+    """
+    Bloqueia o post do usuário na transação atual e o relê, para alterá-lo ou excluí-lo.
+    O bloqueio é um UPDATE condicional (status <> 'publishing') que também desfaz a
+    reserva do publicador: o start_publish concorrente espera o commit e, sem a reserva,
+    não publica o conteúdo antigo. Como a linha fica bloqueada até o commit, o post lido
+    aqui é o estado atual (inclusive para a chave do rollup).
+    Retorna None se o post não existir; 409 se ele estiver sendo publicado.
+    """
+    result = await db.exec(
+        update(Post)
+        .where(Post.id == post_id, Post.user_id == user_id, Post.status != PostStatus.PUBLISHING.value)
+        .values(lease_owner=None, lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        await db.rollback()
+        if await get_post(user_id, post_id, db) is None:
+            return None
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"code": "POST_PUBLISHING", "message": "O post está sendo publicado; tente novamente em instantes."}
+        )
+    statement = select(Post).where(Post.id == post_id).execution_options(populate_existing=True)
+    return (await db.exec(statement)).one()
+
+def _select_columns(fields: Optional[list[str]]):
+    """
+    Monta o SELECT só com as colunas pedidas. 'scheduled_at' é lido sempre,
+    pois é necessário para montar o cursor.
+    """
+    if fields is None:
+        return select(Post)
+    columns = dict.fromkeys(fields + ["scheduled_at"])
+    return select(*[getattr(Post, name) for name in columns])
+
+def _to_item(row, fields: Optional[list[str]]) -> tuple[dict, datetime, UUID]:
+    """
+    Converte uma linha do resultado em (item, scheduled_at, id).
+    """
+    if fields is None:
+        return row.model_dump(), row.scheduled_at, row.id
+    mapping = row._mapping
+    return {name: mapping[name] for name in fields}, mapping["scheduled_at"], mapping["id"]
+
+async def create_post(user_id: UUID, post_data: PostCreate, db: AsyncSession) -> Post:
+    """
+    Cria um novo post para o usuário.
+    """
+    new_post = Post(
+        user_id=user_id,
+        content=post_data.content,
+        platform=post_data.platform,
+        account_id=post_data.account_id,
+        status=post_data.status.value,
+        scheduled_at=post_data.scheduled_at,
+    )
+    db.add(new_post)
+    await apply_rollup_changes(user_id, Counter({post_rollup_key(new_post): 1}), db)
+    await update_search_index(user_id, db, added=[(new_post.id, new_post.content, new_post.scheduled_at)])
+    await db.commit()
+    await db.refresh(new_post)
+    await invalidate_user_cache(user_id, "posts")
+    await publish_event(user_id, "post", post_event(new_post, "created"))
+    return new_post
+
+async def get_post(user_id: UUID, post_id: UUID, db: AsyncSession) -> Optional[Post]:
+    """
+    Busca um post do usuário pelo ID.
+    """
+    statement = select(Post).where(Post.id == post_id, Post.user_id == user_id)
+    return (await db.exec(statement)).first()
+
+async def update_post(user_id: UUID, post_id: UUID, post_data: PostUpdate, db: AsyncSession) -> Optional[Post]:
+    """
+    Atualiza parcialmente um post do usuário. Retorna None se o post não existir.
+    """
+    post = await _lock_post_for_write(user_id, post_id, db)
+    if not post:
+        return None
+    previous_key = post_rollup_key(post)
+    # Só os campos enviados; um null explícito (só aceito em account_id) limpa o campo
+    changes = post_data.model_dump(exclude_unset=True)
+    for field, value in changes.items():
+        setattr(post, field, value.value if field == "status" else value)
+    if changes.get("status") == PostInputStatus.SCHEDULED:
+        # Reagendar um post que falhou recomeça as tentativas
+        post.attempts = 0
+    post.updated_at = utc_now()
+    db.add(post)
+    # Mudança de dia, status ou rede move o post de uma linha do rollup para outra
+    rollup_changes = Counter({post_rollup_key(post): 1})
+    rollup_changes[previous_key] -= 1
+    await apply_rollup_changes(user_id, rollup_changes, db)
+    # As tags guardam a data do post: reindexa quando a legenda ou o horário mudam
+    if {"content", "scheduled_at"} & changes.keys():
+        await update_search_index(
+            user_id, db, removed=[post.id], added=[(post.id, post.content, post.scheduled_at)]
+        )
+    await db.commit()
+    await db.refresh(post)
+    await invalidate_user_cache(user_id, "posts")
+    await publish_event(user_id, "post", post_event(post, "updated"))
+    return post
+
+async def delete_post(user_id: UUID, post_id: UUID, db: AsyncSession) -> bool:
+    """
+    Remove um post do usuário (e os anexos de mídia). Retorna False se o post não existir.
+    """
+    post = await _lock_post_for_write(user_id, post_id, db)
+    if not post:
+        return False
+    await detach_all_media(post.id, db)
+    await apply_rollup_changes(user_id, Counter({post_rollup_key(post): -1}), db)
+    await update_search_index(user_id, db, removed=[post.id])
+    event = post_event(post, "deleted")
+    await db.delete(post)
+    await db.commit()
+    await invalidate_user_cache(user_id, "posts")
+    await publish_event(user_id, "post", event)
+    return True
+
+async def list_posts(
+    user_id: UUID,
+    db: AsyncSession,
+    *,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    status_filter: Optional[str] = None,
+    platform: Optional[str] = None,
+    fields: Optional[list[str]] = None,
+) -> tuple[list[dict], Optional[str]]:
+    """
+    Lista os posts do usuário ordenados por (scheduled_at, id) com paginação por cursor (keyset).
+    Cada página é um range scan no índice (user_id, scheduled_at, id), com custo
+    independente da profundidade da página (ao contrário de OFFSET).
+    Retorna (itens, next_cursor).
+    """
+    statement = _select_columns(fields).where(Post.user_id == user_id)
+    if status_filter:
+        statement = statement.where(Post.status == status_filter)
+    if platform:
+        statement = statement.where(Post.platform == platform)
+    if cursor:
+        after_scheduled_at, after_id = decode_cursor(cursor)
+        statement = statement.where(tuple_(Post.scheduled_at, Post.id) > tuple_(after_scheduled_at, after_id))
+    # Busca um item a mais para saber se existe próxima página
+    statement = statement.order_by(Post.scheduled_at, Post.id).limit(limit + 1)
+
+    rows = (await db.exec(statement)).all()
+    items = []
+    last_position = None
+    for row in rows[:limit]:
+        item, scheduled_at, post_id = _to_item(row, fields)
+        items.append(item)
+        last_position = (scheduled_at, post_id)
+
+    next_cursor = encode_cursor(*last_position) if len(rows) > limit and last_position else None
+    return items, next_cursor
+
+async def list_posts_in_range(
+    user_id: UUID,
+    start: datetime,
+    end: datetime,
+    db: AsyncSession,
+    *,
+    status_filter: Optional[str] = None,
+    platform: Optional[str] = None,
+    fields: Optional[list[str]] = None,
+    cursor: Optional[str] = None,
+) -> tuple[list[dict], Optional[str]]:
+    """
+    Retorna os posts do usuário com scheduled_at em [start, end) numa única leitura indexada.
+    Usado pelo calendário (mês/semana). Um intervalo com mais de POSTS_CALENDAR_MAX_ITEMS
+    posts é devolvido em partes: next_cursor continua a partir do último item.
+    Retorna (itens, next_cursor).
+    """
+    start, end = to_utc(start), to_utc(end)
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "BAD_REQUEST", "message": "'end' deve ser posterior a 'start'."}
+        )
+    if end - start > timedelta(days=settings.POSTS_CALENDAR_MAX_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "code": "BAD_REQUEST",
+                "message": f"Intervalo máximo do calendário é de {settings.POSTS_CALENDAR_MAX_DAYS} dias.",
+            }
+        )
+
+    statement = _select_columns(fields).where(
+        Post.user_id == user_id,
+        Post.scheduled_at >= start,
+        Post.scheduled_at < end,
+    )
+    if status_filter:
+        statement = statement.where(Post.status == status_filter)
+    if platform:
+        statement = statement.where(Post.platform == platform)
+    if cursor:
+        after_scheduled_at, after_id = decode_cursor(cursor)
+        statement = statement.where(tuple_(Post.scheduled_at, Post.id) > tuple_(after_scheduled_at, after_id))
+    limit = settings.POSTS_CALENDAR_MAX_ITEMS
+    statement = statement.order_by(Post.scheduled_at, Post.id).limit(limit + 1)
+
+    rows = (await db.exec(statement)).all()
+    items = [_to_item(row, fields) for row in rows[:limit]]
+    next_cursor = encode_cursor(*items[-1][1:]) if len(rows) > limit else None
+    return [item for item, _, _ in items], next_cursor
@@ -0,0 +1,291 @@
+import codecs
+import csv
+import io
+import json
+from collections import Counter
+from datetime import datetime
+from typing import AsyncIterator, Optional, Union
+from uuid import UUID, uuid4
+
+from pydantic import ValidationError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import invalidate_user_cache
+from app.core.config import get_settings
+from app.core.events import publish_event
+from app.core.database import async_session_maker, dialect_insert
+from app.models.post import Post, utc_now
+from app.schemas.post import PostFileFormat, PostImportError, PostImportResult, PostImportRow, to_utc
+from app.services.post_rollup_service import apply_rollup_changes, rollup_key
+from app.services.post_search_service import update_search_index
+
+settings = get_settings()
+
+# Colunas da exportação (e cabeçalho do CSV). Um arquivo exportado pode ser importado de volta:
+# as colunas que não fazem parte de PostImportRow são ignoradas.
+EXPORT_FIELDS = (
+    "id",
+    "content",
+    "platform",
+    "account_id",
+    "status",
+    "scheduled_at",
+    "published_at",
+    "external_id",
+    "last_error",
+    "attempts",
+    "created_at",
+    "updated_at",
+)
+
+MEDIA_TYPES = {
+    PostFileFormat.NDJSON: "application/x-ndjson",
+    PostFileFormat.CSV: "text/csv",
+}
+
+LINE_TOO_LONG = "Linha excede o tamanho máximo."
+
+# Início de célula que uma planilha (Excel, LibreOffice...) interpreta como fórmula. Na
+# exportação CSV esses textos ganham um apóstrofo na frente, que a importação remove.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+# (número da linha, campos) ou (número da linha, mensagem de erro)
+RawRecord = tuple[int, Union[dict, str]]
+
+async def _iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, Optional[str]]]:
+    """
+    Decodifica o corpo em UTF-8 (com ou sem BOM) e produz (número, linha) à medida que os bytes chegam.
+    Linhas maiores que POSTS_IMPORT_MAX_LINE_LENGTH são descartadas e produzidas como None.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer = ""
+    line_no = 0
+    overflow = False
+    async for chunk in stream:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            line_no += 1
+            yield line_no, None if overflow else line.removesuffix("\r")
+            overflow = False
+        if len(buffer) > settings.POSTS_IMPORT_MAX_LINE_LENGTH:
+            overflow = True
+            buffer = ""
+    buffer += decoder.decode(b"", final=True)
+    if buffer or overflow:
+        yield line_no + 1, None if overflow else buffer.removesuffix("\r")
+
+async def _iter_ndjson(stream: AsyncIterator[bytes]) -> AsyncIterator[RawRecord]:
+    async for line_no, line in _iter_lines(stream):
+        if line is None:
+            yield line_no, LINE_TOO_LONG
+            continue
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, f"JSON inválido: {e.msg}."
+            continue
+        yield line_no, data if isinstance(data, dict) else "Cada linha deve ser um objeto JSON."
+
+async def _iter_csv(stream: AsyncIterator[bytes]) -> AsyncIterator[RawRecord]:
+    """
+    CSV com cabeçalho. Campos entre aspas podem ter quebras de linha: as linhas são juntadas
+    até as aspas fecharem. Campos vazios são tratados como ausentes.
+    """
+    header: Optional[list[str]] = None
+    pending = ""
+    record_line = 0
+    async for line_no, line in _iter_lines(stream):
+        if line is None:
+            yield (record_line if pending else line_no), LINE_TOO_LONG
+            pending = ""
+            continue
+        if not pending:
+            if not line.strip():
+                continue
+            record_line = line_no
+            pending = line
+        else:
+            pending = f"{pending}\n{line}"
+        if pending.count('"') % 2:
+            # Aspas ainda abertas: o registro continua na próxima linha
+            if len(pending) > settings.POSTS_IMPORT_MAX_LINE_LENGTH:
+                yield record_line, LINE_TOO_LONG
+                pending = ""
+            continue
+        try:
+            values = next(csv.reader([pending]))
+        except csv.Error as e:
+            yield record_line, f"CSV inválido: {e}."
+            continue
+        finally:
+            pending = ""
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield record_line, f"Esperadas {len(header)} colunas, encontradas {len(values)}."
+            continue
+        yield record_line, {name: _csv_import_value(value) for name, value in zip(header, values) if value != ""}
+    if pending:
+        yield record_line, "Campo entre aspas não foi fechado."
+
+def _csv_import_value(value: str) -> str:
+    """
+    Desfaz o apóstrofo que a exportação põe antes de textos que seriam fórmulas.
+    """
+    if value.startswith("'") and value[1:].startswith(FORMULA_PREFIXES):
+        return value[1:]
+    return value
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'linha'}: {item['msg']}" for item in error.errors()
+    )
+
+async def _insert_rows(user_id: UUID, rows: list[PostImportRow], db: AsyncSession) -> int:
+    """
+    Insere o lote num único INSERT multi-linha e faz commit. Linhas cujo id já existe são ignoradas.
+    Os rollups do calendário e o índice de busca recebem só os posts realmente criados (RETURNING).
+    Retorna quantos posts foram criados.
+    """
+    now = utc_now()
+    statement = dialect_insert(db, Post).values([
+        {
+            "id": row.id or uuid4(),
+            "user_id": user_id,
+            "content": row.content,
+            "platform": row.platform,
+            "account_id": row.account_id,
+            "status": row.status.value,
+            "scheduled_at": row.scheduled_at,
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for row in rows
+    ]).on_conflict_do_nothing(index_elements=[Post.id]).returning(
+        Post.id, Post.content, Post.scheduled_at, Post.status, Post.platform
+    )
+    created = (await db.exec(statement)).all()
+    await apply_rollup_changes(
+        user_id, Counter(rollup_key(scheduled_at, *rest) for _, _, scheduled_at, *rest in created), db
+    )
+    await update_search_index(
+        user_id, db, added=[(post_id, content, scheduled_at) for post_id, content, scheduled_at, *_ in created]
+    )
+    await db.commit()
+    return len(created)
+
+async def import_posts(
+    user_id: UUID,
+    stream: AsyncIterator[bytes],
+    file_format: PostFileFormat,
+    db: AsyncSession,
+) -> PostImportResult:
+    """
+    Importa posts de um arquivo NDJSON/CSV lido em streaming.
+    As linhas são validadas e gravadas em lotes de POSTS_IMPORT_CHUNK_SIZE (um INSERT e um commit
+    por lote), então a memória não depende do tamanho do arquivo. Linhas inválidas não interrompem
+    a importação: são contadas e descritas em 'errors'.
+    """
+    result = PostImportResult()
+    records = _iter_csv(stream) if file_format == PostFileFormat.CSV else _iter_ndjson(stream)
+
+    def fail(line_no: int, message: str) -> None:
+        result.failed += 1
+        if len(result.errors) < settings.POSTS_IMPORT_MAX_ERRORS:
+            result.errors.append(PostImportError(line=line_no, message=message))
+
+    async def flush(batch: list[tuple[int, dict]]) -> None:
+        rows = []
+        for line_no, data in batch:
+            try:
+                rows.append(PostImportRow.model_validate(data))
+            except ValidationError as e:
+                fail(line_no, _format_validation_error(e))
+        if rows:
+            inserted = await _insert_rows(user_id, rows, db)
+            result.inserted += inserted
+            result.skipped += len(rows) - inserted
+
+    batch: list[tuple[int, dict]] = []
+    async for line_no, record in records:
+        if isinstance(record, str):
+            fail(line_no, record)
+            continue
+        batch.append((line_no, record))
+        if len(batch) >= settings.POSTS_IMPORT_CHUNK_SIZE:
+            await flush(batch)
+            batch = []
+    if batch:
+        await flush(batch)
+
+    # Erros de leitura são vistos na hora; os de validação, ao fechar o lote
+    result.errors.sort(key=lambda error: error.line)
+    if result.inserted:
+        await invalidate_user_cache(user_id, "posts")
+        await publish_event(user_id, "posts", {"action": "imported", "inserted": result.inserted})
+    return result
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return to_utc(value).isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+def _csv_export_value(value):
+    """
+    Valor da célula CSV. Textos que começam como fórmula (ex: uma legenda "=HYPERLINK(...)")
+    recebem um apóstrofo, para a planilha mostrá-los como texto em vez de executá-los.
+    """
+    if value is None:
+        return ""
+    value = _export_value(value)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+def _encode_rows(rows, file_format: PostFileFormat) -> bytes:
+    if file_format == PostFileFormat.CSV:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerows([[_csv_export_value(value) for value in row] for row in rows])
+        return buffer.getvalue().encode()
+    return "".join(
+        json.dumps({name: _export_value(value) for name, value in zip(EXPORT_FIELDS, row)}, ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode()
+
+async def export_posts(
+    user_id: UUID,
+    file_format: PostFileFormat,
+    *,
+    status_filter: Optional[str] = None,
+    platform: Optional[str] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Gera o arquivo de exportação dos posts do usuário em blocos, para StreamingResponse.
+    Lê por um cursor no servidor (POSTS_EXPORT_BATCH_SIZE linhas por vez) e seleciona só
+    colunas (sem objetos ORM), então a memória é constante mesmo com centenas de milhares de posts.
+    Usa uma sessão própria: a sessão da requisição é fechada antes do fim do streaming.
+    """
+    statement = select(*[getattr(Post, name) for name in EXPORT_FIELDS]).where(Post.user_id == user_id)
+    if status_filter:
+        statement = statement.where(Post.status == status_filter)
+    if platform:
+        statement = statement.where(Post.platform == platform)
+    statement = statement.order_by(Post.scheduled_at, Post.id).execution_options(
+        yield_per=settings.POSTS_EXPORT_BATCH_SIZE
+    )
+
+    if file_format == PostFileFormat.CSV:
+        yield _encode_rows([EXPORT_FIELDS], file_format)
+    async with async_session_maker() as db:
+        result = await db.stream(statement)
+        async for rows in result.partitions():
+            yield _encode_rows(rows, file_format)
@@ -0,0 +1,191 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Optional, Union
+from uuid import UUID, uuid4
+
+from app.core.config import get_settings
+from app.core.container import resource
+from app.models.post import Post
+
+if TYPE_CHECKING:
+    import httpx
+
+class PublishError(Exception):
+    """
+    Falha ao publicar. retryable=False marca falhas definitivas (ex: conteúdo recusado pela rede).
+    retry_after: segundos pedidos pela rede antes de uma nova chamada (ex: HTTP 429).
+    """
+
+    def __init__(self, message: str, retryable: bool = True, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+class Publisher(ABC):
+    """
+    Adaptador de uma rede social. Recebe o post já reservado pelo publicador e
+    devolve o ID do post criado na rede. O post.id deve ser usado como chave de
+    idempotência: após a queda de um processo, o mesmo post pode ser enviado de novo.
+
+    Os atributos descrevem os limites da rede, aplicados pelo PublishDispatcher
+    a cada (rede, conta):
+    rate_per_second/burst: token bucket de chamadas (None = sem limite).
+    max_batch_size: posts por chamada quando a rede tem endpoint em lote (1 = sem lote).
+    """
+    rate_per_second: Optional[float] = None
+    burst: int = 1
+    max_batch_size: int = 1
+
+    @abstractmethod
+    async def publish(self, post: Post) -> str:
+        """Publica o post e retorna o ID externo. Levanta PublishError em caso de falha."""
+
+    async def publish_batch(self, posts: list[Post]) -> list[Union[str, PublishError]]:
+        """
+        Publica vários posts da mesma conta numa única chamada. Retorna, na mesma ordem,
+        o ID externo ou o PublishError de cada post. Por padrão publica um a um.
+        """
+        results = await asyncio.gather(*(self.publish(post) for post in posts), return_exceptions=True)
+        return [
+            result if isinstance(result, (str, PublishError)) else PublishError(f"{type(result).__name__}: {result}")
+            for result in results
+        ]
+
+    async def aclose(self) -> None:
+        """Libera conexões abertas pelo adaptador."""
+
+class FakePublisher(Publisher):
+    """
+    Publicador em memória para desenvolvimento, testes e benchmarks.
+    latency: tempo simulado de cada chamada.
+    fail_platform_error: se True, toda chamada falha com erro definitivo.
+    """
+
+    def __init__(self, latency: float = 0.0, fail_platform_error: bool = False):
+        self.latency = latency
+        self.fail_platform_error = fail_platform_error
+        # post_id -> quantas vezes foi publicado (mais de 1 indica publicação duplicada)
+        self.published: dict[UUID, int] = {}
+
+    async def publish(self, post: Post) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_platform_error:
+            raise PublishError("Publicação recusada pela rede (fake).", retryable=False)
+        self.published[post.id] = self.published.get(post.id, 0) + 1
+        return f"fake-{uuid4()}"
+
+class HttpPublisher(Publisher):
+    """
+    Adaptador HTTP genérico (webhook/gateway da rede ou servidor local de testes).
+
+    Protocolo:
+    POST {base_url}/posts        {"idempotency_key", "account_id", "content", "scheduled_at"} -> {"id"}
+    POST {base_url}/posts/batch  {"items": [...]} -> {"results": [{"id"} | {"error", "retryable"}]}
+    Respostas 429 (com Retry-After) e 5xx são temporárias; os demais 4xx são definitivos.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: Optional[str] = None,
+        rate_per_second: Optional[float] = None,
+        burst: int = 1,
+        max_batch_size: int = 1,
+        timeout: float = 30.0,
+        transport: Optional["httpx.AsyncBaseTransport"] = None,
+    ):
+        # Importado só aqui: o worker com PUBLISHER_BACKEND=fake não carrega o httpx
+        import httpx
+
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_batch_size = max_batch_size
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._client = httpx.AsyncClient(base_url=base_url, headers=headers, timeout=timeout, transport=transport)
+
+    @staticmethod
+    def _payload(post: Post) -> dict:
+        return {
+            "idempotency_key": str(post.id),
+            "account_id": post.account_id,
+            "content": post.content,
+            "scheduled_at": post.scheduled_at.isoformat(),
+        }
+
+    @staticmethod
+    def _raise_for_status(response: "httpx.Response") -> None:
+        if response.status_code < 400:
+            return
+        retry_after = None
+        if response.status_code == 429:
+            try:
+                retry_after = float(response.headers.get("Retry-After", "1"))
+            except ValueError:
+                retry_after = 1.0
+        raise PublishError(
+            f"Rede respondeu {response.status_code}: {response.text[:200]}",
+            retryable=response.status_code == 429 or response.status_code >= 500,
+            retry_after=retry_after,
+        )
+
+    async def _post(self, url: str, payload: dict) -> "httpx.Response":
+        import httpx
+
+        try:
+            response = await self._client.post(url, json=payload)
+        except httpx.TransportError as e:
+            raise PublishError(f"Erro de conexão com a rede ({type(e).__name__}).")
+        self._raise_for_status(response)
+        return response
+
+    async def publish(self, post: Post) -> str:
+        response = await self._post("/posts", self._payload(post))
+        return str(response.json()["id"])
+
+    async def publish_batch(self, posts: list[Post]) -> list[Union[str, PublishError]]:
+        if len(posts) == 1 or self.max_batch_size <= 1:
+            return await super().publish_batch(posts)
+        response = await self._post("/posts/batch", {"items": [self._payload(post) for post in posts]})
+        return [
+            str(item["id"]) if "id" in item else PublishError(item.get("error", "Erro"), item.get("retryable", True))
+            for item in response.json()["results"]
+        ]
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+class PublisherRegistry:
+    """
+    Publicadores por rede social (platform). 'default' atende redes sem adaptador próprio.
+    """
+
+    def __init__(self, publishers: Optional[dict[str, Publisher]] = None, default: Optional[Publisher] = None):
+        self._publishers = dict(publishers or {})
+        self.default = default
+
+    def register(self, platform: str, publisher: Publisher) -> None:
+        self._publishers[platform] = publisher
+
+    def get(self, platform: str) -> Optional[Publisher]:
+        return self._publishers.get(platform, self.default)
+
+    async def aclose(self) -> None:
+        for publisher in {*self._publishers.values(), self.default} - {None}:
+            await publisher.aclose()
+
+@resource(close=lambda registry: registry.aclose())
+def get_publisher_registry() -> PublisherRegistry:
+    """
+    Registro configurado por PUBLISHER_BACKEND.
+    """
+    settings = get_settings()
+    if settings.PUBLISHER_BACKEND == "fake":
+        return PublisherRegistry(default=FakePublisher())
+    if settings.PUBLISHER_BACKEND == "http":
+        return PublisherRegistry({
+            platform: HttpPublisher(**options) for platform, options in settings.PUBLISHER_HTTP_PLATFORMS.items()
+        })
+    if settings.PUBLISHER_BACKEND == "none":
+        return PublisherRegistry()
+    raise ValueError(f"Backend de publicação desconhecido: {settings.PUBLISHER_BACKEND}")
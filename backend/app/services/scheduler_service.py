@@ -0,0 +1,333 @@
+import asyncio
+import contextlib
+import heapq
+import logging
+import os
+import socket
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import or_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import invalidate_user_cache
+from app.core.config import get_settings
+from app.core.database import async_session_maker
+from app.core.events import publish_event
+from app.models.post import Post, PostStatus, utc_now
+from app.schemas.post import to_utc
+from app.services.dispatcher import DispatcherBusy, PublishDispatcher
+from app.services.post_rollup_service import apply_rollup_changes, rollup_key
+from app.services.post_service import post_event
+from app.services.publishers import PublishError, PublisherRegistry
+
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
+
+# Estados em que o post ainda pode ser (re)publicado pelo publicador
+_QUEUED_STATUSES = [PostStatus.SCHEDULED.value, PostStatus.PUBLISHING.value]
+
+def account_key(account_id: Optional[str], user_id: UUID) -> str:
+    """
+    Conta usada nos limites de taxa: a conta informada no post ou a conta padrão do usuário.
+    """
+    return account_id or f"user:{user_id}"
+
+def retry_delay(attempts: int) -> timedelta:
+    """
+    Atraso exponencial da próxima tentativa (30s, 60s, 120s... até o máximo configurado).
+    """
+    seconds = settings.SCHEDULER_RETRY_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.SCHEDULER_RETRY_BACKOFF_MAX_SECONDS))
+
+async def claim_due_posts(
+    db: AsyncSession, token: str, limit: int, lookahead: timedelta
+) -> list[tuple[datetime, UUID, str, str]]:
+    """
+    Reserva, em um único comando, até `limit` posts que vencem antes de agora + lookahead.
+    No PostgreSQL, FOR UPDATE SKIP LOCKED faz processos concorrentes pularem as linhas
+    que outro processo está reservando, sem esperar nem reservar o mesmo post duas vezes.
+    Também recupera posts cujo lease expirou (processo que morreu no meio da publicação):
+    eles voltam para 'scheduled' e são publicados de novo.
+    `token` identifica esta reserva (cada chamada usa um token novo): uma reserva antiga
+    do mesmo post, desfeita por uma edição, não consegue mais publicá-lo.
+    Retorna (scheduled_at, id, platform, conta) dos posts reservados.
+    """
+    now = utc_now()
+    horizon = now + lookahead
+    due = (
+        select(Post.id)
+        .where(
+            Post.status.in_(_QUEUED_STATUSES),
+            Post.scheduled_at <= horizon,
+            or_(Post.lease_expires_at.is_(None), Post.lease_expires_at < now),
+        )
+        .order_by(Post.scheduled_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    statement = (
+        update(Post)
+        .where(Post.id.in_(due))
+        .values(
+            status=PostStatus.SCHEDULED.value,
+            lease_owner=token,
+            lease_expires_at=horizon + timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS),
+        )
+        .returning(Post.scheduled_at, Post.id, Post.platform, Post.account_id, Post.user_id)
+        .execution_options(synchronize_session=False)
+    )
+    rows = (await db.exec(statement)).all()
+    await db.commit()
+    return [
+        (to_utc(scheduled_at), post_id, platform, account_key(account_id, user_id))
+        for scheduled_at, post_id, platform, account_id, user_id in rows
+    ]
+
+async def start_publish(db: AsyncSession, post_id: UUID, token: str) -> Optional[Post]:
+    """
+    Marca o post como 'publishing' se ele ainda estiver 'scheduled' e reservado por esta reserva.
+    Retorna None se o post foi editado, reagendado, excluído, já começou a ser publicado
+    ou foi reservado de novo (por este ou outro processo).
+    """
+    now = utc_now()
+    lease = timedelta(seconds=settings.SCHEDULER_PUBLISH_TIMEOUT_SECONDS + settings.SCHEDULER_LEASE_SECONDS)
+    result = await db.exec(
+        update(Post)
+        .where(Post.id == post_id, Post.lease_owner == token, Post.status == PostStatus.SCHEDULED.value)
+        .values(status=PostStatus.PUBLISHING.value, attempts=Post.attempts + 1, lease_expires_at=now + lease)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        await db.rollback()
+        return None
+    post = (await db.exec(select(Post).where(Post.id == post_id))).one()
+    # O commit devolve a conexão ao pool durante a chamada à rede social
+    await db.commit()
+    await invalidate_user_cache(post.user_id, "posts")
+    await publish_event(post.user_id, "post", post_event(post, "updated"))
+    return post
+
+async def finish_publish(
+    db: AsyncSession,
+    post: Post,
+    token: str,
+    *,
+    external_id: Optional[str] = None,
+    error: Optional[str] = None,
+    retryable: bool = True,
+    retry_after: Optional[float] = None,
+) -> None:
+    """
+    Registra o resultado da publicação e libera a reserva.
+    Falhas temporárias voltam para a fila com atraso exponencial até SCHEDULER_MAX_ATTEMPTS.
+    """
+    now = utc_now()
+    if error is None:
+        values = {
+            "status": PostStatus.PUBLISHED.value,
+            "published_at": now,
+            "external_id": external_id,
+            "last_error": None,
+            "lease_expires_at": None,
+        }
+    elif retryable and post.attempts < settings.SCHEDULER_MAX_ATTEMPTS:
+        values = {
+            "status": PostStatus.SCHEDULED.value,
+            "last_error": error[:500],
+            # Sem dono, o lease marca quando a próxima tentativa pode ser feita
+            "lease_expires_at": now + max(retry_delay(post.attempts), timedelta(seconds=retry_after or 0)),
+        }
+    else:
+        values = {"status": PostStatus.FAILED.value, "last_error": error[:500], "lease_expires_at": None}
+    # A chave do rollup sai da linha atual (RETURNING), não do post lido no start_publish
+    row = (await db.exec(
+        update(Post)
+        .where(Post.id == post.id, Post.lease_owner == token, Post.status == PostStatus.PUBLISHING.value)
+        .values(lease_owner=None, updated_at=now, **values)
+        .returning(Post.scheduled_at, Post.platform)
+        .execution_options(synchronize_session=False)
+    )).first()
+    if row:
+        # 'publishing' conta como 'scheduled' nos rollups: só o resultado final muda a contagem
+        scheduled_at, platform = row
+        rollup_changes = Counter({rollup_key(scheduled_at, values["status"], platform): 1})
+        rollup_changes[rollup_key(scheduled_at, PostStatus.PUBLISHING.value, platform)] -= 1
+        await apply_rollup_changes(post.user_id, rollup_changes, db)
+    await db.commit()
+    await invalidate_user_cache(post.user_id, "posts")
+    if row:
+        await publish_event(post.user_id, "post", post_event(post, "updated", status=values["status"]))
+
+async def defer_publish(db: AsyncSession, post_id: UUID, token: str, delay_seconds: float) -> None:
+    """
+    Devolve o post à fila sem contar tentativa (backpressure do dispatcher): qualquer
+    processo pode reservá-lo de novo depois de `delay_seconds`.
+    """
+    await db.exec(
+        update(Post)
+        .where(Post.id == post_id, Post.lease_owner == token, Post.status == PostStatus.SCHEDULED.value)
+        .values(lease_owner=None, lease_expires_at=utc_now() + timedelta(seconds=delay_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+async def release_leases(db: AsyncSession, owner: str) -> None:
+    """
+    Devolve à fila os posts reservados por este processo que ainda não começaram a ser publicados.
+    Os tokens das reservas do processo começam com "{owner}/".
+    """
+    await db.exec(
+        update(Post)
+        .where(Post.lease_owner.startswith(f"{owner}/", autoescape=True), Post.status == PostStatus.SCHEDULED.value)
+        .values(lease_owner=None, lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+class PublishingEngine:
+    """
+    Publicador de posts agendados.
+
+    A cada SCHEDULER_POLL_SECONDS reserva em lote os posts que vencem dentro do horizonte
+    (SCHEDULER_LOOKAHEAD_SECONDS) e os mantém num heap ordenado pelo horário. Cada post é
+    disparado no seu horário exato, com concorrência limitada por rede social, e enviado
+    pelo PublishDispatcher (limite de taxa e lotes por conta). Vários
+    processos podem rodar o engine ao mesmo tempo: as reservas (lease) garantem que
+    cada post seja publicado por um único processo.
+    """
+
+    def __init__(
+        self,
+        registry: PublisherRegistry,
+        owner: Optional[str] = None,
+        dispatcher: Optional[PublishDispatcher] = None,
+    ):
+        self.registry = registry
+        self.dispatcher = dispatcher or PublishDispatcher(registry)
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        # (scheduled_at, id, platform, conta, token da reserva)
+        self._heap: list[tuple[datetime, UUID, str, str, str]] = []
+        # Post -> token da reserva atual. Um post reservado de novo (depois de uma edição)
+        # troca de token: a entrada antiga do heap é descartada no disparo.
+        self._queued: dict[UUID, str] = {}
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        """Posts reservados em memória (aguardando o horário ou publicando)."""
+        return len(self._queued)
+
+    def _semaphore(self, platform: str) -> asyncio.Semaphore:
+        if platform not in self._semaphores:
+            self._semaphores[platform] = asyncio.Semaphore(settings.SCHEDULER_PLATFORM_CONCURRENCY)
+        return self._semaphores[platform]
+
+    async def fill(self) -> int:
+        """
+        Reserva posts até SCHEDULER_MAX_PENDING, em lotes de SCHEDULER_BATCH_SIZE.
+        Cada lote usa um token de reserva próprio. Um post que já está na fila deste
+        processo não ganha uma segunda entrada: passa a valer só a reserva nova.
+        Retorna quantos posts foram reservados.
+        """
+        claimed = 0
+        lookahead = timedelta(seconds=settings.SCHEDULER_LOOKAHEAD_SECONDS)
+        while (capacity := settings.SCHEDULER_MAX_PENDING - self.pending) > 0:
+            limit = min(settings.SCHEDULER_BATCH_SIZE, capacity)
+            token = f"{self.owner}/{uuid4().hex[:8]}"
+            async with async_session_maker() as db:
+                rows = await claim_due_posts(db, token, limit, lookahead)
+            for scheduled_at, post_id, platform, account in rows:
+                # Reservado de novo (a edição desfez a reserva anterior): a entrada antiga
+                # fica no heap, mas com o token antigo é ignorada por fire_due
+                self._queued[post_id] = token
+                heapq.heappush(self._heap, (scheduled_at, post_id, platform, account, token))
+            claimed += len(rows)
+            if len(rows) < limit:
+                break
+        return claimed
+
+    def fire_due(self) -> None:
+        """
+        Dispara todos os posts cujo horário já chegou.
+        """
+        now = utc_now()
+        while self._heap and self._heap[0][0] <= now:
+            _, post_id, platform, account, token = heapq.heappop(self._heap)
+            if self._queued.get(post_id) != token:
+                continue
+            task = asyncio.create_task(self._publish(post_id, platform, account, token))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _publish(self, post_id: UUID, platform: str, account: str, token: str) -> None:
+        try:
+            await self._publish_claimed(post_id, platform, account, token)
+        finally:
+            if self._queued.get(post_id) == token:
+                del self._queued[post_id]
+
+    async def _publish_claimed(self, post_id: UUID, platform: str, account: str, token: str) -> None:
+        # A vaga é por rede social: uma rede lenta não segura a publicação nas outras.
+        # O post só passa para 'publishing' depois de conseguir a vaga e ser aceito pela
+        # fila da conta, para que o lease de publicação não expire enquanto ele espera.
+        async with self._semaphore(platform):
+            try:
+                with self.dispatcher.admit(platform, account):
+                    async with async_session_maker() as db:
+                        post = await start_publish(db, post_id, token)
+                        if post is None:
+                            return
+                        try:
+                            external_id = await self.dispatcher.submit(post, account)
+                        except PublishError as e:
+                            await finish_publish(
+                                db, post, token, error=str(e), retryable=e.retryable, retry_after=e.retry_after
+                            )
+                        else:
+                            await finish_publish(db, post, token, external_id=external_id)
+            except DispatcherBusy as e:
+                async with async_session_maker() as db:
+                    await defer_publish(db, post_id, token, e.retry_after)
+
+    async def run(self) -> None:
+        """
+        Loop principal: reserva, dispara no horário e dorme até o próximo evento.
+        """
+        logger.info("Publicador iniciado (%s)", self.owner)
+        next_poll = 0.0
+        try:
+            while True:
+                if time.monotonic() >= next_poll:
+                    try:
+                        await self.fill()
+                    except Exception:
+                        logger.exception("Erro ao reservar posts agendados")
+                    next_poll = time.monotonic() + settings.SCHEDULER_POLL_SECONDS
+                self.fire_due()
+                sleep_for = next_poll - time.monotonic()
+                if self._heap:
+                    sleep_for = min(sleep_for, (self._heap[0][0] - utc_now()).total_seconds())
+                await asyncio.sleep(max(sleep_for, 0))
+        finally:
+            await self.shutdown()
+
+    async def shutdown(self) -> None:
+        """
+        Devolve os posts ainda não disparados. Publicações interrompidas ficam em 'publishing'
+        e são retomadas por outro processo quando o lease expirar.
+        """
+        for task in self._tasks:
+            task.cancel()
+        self._heap.clear()
+        self._queued.clear()
+        await self.dispatcher.aclose()
+        with contextlib.suppress(Exception):
+            async with async_session_maker() as db:
+                await release_leases(db, self.owner)
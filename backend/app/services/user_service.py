@@ -1,22 +1,98 @@
 import httpx
+from datetime import datetime
 from uuid import UUID
-from sqlmodel import Session, select
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import HTTPException, status
 from typing import Optional
 
 from app.core.config import get_settings
-from app.models.user import User
+from app.core.security import ahash_password, averify_and_update_password, create_access_token
+from app.core.supabase import CircuitOpenError, SupabaseAuthClient
+from app.models.user import User, UserCredential
 from app.schemas.user import UserRegister, UserLogin
-# from app.core.security import get_password_hash, verify_password # Se estivesse usando auth interno
 
 settings = get_settings()
 
-async def register_user(user_data: UserRegister, db: Session) -> User:
+# Hash usado quando o email não existe, para o login levar o mesmo tempo (não revela quais emails existem)
+_dummy_password_hash: Optional[str] = None
+
+async def _register_internal_user(user_data: UserRegister, db: AsyncSession) -> User:
+    """
+    Registro com AUTH_BACKEND="internal": a senha é guardada como hash bcrypt na tabela 'user_credentials'.
+    """
+    existing = (await db.exec(select(User.id).where(User.email == user_data.email))).first()
+    if existing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "BAD_REQUEST", "message": "Email já cadastrado."}
+        )
+    # Devolve a conexão ao pool enquanto o hash é calculado
+    await db.commit()
+    password_hash = await ahash_password(user_data.password)
+    new_user = User(email=user_data.email, name=user_data.name, role="user")
+    db.add(new_user)
+    db.add(UserCredential(user_id=new_user.id, password_hash=password_hash))
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Outro registro com o mesmo email terminou primeiro
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "BAD_REQUEST", "message": "Email já cadastrado."}
+        )
+    await db.refresh(new_user)
+    return new_user
+
+async def _authenticate_internal_user(user_data: UserLogin, db: AsyncSession) -> dict:
+    """
+    Login com AUTH_BACKEND="internal". A verificação roda no pool de hashing; se o custo do
+    bcrypt mudou desde o último login, o hash é regravado com o custo atual.
+    """
+    global _dummy_password_hash
+    statement = (
+        select(User.id, UserCredential.password_hash)
+        .join(UserCredential, UserCredential.user_id == User.id)
+        .where(User.email == user_data.email)
+    )
+    row = (await db.exec(statement)).first()
+    # Devolve a conexão ao pool durante a verificação: numa avalanche de logins, as conexões
+    # presas esperando o bcrypt travariam as demais rotas
+    await db.commit()
+    if row is None:
+        if _dummy_password_hash is None:
+            _dummy_password_hash = await ahash_password("dummy-password")
+        await averify_and_update_password(user_data.password, _dummy_password_hash)
+        valid, new_hash = False, None
+    else:
+        user_id, password_hash = row
+        valid, new_hash = await averify_and_update_password(user_data.password, password_hash)
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail={"code": "UNAUTHORIZED", "message": "Credenciais inválidas."}
+        )
+    if new_hash:
+        await db.exec(
+            update(UserCredential)
+            .where(UserCredential.user_id == user_id)
+            .values(password_hash=new_hash, updated_at=datetime.now())
+        )
+        await db.commit()
+    access_token = create_access_token({"sub": str(user_id)})
+    return {"access_token": access_token, "user_id": str(user_id)}
+
+async def register_user(user_data: UserRegister, db: AsyncSession, supabase: SupabaseAuthClient) -> User:
     """
     Registra um novo usuário no Supabase Auth e na tabela 'users' do DB.
+    Usa o cliente HTTP compartilhado (pool de conexões com keep-alive).
+    Com AUTH_BACKEND="internal", registra só no DB (senha com hash bcrypt).
     """
-    # URLs da API Supabase Auth
-    supabase_auth_url = f"{settings.SUPABASE_URL}/auth/v1/signup" # Ajustar para a URL real do Supabase
+    if settings.AUTH_BACKEND == "internal":
+        return await _register_internal_user(user_data, db)
 
     # O Supabase Auth lida com o hashing da senha internamente
     auth_payload = {
@@ -29,105 +105,100 @@ async def register_user(user_data: UserRegister, db: Session) -> User:
         }
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                supabase_auth_url,
-                json=auth_payload,
-                headers={
-                    "apikey": settings.SUPABASE_KEY,
-                    "Content-Type": "application/json"
-                }
-            )
-            response.raise_for_status() # Levanta exceção para erros HTTP (4xx ou 5xx)
-
-            supabase_user_data = response.json()
-            # O ID do usuário retornado pelo Supabase Auth
-            user_id_from_supabase = supabase_user_data["user"]["id"]
-
-            # Criar o registro do usuário na sua tabela 'users'
-            # Assumimos que o ID do usuário Supabase é o mesmo que o PK na nossa tabela 'users'
-            new_user = User(
-                id=UUID(user_id_from_supabase),
-                email=user_data.email,
-                name=user_data.name,
-                role="user" # Papel padrão para novos usuários
-            )
-            db.add(new_user)
-            db.commit()
-            db.refresh(new_user) # Atualiza o objeto new_user com os dados do DB (ex: created_at)
-            return new_user
-
-        except httpx.HTTPStatusError as e:
-            # Tratar erros específicos do Supabase Auth
-            if e.response.status_code == 400:
-                error_detail = e.response.json().get("msg", "Bad request to Supabase Auth.")
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail={"code": "BAD_REQUEST", "message": f"Erro no Supabase Auth: {error_detail}"}
-                )
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail={"code": "SERVER_ERROR", "message": f"Falha ao registrar usuário no Supabase: {e.response.text}"}
-            )
-        except Exception as e:
+    try:
+        response = await supabase.sign_up(auth_payload)
+        response.raise_for_status() # Levanta exceção para erros HTTP (4xx ou 5xx)
+
+        supabase_user_data = response.json()
+        # O ID do usuário retornado pelo Supabase Auth
+        user_id_from_supabase = supabase_user_data["user"]["id"]
+
+        # Criar o registro do usuário na sua tabela 'users'
+        # Assumimos que o ID do usuário Supabase é o mesmo que o PK na nossa tabela 'users'
+        new_user = User(
+            id=UUID(user_id_from_supabase),
+            email=user_data.email,
+            name=user_data.name,
+            role="user" # Papel padrão para novos usuários
+        )
+        db.add(new_user)
+        await db.commit()
+        await db.refresh(new_user) # Atualiza o objeto new_user com os dados do DB (ex: created_at)
+        return new_user
+
+    except httpx.HTTPStatusError as e:
+        # Tratar erros específicos do Supabase Auth
+        if e.response.status_code == 400:
+            error_detail = e.response.json().get("msg", "Bad request to Supabase Auth.")
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail={"code": "SERVER_ERROR", "message": f"Erro inesperado ao registrar usuário: {str(e)}"}
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"code": "BAD_REQUEST", "message": f"Erro no Supabase Auth: {error_detail}"}
             )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"code": "SERVER_ERROR", "message": f"Falha ao registrar usuário no Supabase: {e.response.text}"}
+        )
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"code": "SERVICE_UNAVAILABLE", "message": str(e)}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"code": "SERVER_ERROR", "message": f"Erro inesperado ao registrar usuário: {str(e)}"}
+        )
 
-async def authenticate_user(user_data: UserLogin, db: Session) -> dict:
+async def authenticate_user(user_data: UserLogin, db: AsyncSession, supabase: SupabaseAuthClient) -> dict:
     """
     Autentica um usuário contra o Supabase Auth e retorna o token de acesso.
     Retorna um dicionário contendo 'access_token' e 'user_id'.
+    Com AUTH_BACKEND="internal", verifica a senha no DB e emite um token HS256 próprio.
     """
-    # URL da API Supabase Auth para sign-in
-    supabase_auth_url = f"{settings.SUPABASE_URL}/auth/v1/token?grant_type=password"
+    if settings.AUTH_BACKEND == "internal":
+        return await _authenticate_internal_user(user_data, db)
 
     auth_payload = {
         "email": user_data.email,
         "password": user_data.password
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                supabase_auth_url,
-                json=auth_payload,
-                headers={
-                    "apikey": settings.SUPABASE_KEY,
-                    "Content-Type": "application/json"
-                }
-            )
-            response.raise_for_status() # Levanta exceção para erros HTTP
+    try:
+        response = await supabase.sign_in_with_password(auth_payload)
+        response.raise_for_status() # Levanta exceção para erros HTTP
 
-            supabase_response_data = response.json()
-            access_token = supabase_response_data["access_token"]
-            user_id = supabase_response_data["user"]["id"] # O ID do usuário do Supabase Auth
+        supabase_response_data = response.json()
+        access_token = supabase_response_data["access_token"]
+        user_id = supabase_response_data["user"]["id"] # O ID do usuário do Supabase Auth
 
-            return {"access_token": access_token, "user_id": user_id}
+        return {"access_token": access_token, "user_id": user_id}
 
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 400: # Supabase retorna 400 para credenciais inválidas
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail={"code": "UNAUTHORIZED", "message": "Credenciais inválidas."}
-                )
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail={"code": "SERVER_ERROR", "message": f"Falha ao autenticar no Supabase: {e.response.text}"}
-            )
-        except Exception as e:
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 400: # Supabase retorna 400 para credenciais inválidas
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail={"code": "SERVER_ERROR", "message": f"Erro inesperado ao autenticar usuário: {str(e)}"}
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail={"code": "UNAUTHORIZED", "message": "Credenciais inválidas."}
             )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"code": "SERVER_ERROR", "message": f"Falha ao autenticar no Supabase: {e.response.text}"}
+        )
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"code": "SERVICE_UNAVAILABLE", "message": str(e)}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"code": "SERVER_ERROR", "message": f"Erro inesperado ao autenticar usuário: {str(e)}"}
+        )
 
 # Função para obter um usuário do DB (útil para get_current_user no security.py)
-def get_user_by_id(user_id: UUID, db: Session) -> Optional[User]:
+async def get_user_by_id(user_id: UUID, db: AsyncSession) -> Optional[User]:
     """
     Busca um usuário na tabela 'users' pelo seu ID.
     """
     statement = select(User).where(User.id == user_id)
-    user = db.exec(statement).first()
+    user = (await db.exec(statement)).first()
     return user
\ No newline at end of file
@@ -0,0 +1,37 @@
+# app/worker.py
+"""
+Processo dedicado ao publicador de posts agendados.
+
+Uso (a partir de backend/):
+    python -m app.worker
+
+Vários processos (e réplicas da API com SCHEDULER_ENABLED=true) podem rodar ao mesmo
+tempo: cada post é reservado por um único processo.
+"""
+import asyncio
+import logging
+import signal
+
+from app.core.container import aclose_resources
+from app.services.publishers import get_publisher_registry
+from app.services.scheduler_service import PublishingEngine
+
+
+async def main() -> None:
+    registry = get_publisher_registry()
+    engine_task = asyncio.create_task(PublishingEngine(registry).run())
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        # Encerramento limpo: devolve à fila os posts reservados e ainda não publicados
+        loop.add_signal_handler(sig, engine_task.cancel)
+    try:
+        await engine_task
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await aclose_resources()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+"""
+Benchmark do cache de respostas: consultas SQL e throughput de um cliente fazendo polling.
+
+Simula o frontend consultando /users/me, a lista de posts e o calendário do mês em loop,
+com uma edição de post a cada --write-every leituras (que invalida o cache do usuário).
+Compara CACHE_BACKEND=none e memory, e o polling com If-None-Match (respostas 304).
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_cache --requests 3000 --posts 500
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+_db_dir = tempfile.mkdtemp(prefix="bench_cache_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/bench.db")
+os.environ.setdefault("SUPABASE_URL", "http://supabase.local")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("JWKS_BACKGROUND_REFRESH", "false")
+
+import httpx
+from jose import jwt
+from sqlalchemy import event, insert
+
+from app.core.cache import get_cache
+from app.core.config import get_settings
+from app.core.database import create_db_and_tables, get_async_engine, get_engine
+from app.main import app
+from app.models.post import Post, PostStatus, utc_now
+from app.models.user import User
+
+MONTH_START = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+statements = 0
+
+
+def count_statement(*_args) -> None:
+    global statements
+    statements += 1
+
+
+def seed(user_id: uuid.UUID, n_posts: int) -> list[uuid.UUID]:
+    now = utc_now()
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "content": f"Post {i}",
+            "platform": "instagram",
+            "status": PostStatus.DRAFT.value,
+            "scheduled_at": MONTH_START + timedelta(minutes=90 * i),
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(n_posts)
+    ]
+    with get_engine().begin() as conn:
+        conn.execute(insert(User.__table__), [{"id": user_id, "email": "bench@example.com", "name": "Bench"}])
+        conn.execute(insert(Post.__table__), rows)
+    return [row["id"] for row in rows]
+
+
+def use_backend(name: str) -> None:
+    os.environ["CACHE_BACKEND"] = name
+    get_settings.cache_clear()
+    get_cache.cache_clear()
+
+
+async def run_mode(args: argparse.Namespace, token: str, post_ids: list[uuid.UUID], conditional: bool) -> dict:
+    global statements
+    prefix = get_settings().API_V1_STR
+    urls = [
+        f"{prefix}/users/me",
+        f"{prefix}/posts?limit=50",
+        f"{prefix}/posts/calendar?start={MONTH_START.isoformat()}&end={(MONTH_START + timedelta(days=31)).isoformat()}",
+    ]
+    urls = [url.replace("+", "%2B") for url in urls]
+    headers = {"Authorization": f"Bearer {token}"}
+    etags: dict[str, str] = {}
+    counts = {"200": 0, "304": 0}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        statements = 0
+        started = time.perf_counter()
+        for i in range(args.requests):
+            if args.write_every and i and i % args.write_every == 0:
+                post_id = post_ids[i % len(post_ids)]
+                response = await client.patch(f"{prefix}/posts/{post_id}", json={"content": f"Edit {i}"}, headers=headers)
+                response.raise_for_status()
+            url = urls[i % len(urls)]
+            request_headers = dict(headers)
+            if conditional and url in etags:
+                request_headers["If-None-Match"] = etags[url]
+            response = await client.get(url, headers=request_headers)
+            if response.status_code == 200:
+                etags[url] = response.headers["ETag"]
+            counts[str(response.status_code)] += 1
+        elapsed = time.perf_counter() - started
+    return {"seconds": elapsed, "statements": statements, **counts}
+
+
+async def bench(args: argparse.Namespace) -> None:
+    await create_db_and_tables()
+    event.listen(get_async_engine().sync_engine, "before_cursor_execute", count_statement)
+    user_id = uuid.uuid4()
+    post_ids = seed(user_id, args.posts)
+    token = jwt.encode(
+        {"sub": str(user_id), "aud": "authenticated", "exp": datetime.now(timezone.utc) + timedelta(hours=1)},
+        os.environ["JWT_SECRET_KEY"],
+        algorithm="HS256",
+    )
+
+    print(f"leituras={args.requests} posts={args.posts} escrita a cada {args.write_every} leituras")
+    print(f"{'cache':<8} {'If-None-Match':<14} {'req/s':>8} {'SQL':>7} {'SQL/req':>8} {'200':>6} {'304':>6}")
+    for backend, conditional in (("none", False), ("memory", False), ("none", True), ("memory", True)):
+        use_backend(backend)
+        r = await run_mode(args, token, post_ids, conditional)
+        print(
+            f"{backend:<8} {'sim' if conditional else 'não':<14} {args.requests / r['seconds']:>8.1f} "
+            f"{r['statements']:>7} {r['statements'] / args.requests:>8.2f} {r['200']:>6} {r['304']:>6}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--posts", type=int, default=500)
+    parser.add_argument("--write-every", type=int, default=50, help="Leituras entre edições de post (0 = sem escritas).")
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark do resumo do calendário (rollups por dia) x baixar os posts do período.
+
+Importa --posts posts de um usuário espalhados por um trimestre e compara, para um mês:
+- GET /posts/calendar: todos os posts do mês (o que o CalendarPage precisaria para contar);
+- GET /posts/summary: contagens por dia/status/rede lidas dos rollups;
+- GET /posts/summary?since=v depois de editar um post: só os dias alterados.
+Mede o custo de manter os rollups comparando o PATCH de um post com e sem eles.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_calendar_summary --posts 20000 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+_db_dir = tempfile.mkdtemp(prefix="bench_summary_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/bench.db")
+os.environ.setdefault("SUPABASE_URL", "http://supabase.local")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("JWKS_BACKGROUND_REFRESH", "false")
+os.environ.setdefault("CACHE_BACKEND", "none")
+
+import httpx
+from jose import jwt
+from sqlalchemy import insert
+
+from app.core.config import get_settings
+from app.core.database import create_db_and_tables, get_engine
+from app.main import app
+from app.models.user import User
+from app.services import post_service
+
+MONTH = {"start": "2030-01-01", "end": "2030-02-01"}
+MONTH_DATETIMES = {"start": "2030-01-01T00:00:00Z", "end": "2030-02-01T00:00:00Z"}
+
+
+def seed_file(n: int) -> bytes:
+    start = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    return "\n".join(
+        json.dumps({
+            "content": f"Post {i} #bench",
+            "platform": ("instagram", "facebook", "x", "linkedin")[i % 4],
+            "status": ("draft", "scheduled", "published")[i % 3],
+            "scheduled_at": (start + timedelta(minutes=(i * 131) % (90 * 24 * 60))).isoformat(),
+        })
+        for i in range(n)
+    ).encode()
+
+
+async def measure(client: httpx.AsyncClient, url: str, params: dict, headers: dict, n: int) -> tuple[float, int]:
+    timings = []
+    size = 0
+    for _ in range(n):
+        started = time.perf_counter()
+        response = await client.get(url, params=params, headers=headers)
+        timings.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+        size = len(response.content)
+    return statistics.median(timings), size
+
+
+async def measure_updates(client: httpx.AsyncClient, prefix: str, post_ids: list[str], headers: dict) -> float:
+    started = time.perf_counter()
+    for i, post_id in enumerate(post_ids):
+        body = {"scheduled_at": f"2030-01-{1 + i % 28:02d}T12:00:00Z", "status": ("draft", "scheduled")[i % 2]}
+        (await client.patch(f"{prefix}/posts/{post_id}", json=body, headers=headers)).raise_for_status()
+    return (time.perf_counter() - started) * 1000 / len(post_ids)
+
+
+async def bench(args: argparse.Namespace) -> None:
+    await create_db_and_tables()
+    app.state.supabase = None
+    prefix = get_settings().API_V1_STR
+    user_id = uuid.uuid4()
+    with get_engine().begin() as conn:
+        conn.execute(insert(User.__table__).values(id=user_id, email="bench@example.com", name="Bench"))
+    token = jwt.encode(
+        {"sub": str(user_id), "aud": "authenticated", "exp": datetime.now(timezone.utc) + timedelta(hours=1)},
+        os.environ["JWT_SECRET_KEY"],
+        algorithm="HS256",
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        started = time.perf_counter()
+        response = await client.post(
+            f"{prefix}/posts/import", content=seed_file(args.posts),
+            headers={**headers, "Content-Type": "application/x-ndjson"},
+        )
+        response.raise_for_status()
+        print(f"{args.posts} posts importados em {time.perf_counter() - started:.1f}s (com rollups)")
+
+        calendar_ms, calendar_size = await measure(
+            client, f"{prefix}/posts/calendar", MONTH_DATETIMES, headers, args.requests
+        )
+        summary_ms, summary_size = await measure(client, f"{prefix}/posts/summary", MONTH, headers, args.requests)
+        version = (await client.get(f"{prefix}/posts/summary", params=MONTH, headers=headers)).json()["version"]
+
+        page = await client.get(f"{prefix}/posts", params={"limit": args.updates}, headers=headers)
+        post_ids = [item["id"] for item in page.json()["items"]]
+        with_rollups = await measure_updates(client, prefix, post_ids, headers)
+        diff_ms, diff_size = await measure(
+            client, f"{prefix}/posts/summary", {**MONTH, "since": version}, headers, args.requests
+        )
+
+        apply_rollup_changes = post_service.apply_rollup_changes
+
+        async def skip_rollups(*args, **kwargs):
+            return None
+
+        post_service.apply_rollup_changes = skip_rollups
+        try:
+            without_rollups = await measure_updates(client, prefix, post_ids, headers)
+        finally:
+            post_service.apply_rollup_changes = apply_rollup_changes
+
+    print()
+    print(f"{'consulta (1 mês)':<40} {'mediana (ms)':>13} {'resposta (KB)':>14}")
+    print(f"{'/posts/calendar (todos os posts)':<40} {calendar_ms:>13.1f} {calendar_size / 1024:>14.1f}")
+    print(f"{'/posts/summary':<40} {summary_ms:>13.1f} {summary_size / 1024:>14.1f}")
+    print(f"{f'/posts/summary?since (após {len(post_ids)} edições)':<40} {diff_ms:>13.1f} {diff_size / 1024:>14.1f}")
+    print()
+    print(f"PATCH /posts/{{id}}: {without_rollups:.2f} ms sem rollups, {with_rollups:.2f} ms com rollups")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--updates", type=int, default=20, help="Posts editados antes do modo de diferenças.")
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark do dispatcher: limite de taxa por conta e lotes contra um servidor local (platform_standin).
+
+Agenda N posts para agora, distribuídos entre A contas, e publica pelo HttpPublisher em três modos:
+- sem limite:      nenhum controle de taxa (a "rede" responde 429 e os posts entram em retry);
+- token bucket:    limite por conta igual ao da rede, uma chamada por post;
+- bucket + lote:   limite por conta e até --batch posts por chamada.
+
+Para cada modo mostra o tempo até publicar tudo, chamadas feitas, respostas 429 e duplicados.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_dispatcher --posts 600 --accounts 5
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+
+_db_dir = tempfile.mkdtemp(prefix="bench_dispatcher_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/bench.db")
+os.environ.setdefault("SUPABASE_URL", "http://supabase.local")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("SCHEDULER_POLL_SECONDS", "0.2")
+os.environ.setdefault("SCHEDULER_RETRY_BACKOFF_SECONDS", "1")
+os.environ.setdefault("SCHEDULER_MAX_ATTEMPTS", "100")
+
+import httpx
+from sqlalchemy import delete, insert
+from sqlmodel import func, select
+
+from app.core.database import async_session_maker, create_db_and_tables, get_engine
+from app.models.post import Post, PostStatus, utc_now
+from app.services.publishers import HttpPublisher, PublisherRegistry
+from app.services.scheduler_service import PublishingEngine
+from benchmarks.platform_standin import create_platform_app
+
+
+def seed(n_posts: int, n_accounts: int) -> None:
+    now = utc_now()
+    user_id = uuid.uuid4()
+    with get_engine().begin() as conn:
+        conn.execute(delete(Post.__table__))
+        conn.execute(insert(Post.__table__), [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "account_id": f"account-{i % n_accounts}",
+                "content": f"Post {i}",
+                "platform": "standin",
+                "status": PostStatus.SCHEDULED.value,
+                "scheduled_at": now - timedelta(seconds=1),
+                "attempts": 0,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for i in range(n_posts)
+        ])
+
+
+async def published_count() -> int:
+    async with async_session_maker() as db:
+        statement = select(func.count()).select_from(Post).where(Post.status == PostStatus.PUBLISHED.value)
+        return (await db.exec(statement)).one()
+
+
+async def run_mode(args: argparse.Namespace, rate: float | None, batch: int) -> dict:
+    seed(args.posts, args.accounts)
+    platform = create_platform_app(rate_per_second=args.rate, burst=args.rate, latency=args.latency)
+    publisher = HttpPublisher(
+        "http://standin",
+        rate_per_second=rate,
+        burst=int(args.rate),
+        max_batch_size=batch,
+        transport=httpx.ASGITransport(app=platform),
+    )
+    engine_ = PublishingEngine(PublisherRegistry({"standin": publisher}), owner="bench")
+    started = time.perf_counter()
+    task = asyncio.create_task(engine_.run())
+    while await published_count() < args.posts and time.perf_counter() - started < args.timeout:
+        await asyncio.sleep(0.1)
+    elapsed = time.perf_counter() - started
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await publisher.aclose()
+    stats = platform.state.stats
+    return {
+        "published": await published_count(),
+        "seconds": elapsed,
+        "calls": stats["calls"],
+        "rate_limited": stats["rate_limited"],
+        "duplicates": stats["duplicates"],
+    }
+
+
+async def bench(args: argparse.Namespace) -> None:
+    await create_db_and_tables()
+    print(f"posts={args.posts} contas={args.accounts} limite da rede={args.rate}/s por conta")
+    print(f"{'modo':<16} {'publicados':>10} {'tempo (s)':>10} {'chamadas':>9} {'429':>6} {'duplicados':>10}")
+    modes = [("sem limite", None, 1), ("token bucket", args.rate, 1), ("bucket + lote", args.rate, args.batch)]
+    for name, rate, batch in modes:
+        r = await run_mode(args, rate, batch)
+        print(
+            f"{name:<16} {r['published']:>10} {r['seconds']:>10.2f} {r['calls']:>9} "
+            f"{r['rate_limited']:>6} {r['duplicates']:>10}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=600)
+    parser.add_argument("--accounts", type=int, default=5)
+    parser.add_argument("--rate", type=float, default=5.0, help="Chamadas por segundo por conta aceitas pela rede.")
+    parser.add_argument("--batch", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
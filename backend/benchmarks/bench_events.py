@@ -0,0 +1,101 @@
+"""
+Benchmark do fan-out de eventos (GET /events) no EventHub, sem HTTP.
+
+Abre --connections assinaturas para --users usuários e publica rajadas de --updates
+mudanças em --posts posts de cada usuário. Mede a vazão de publicação, quantos eventos
+chegam a cada conexão depois do agrupamento (um por post com o estado final) e o pior
+caso de eventos pendentes por conexão, que nunca passa de EVENTS_MAX_PENDING.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_events --users 100 --connections 1000 --posts 20 --updates 10
+    python -m benchmarks.bench_events --broker relay   # dois hubs ligados pelo relay local
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///bench_events.db")
+os.environ.setdefault("SUPABASE_URL", "http://supabase.local")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+
+from app.core.events import EventHub, MemoryBroker, RelayBroker
+from benchmarks.event_relay_standin import start_relay
+
+RELAY_PORT = 9113
+
+
+async def drain(subscription, coalesce: float) -> int:
+    received = 0
+    while (batch := await subscription.next_batch(1.0, coalesce)) is not None:
+        received += len(batch)
+    return received
+
+
+async def bench(args: argparse.Namespace) -> None:
+    server = None
+    if args.broker == "relay":
+        server = await start_relay(port=RELAY_PORT)
+        address = f"127.0.0.1:{RELAY_PORT}"
+        publisher = EventHub(RelayBroker(address), args.max_pending, args.connections)
+        hubs = [EventHub(RelayBroker(address), args.max_pending, args.connections) for _ in range(2)]
+    else:
+        publisher = EventHub(MemoryBroker(), args.max_pending, args.connections)
+        hubs = [publisher]
+    for hub in hubs:
+        await hub.start()
+    await asyncio.sleep(0.2)
+
+    users = [uuid.uuid4() for _ in range(args.users)]
+    subscriptions = [
+        hubs[i % len(hubs)].subscribe(users[i % len(users)]) for i in range(args.connections)
+    ]
+    readers = [asyncio.create_task(drain(s, args.coalesce)) for s in subscriptions]
+
+    published = 0
+    peak_pending = 0
+    started = time.perf_counter()
+    for update in range(args.updates):
+        for user_id in users:
+            for post in range(args.posts):
+                data = {"id": f"post-{post}", "action": "updated", "version": update}
+                await publisher.publish(user_id, "post", data)
+                published += 1
+        peak_pending = max(peak_pending, *(len(s._pending) for s in subscriptions))
+        # Deixa os leitores e o relay trabalharem entre as rajadas
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+    received = await asyncio.gather(*readers)
+
+    for hub in {publisher, *hubs}:
+        await hub.aclose()
+    if server is not None:
+        # Deixa o relay ver as conexões fechadas antes de encerrar
+        await asyncio.sleep(0.1)
+        server.close()
+        await server.wait_closed()
+
+    connections_per_user = args.connections / args.users
+    print(f"broker: {args.broker}, {args.connections} conexões, {args.users} usuários")
+    print(f"{published} eventos publicados em {elapsed * 1000:.0f} ms ({published / elapsed:.0f} eventos/s)")
+    print(f"entregas sem agrupamento: {published * connections_per_user:.0f}")
+    print(f"entregas com agrupamento: {sum(received)} (média {sum(received) / len(received):.1f} por conexão)")
+    print(f"pico de eventos pendentes por conexão: {peak_pending} (limite {args.max_pending})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--broker", choices=["memory", "relay"], default="memory")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--posts", type=int, default=20, help="Posts alterados por usuário em cada rajada.")
+    parser.add_argument("--updates", type=int, default=10, help="Rajadas (mudanças por post).")
+    parser.add_argument("--max-pending", type=int, default=256)
+    parser.add_argument("--coalesce", type=float, default=0.25)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark de repetições de POST /auth/register (clientes móveis em rede instável), com e sem Idempotency-Key.
+
+Cada um dos --users clientes envia o registro e, sem esperar a resposta, repete a mesma
+requisição --retries vezes a cada --retry-after ms (o cliente desistiu de esperar, mas a
+primeira continua em andamento), mais uma repetição depois que todas terminaram (a rede
+voltou). O Supabase Auth é o stand-in local (benchmarks.supabase_standin) com
+--supabase-latency-ms de latência. Compara as chamadas de signup ao Supabase, as respostas
+por status, quantos clientes receberam o usuário criado em todas as tentativas e a
+latência das respostas 201.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_idempotency --users 200 --retries 3 --retry-after 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from collections import Counter
+
+_db_dir = tempfile.mkdtemp(prefix="bench_idempotency_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/bench.db")
+os.environ.setdefault("SUPABASE_URL", "http://supabase.local")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("JWKS_BACKGROUND_REFRESH", "false")
+os.environ["AUTH_BACKEND"] = "supabase"
+
+import httpx
+
+from app.core.config import get_settings
+from app.core.database import create_db_and_tables
+from app.core.supabase import create_supabase_client
+from app.main import app
+from benchmarks.supabase_standin import create_supabase_app
+
+
+async def register_with_retries(
+    client: httpx.AsyncClient, url: str, index: int, mode: str, args: argparse.Namespace
+) -> list[httpx.Response]:
+    body = {"email": f"{mode}-{index}@example.com", "password": "bench-password", "name": f"Bench {index}"}
+    headers = {"Idempotency-Key": f"{mode}-{index}"} if mode == "com-chave" else {}
+
+    async def attempt(delay: float) -> httpx.Response:
+        await asyncio.sleep(delay)
+        return await client.post(url, json=body, headers=headers)
+
+    responses = await asyncio.gather(*(attempt(i * args.retry_after / 1000) for i in range(args.retries + 1)))
+    # A rede voltou: o cliente repete uma última vez para saber o resultado
+    responses.append(await client.post(url, json=body, headers=headers))
+    return responses
+
+
+async def run_mode(mode: str, supabase_app, args: argparse.Namespace) -> dict:
+    url = f"{get_settings().API_V1_STR}/auth/register"
+    signups_before = supabase_app.state.stats["signup"]
+    started = time.perf_counter()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        results = await asyncio.gather(*(register_with_retries(client, url, i, mode, args) for i in range(args.users)))
+    elapsed = time.perf_counter() - started
+    statuses = Counter(r.status_code for responses in results for r in responses)
+    # Cliente bem atendido: todas as tentativas devolveram o mesmo usuário criado
+    consistent = sum(
+        all(r.status_code == 201 for r in responses) and len({r.json()["id"] for r in responses}) == 1
+        for responses in results
+    )
+    return {
+        "signups": supabase_app.state.stats["signup"] - signups_before,
+        "statuses": dict(sorted(statuses.items())),
+        "consistent": consistent,
+        "seconds": elapsed,
+        # Tempo até o cliente receber o usuário criado (201)
+        "median_ms": statistics.median(
+            r.elapsed.total_seconds() * 1000 for responses in results for r in responses if r.status_code == 201
+        ),
+    }
+
+
+async def bench(args: argparse.Namespace) -> None:
+    await create_db_and_tables()
+    supabase_app = create_supabase_app(os.environ["JWT_SECRET_KEY"], latency=args.supabase_latency_ms / 1000)
+    app.state.supabase = create_supabase_client(get_settings(), transport=httpx.ASGITransport(app=supabase_app))
+
+    requests = args.users * (args.retries + 2)
+    print(f"{args.users} clientes x {args.retries + 2} tentativas = {requests} requisições de registro")
+    print(f"{'modo':<10} {'signups':>8} {'ok':>6} {'respostas por status':<28} {'mediana 201 (ms)':>17} {'total (s)':>10}")
+    for mode in ("sem-chave", "com-chave"):
+        r = await run_mode(mode, supabase_app, args)
+        print(
+            f"{mode:<10} {r['signups']:>8} {r['consistent']:>6} {str(r['statuses']):<28} "
+            f"{r['median_ms']:>17.1f} {r['seconds']:>10.2f}"
+        )
+    await app.state.supabase.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--retries", type=int, default=3, help="Repetições enquanto a primeira está em andamento.")
+    parser.add_argument("--retry-after", type=float, default=50.0, help="Intervalo entre as repetições (ms).")
+    parser.add_argument("--supabase-latency-ms", type=float, default=200.0)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark do hashing de senhas durante uma avalanche de logins (AUTH_BACKEND=internal).
+
+Enquanto --clients clientes fazem login sem parar, um cliente de sondagem chama
+GET /users/me (rota que não usa bcrypt) a cada 20ms e mede a latência. Compara:
+- inline:  bcrypt no event loop (o que acontece chamando verify_password numa rota async);
+- thread:  pool de threads limitado (padrão);
+- process: pool de processos.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_password_hashing --clients 50 --seconds 5
+    PASSWORD_BCRYPT_ROUNDS=10 python -m benchmarks.bench_password_hashing
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from collections import Counter
+
+_db_dir = tempfile.mkdtemp(prefix="bench_passwords_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/bench.db")
+os.environ.setdefault("SUPABASE_URL", "http://supabase.local")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("JWKS_BACKGROUND_REFRESH", "false")
+os.environ.setdefault("CACHE_BACKEND", "none")
+os.environ["AUTH_BACKEND"] = "internal"
+
+import httpx
+
+from app.core.config import get_settings
+from app.core.database import create_db_and_tables
+from app.core.password_hasher import get_password_hasher
+from app.core.security import create_access_token
+from app.main import app
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+
+def use_executor(kind: str) -> None:
+    get_password_hasher().shutdown()
+    os.environ["PASSWORD_HASH_EXECUTOR"] = kind
+    get_settings.cache_clear()
+    get_password_hasher.cache_clear()
+
+
+def percentile(values: list[float], q: float) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1] if len(values) > 1 else values[0]
+
+
+async def run_mode(args: argparse.Namespace, token: str) -> dict:
+    prefix = get_settings().API_V1_STR
+    transport = httpx.ASGITransport(app=app)
+    statuses = Counter()
+    latencies: list[float] = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        deadline = time.perf_counter() + args.seconds
+
+        async def login_client():
+            while time.perf_counter() < deadline:
+                response = await client.post(f"{prefix}/auth/login", json={"email": EMAIL, "password": PASSWORD})
+                statuses[response.status_code] += 1
+                if response.status_code == 503:
+                    await asyncio.sleep(0.1)
+
+        async def probe():
+            headers = {"Authorization": f"Bearer {token}"}
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.get(f"{prefix}/users/me", headers=headers)
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(0.02)
+
+        await asyncio.gather(probe(), *(login_client() for _ in range(args.clients)))
+    return {"statuses": statuses, "latencies": latencies}
+
+
+async def bench(args: argparse.Namespace) -> None:
+    await create_db_and_tables()
+    # Sem lifespan (ASGITransport) e sem Supabase: AUTH_BACKEND=internal não usa o cliente
+    app.state.supabase = None
+    settings = get_settings()
+    prefix = settings.API_V1_STR
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post(
+            f"{prefix}/auth/register", json={"email": EMAIL, "password": PASSWORD, "name": "Bench"}
+        )
+        response.raise_for_status()
+        token = create_access_token({"sub": response.json()["id"]})
+
+    print(
+        f"bcrypt custo={settings.PASSWORD_BCRYPT_ROUNDS} workers={settings.PASSWORD_HASH_WORKERS} "
+        f"fila={settings.PASSWORD_HASH_MAX_QUEUE} clientes de login={args.clients} duração={args.seconds}s"
+    )
+    print(f"{'executor':<9} {'logins ok':>9} {'503':>6} {'sondas':>7} {'p50 (ms)':>9} {'p99 (ms)':>9} {'máx (ms)':>9}")
+    for kind in args.executors:
+        use_executor(kind)
+        r = await run_mode(args, token)
+        latencies = r["latencies"]
+        print(
+            f"{kind:<9} {r['statuses'][200]:>9} {r['statuses'][503]:>6} {len(latencies):>7} "
+            f"{percentile(latencies, 50):>9.1f} {percentile(latencies, 99):>9.1f} {max(latencies):>9.1f}"
+        )
+    get_password_hasher().shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--executors", nargs="+", default=["inline", "thread", "process"])
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark da importação/exportação em massa de posts.
+
+Importação: N linhas NDJSON pelo import_posts (INSERT multi-linha por lote) x um
+db.add()/commit() por post (o caminho do POST /posts), medido em uma amostra.
+Exportação: pico de memória (tracemalloc) e tempo do export_posts para cada tamanho,
+que deve ficar constante com o aumento de N.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_post_transfer --sizes 10000 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+_db_dir = tempfile.mkdtemp(prefix="bench_transfer_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/bench.db")
+os.environ.setdefault("SUPABASE_URL", "http://supabase.local")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from sqlalchemy import delete
+
+from app.core.database import async_session_maker, create_db_and_tables, get_engine
+from app.models.post import Post
+from app.schemas.post import PostCreate, PostFileFormat
+from app.services.post_service import create_post
+from app.services.post_transfer_service import export_posts, import_posts
+
+
+def ndjson_rows(n: int) -> list[dict]:
+    return [
+        {"content": f"Post {i} #bench", "platform": "instagram", "scheduled_at": f"2030-01-01T{i % 24:02d}:00:00Z"}
+        for i in range(n)
+    ]
+
+
+async def ndjson_stream(rows: list[dict], chunk_size: int = 64 * 1024):
+    body = "\n".join(json.dumps(row) for row in rows).encode()
+    for start in range(0, len(body), chunk_size):
+        yield body[start:start + chunk_size]
+
+
+def reset() -> None:
+    with get_engine().begin() as conn:
+        conn.execute(delete(Post.__table__))
+
+
+async def bench_import(n: int, sample: int) -> tuple[float, float]:
+    user_id = uuid.uuid4()
+    rows = ndjson_rows(n)
+    reset()
+    async with async_session_maker() as db:
+        started = time.perf_counter()
+        result = await import_posts(user_id, ndjson_stream(rows), PostFileFormat.NDJSON, db)
+        bulk = n / (time.perf_counter() - started)
+    assert result.inserted == n, result
+
+    reset()
+    async with async_session_maker() as db:
+        started = time.perf_counter()
+        for row in rows[:sample]:
+            await create_post(user_id, PostCreate.model_validate(row), db)
+        one_by_one = sample / (time.perf_counter() - started)
+    return bulk, one_by_one
+
+
+async def bench_export(n: int) -> tuple[float, int, int]:
+    user_id = uuid.uuid4()
+    reset()
+    async with async_session_maker() as db:
+        await import_posts(user_id, ndjson_stream(ndjson_rows(n)), PostFileFormat.NDJSON, db)
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = 0
+    async for chunk in export_posts(user_id, PostFileFormat.NDJSON):
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+
+async def bench(args: argparse.Namespace) -> None:
+    await create_db_and_tables()
+    print(f"{'posts':>8} {'import lote (linhas/s)':>23} {'add+commit (linhas/s)':>22}")
+    for n in args.sizes:
+        bulk, one_by_one = await bench_import(n, min(n, args.sample))
+        print(f"{n:>8} {bulk:>23.0f} {one_by_one:>22.0f}")
+    print()
+    print(f"{'posts':>8} {'export (s)':>11} {'arquivo (MB)':>13} {'pico de memória (MB)':>21}")
+    for n in args.sizes:
+        elapsed, peak, size = await bench_export(n)
+        print(f"{n:>8} {elapsed:>11.2f} {size / 1e6:>13.1f} {peak / 1e6:>21.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--sample", type=int, default=2000, help="Posts inseridos um a um para comparação.")
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
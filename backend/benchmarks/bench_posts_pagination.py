@@ -0,0 +1,141 @@
+"""
+Benchmark da listagem de posts: paginação por cursor (keyset) x OFFSET e consulta de calendário.
+
+Popula um SQLite local com N posts de um usuário "pesado" (mais ruído de outros usuários),
+com densidade fixa de posts por dia, e mede a latência de:
+- uma página profunda (90% da listagem) via cursor;
+- a mesma página via OFFSET;
+- um mês de calendário (list_posts_in_range).
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_posts_pagination --sizes 1000 10000 100000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+_db_dir = tempfile.mkdtemp(prefix="bench_posts_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/bench.db")
+os.environ.setdefault("SUPABASE_URL", "http://supabase.local")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from sqlalchemy import delete, insert
+from sqlmodel import select
+
+from app.core.database import async_session_maker, create_db_and_tables, get_engine
+from app.models.post import Post
+from app.core.pagination import encode_cursor
+from app.services.post_service import list_posts, list_posts_in_range
+
+POSTS_PER_DAY = 30
+PAGE_SIZE = 50
+BASE_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def seed(user_id: uuid.UUID, n_posts: int, noise_ratio: float) -> None:
+    """
+    Recria a tabela com n_posts do usuário medido e n_posts * noise_ratio de outros usuários.
+    """
+    step = timedelta(seconds=86400 / POSTS_PER_DAY)
+    other_users = [uuid.uuid4() for _ in range(10)]
+    with get_engine().begin() as conn:
+        conn.execute(delete(Post.__table__))
+        batch = []
+        total = n_posts + int(n_posts * noise_ratio)
+        for i in range(total):
+            owner = user_id if i < n_posts else other_users[i % len(other_users)]
+            batch.append({
+                "id": uuid.uuid4(),
+                "user_id": owner,
+                "content": f"Post {i} #bench",
+                "platform": ("instagram", "facebook", "linkedin")[i % 3],
+                "status": ("scheduled", "draft", "published")[i % 3],
+                "scheduled_at": BASE_DATE + step * (i if i < n_posts else i - n_posts),
+                "created_at": BASE_DATE,
+                "updated_at": BASE_DATE,
+            })
+            if len(batch) == 5000:
+                conn.execute(insert(Post.__table__), batch)
+                batch.clear()
+        if batch:
+            conn.execute(insert(Post.__table__), batch)
+
+
+async def timed(coro_factory, repeat: int) -> float:
+    """Mediana (ms) de `repeat` execuções."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await coro_factory()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def measure(user_id: uuid.UUID, n_posts: int, repeat: int) -> dict:
+    depth = int(n_posts * 0.9)
+    async with async_session_maker() as db:
+        # Posição do item logo antes da página profunda, para montar o cursor
+        anchor = (await db.exec(
+            select(Post.scheduled_at, Post.id)
+            .where(Post.user_id == user_id)
+            .order_by(Post.scheduled_at, Post.id)
+            .offset(depth - 1)
+            .limit(1)
+        )).one()
+        cursor = encode_cursor(anchor.scheduled_at, anchor.id)
+
+        async def keyset_page():
+            await list_posts(user_id, db, limit=PAGE_SIZE, cursor=cursor)
+
+        async def offset_page():
+            await db.exec(
+                select(Post)
+                .where(Post.user_id == user_id)
+                .order_by(Post.scheduled_at, Post.id)
+                .offset(depth)
+                .limit(PAGE_SIZE)
+            )
+
+        month_start = BASE_DATE + timedelta(days=(n_posts // POSTS_PER_DAY) // 2)
+
+        async def calendar_month():
+            await list_posts_in_range(
+                user_id, month_start, month_start + timedelta(days=30), db,
+                fields=["id", "status", "scheduled_at"],
+            )
+
+        return {
+            "keyset": await timed(keyset_page, repeat),
+            "offset": await timed(offset_page, repeat),
+            "calendar": await timed(calendar_month, repeat),
+        }
+
+
+async def bench(args: argparse.Namespace) -> None:
+    await create_db_and_tables()
+
+    user_id = uuid.uuid4()
+    print(f"{'posts':>8} {'keyset page (ms)':>17} {'offset page (ms)':>17} {'calendar month (ms)':>20}")
+    for n_posts in args.sizes:
+        seed(user_id, n_posts, args.noise)
+        result = await measure(user_id, n_posts, args.repeat)
+        print(f"{n_posts:>8} {result['keyset']:>17.2f} {result['offset']:>17.2f} {result['calendar']:>20.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--noise", type=float, default=0.5, help="Posts de outros usuários, proporcional a N.")
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark do publicador: pico de posts vencendo no mesmo minuto ("virada da hora").
+
+Popula um SQLite local com N posts agendados para daqui a poucos segundos, distribuídos
+entre as redes, e roda K engines concorrentes (simulando K processos) com um publicador
+falso de latência fixa. Mede:
+- vazão (posts publicados por segundo);
+- atraso em relação ao horário agendado (p50/p99);
+- publicações duplicadas (deve ser sempre 0).
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_scheduler --posts 5000 --engines 3 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+
+_db_dir = tempfile.mkdtemp(prefix="bench_scheduler_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/bench.db")
+os.environ.setdefault("SUPABASE_URL", "http://supabase.local")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("SCHEDULER_POLL_SECONDS", "0.5")
+
+from sqlalchemy import delete, insert
+from sqlmodel import func, select
+
+from app.core.database import async_session_maker, create_db_and_tables, get_engine
+from app.models.post import Post, PostStatus, utc_now
+from app.services.publishers import FakePublisher, PublisherRegistry
+from app.services.scheduler_service import PublishingEngine
+
+PLATFORMS = ("instagram", "facebook", "linkedin")
+
+
+def seed(n_posts: int, due_in: float) -> None:
+    """
+    Recria a tabela com n_posts agendados para daqui a `due_in` segundos, no mesmo minuto.
+    """
+    due_at = utc_now() + timedelta(seconds=due_in)
+    user_id = uuid.uuid4()
+    with get_engine().begin() as conn:
+        conn.execute(delete(Post.__table__))
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "content": f"Post {i}",
+                "platform": PLATFORMS[i % len(PLATFORMS)],
+                "status": PostStatus.SCHEDULED.value,
+                "scheduled_at": due_at + timedelta(milliseconds=i % 1000),
+                "attempts": 0,
+                "created_at": due_at,
+                "updated_at": due_at,
+            }
+            for i in range(n_posts)
+        ]
+        for start in range(0, len(rows), 5000):
+            conn.execute(insert(Post.__table__), rows[start:start + 5000])
+
+
+async def published_count() -> int:
+    async with async_session_maker() as db:
+        statement = select(func.count()).select_from(Post).where(Post.status == PostStatus.PUBLISHED.value)
+        return (await db.exec(statement)).one()
+
+
+async def bench(args: argparse.Namespace) -> None:
+    await create_db_and_tables()
+    seed(args.posts, args.due_in)
+
+    publisher = FakePublisher(latency=args.latency)
+    engines = [PublishingEngine(PublisherRegistry(default=publisher), owner=f"bench-{i}") for i in range(args.engines)]
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(e.run()) for e in engines]
+    while await published_count() < args.posts and time.perf_counter() - started < args.timeout:
+        await asyncio.sleep(0.2)
+    elapsed = time.perf_counter() - started
+    for task in tasks:
+        task.cancel()
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if not isinstance(result, (asyncio.CancelledError, type(None))):
+            print(f"engine falhou: {result!r}")
+
+    async with async_session_maker() as db:
+        rows = (await db.exec(
+            select(Post.scheduled_at, Post.published_at).where(Post.status == PostStatus.PUBLISHED.value)
+        )).all()
+    delays = sorted((published_at - scheduled_at).total_seconds() * 1000 for scheduled_at, published_at in rows)
+    duplicates = sum(count - 1 for count in publisher.published.values())
+    publish_window = max(elapsed - args.due_in, 1e-9)
+
+    print(f"posts={args.posts} engines={args.engines} latency={args.latency * 1000:.0f}ms")
+    print(f"publicados:  {len(rows)} em {publish_window:.2f}s após o horário ({len(rows) / publish_window:.0f} posts/s)")
+    if delays:
+        p99 = delays[min(len(delays) - 1, int(len(delays) * 0.99))]
+        print(f"atraso:      p50={statistics.median(delays):.0f}ms p99={p99:.0f}ms")
+    print(f"duplicados:  {duplicates}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--engines", type=int, default=3, help="Engines concorrentes (simulam processos).")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latência do publicador falso (s).")
+    parser.add_argument("--due-in", type=float, default=3.0, help="Segundos até o horário dos posts.")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark da busca de posts (índice de texto/tags) x LIKE '%termo%' sobre posts.
+
+Importa --posts posts de um usuário (legendas com palavras e hashtags sorteadas) e compara:
+- LIKE '%termo%' na legenda (o que a busca faria sem índice: varre todos os posts do usuário);
+- GET /posts/search?q=termo (FTS5 no SQLite, tsvector + GIN no PostgreSQL);
+- GET /posts/search?tag=... (post_tags, mais recentes primeiro);
+- GET /posts/hashtags?prefix=... (autocomplete em post_tag_counts).
+Mede também o custo de manter o índice na importação.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_search --posts 50000 --requests 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+_db_dir = tempfile.mkdtemp(prefix="bench_search_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/bench.db")
+os.environ.setdefault("SUPABASE_URL", "http://supabase.local")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("JWKS_BACKGROUND_REFRESH", "false")
+os.environ.setdefault("CACHE_BACKEND", "none")
+
+import httpx
+from jose import jwt
+from sqlalchemy import insert
+from sqlmodel import select
+
+from app.core.config import get_settings
+from app.core.database import async_session_maker, create_db_and_tables, get_engine
+from app.main import app
+from app.models.post import Post
+from app.models.user import User
+from app.services import post_transfer_service
+
+WORDS = [f"palavra{i}" for i in range(2000)]
+TAGS = [f"#tema{i}" for i in range(300)]
+# Termo comum (a busca ordena todos os resultados por relevância; o LIKE para nos 20 primeiros)
+# e termo raro (o LIKE varre todos os posts do usuário)
+TERMS = ("palavra5", "palavra1500")
+
+
+def seed_file(n: int, start: int = 0) -> bytes:
+    rng = random.Random(start)
+    first = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    lines = []
+    for i in range(start, start + n):
+        # Distribuição desigual (como num perfil real): poucas palavras/tags muito usadas
+        words = [WORDS[min(int(rng.expovariate(1 / 150)), len(WORDS) - 1)] for _ in range(25)]
+        tags = [TAGS[min(int(rng.expovariate(1 / 30)), len(TAGS) - 1)] for _ in range(3)]
+        lines.append(json.dumps({
+            "content": " ".join(words + tags),
+            "platform": "instagram",
+            "scheduled_at": (first + timedelta(hours=i)).isoformat(),
+        }))
+    return "\n".join(lines).encode()
+
+
+async def measure(client: httpx.AsyncClient, url: str, params: dict, headers: dict, n: int) -> float:
+    timings = []
+    for _ in range(n):
+        started = time.perf_counter()
+        response = await client.get(url, params=params, headers=headers)
+        timings.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+    return statistics.median(timings)
+
+
+async def measure_like(user_id: uuid.UUID, term: str, n: int) -> float:
+    timings = []
+    statement = (
+        select(Post)
+        .where(Post.user_id == user_id, Post.content.ilike(f"%{term}%"))
+        .order_by(Post.scheduled_at.desc())
+        .limit(20)
+    )
+    for _ in range(n):
+        started = time.perf_counter()
+        async with async_session_maker() as db:
+            (await db.exec(statement)).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+async def import_file(client: httpx.AsyncClient, prefix: str, body: bytes, headers: dict) -> float:
+    started = time.perf_counter()
+    response = await client.post(
+        f"{prefix}/posts/import", content=body, headers={**headers, "Content-Type": "application/x-ndjson"}
+    )
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def bench(args: argparse.Namespace) -> None:
+    await create_db_and_tables()
+    app.state.supabase = None
+    prefix = get_settings().API_V1_STR
+    user_id = uuid.uuid4()
+    with get_engine().begin() as conn:
+        conn.execute(insert(User.__table__).values(id=user_id, email="bench@example.com", name="Bench"))
+    token = jwt.encode(
+        {"sub": str(user_id), "aud": "authenticated", "exp": datetime.now(timezone.utc) + timedelta(hours=1)},
+        os.environ["JWT_SECRET_KEY"],
+        algorithm="HS256",
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        indexed = await import_file(client, prefix, seed_file(args.posts), headers)
+
+        update_search_index = post_transfer_service.update_search_index
+
+        async def skip_index(*args, **kwargs):
+            return None
+
+        post_transfer_service.update_search_index = skip_index
+        try:
+            # Posts de outro período, fora do índice: só mede o custo da importação
+            plain = await import_file(client, prefix, seed_file(args.compare, start=args.posts), headers)
+        finally:
+            post_transfer_service.update_search_index = update_search_index
+
+        text_ms = {}
+        for term in TERMS:
+            text_ms[term] = (
+                await measure_like(user_id, term, args.requests),
+                await measure(client, f"{prefix}/posts/search", {"q": term}, headers, args.requests),
+            )
+        tag_ms = await measure(client, f"{prefix}/posts/search", {"tag": "tema3"}, headers, args.requests)
+        suggest_ms = await measure(client, f"{prefix}/posts/hashtags", {"prefix": "tema1"}, headers, args.requests)
+
+    print(f"{args.posts} posts importados em {indexed:.1f}s com índice "
+          f"({indexed / args.posts * 1000:.2f} ms/post); sem índice: {plain / args.compare * 1000:.2f} ms/post")
+    print()
+    print(f"{'consulta (20 resultados)':<40} {'mediana (ms)':>13}")
+    for term, (like_ms, search_ms) in text_ms.items():
+        print(f"{f'LIKE %{term}% (sem índice)':<40} {like_ms:>13.1f}")
+        print(f"{f'/posts/search?q={term}':<40} {search_ms:>13.1f}")
+    print(f"{'/posts/search?tag=tema3':<40} {tag_ms:>13.1f}")
+    print(f"{'/posts/hashtags?prefix=tema1':<40} {suggest_ms:>13.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=50000)
+    parser.add_argument("--compare", type=int, default=5000, help="Posts importados sem índice (custo de escrita).")
+    parser.add_argument("--requests", type=int, default=50)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Microbenchmark de throughput de GET /api/v1/users/me com e sem o cache de claims.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_users_me --requests 2000
+
+Não depende de rede: o banco é SQLite em memória e o JWKS é servido localmente.
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SUPABASE_URL", "http://supabase.local")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("JWKS_BACKGROUND_REFRESH", "false")
+
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import get_async_session
+from app.core.jwt_verifier import ClaimsCache, get_token_verifier
+from app.main import app
+from app.models.user import User
+
+
+def build_rsa_jwks(kid: str) -> tuple[str, dict]:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode()
+    public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+    public_jwk.update({"kid": kid, "alg": "RS256", "use": "sig"})
+    return pem, {"keys": [public_jwk]}
+
+
+async def setup_database(user_id: uuid.UUID) -> None:
+    engine = create_async_engine(
+        "sqlite+aiosqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all, tables=[User.__table__])
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as session:
+        session.add(User(id=user_id, email="bench@example.com", name="Bench"))
+        await session.commit()
+
+    async def override_session():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = override_session
+
+
+async def run(token: str, n_requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    url = f"{get_settings().API_V1_STR}/users/me"
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Aquecimento (popula JWKS e cache de claims)
+        response = await client.get(url, headers=headers)
+        response.raise_for_status()
+
+        remaining = n_requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                await client.get(url, headers=headers)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return n_requests / elapsed
+
+
+async def bench(args: argparse.Namespace) -> None:
+    settings = get_settings()
+    user_id = uuid.uuid4()
+    await setup_database(user_id)
+
+    verifier = get_token_verifier()
+    pem, jwks = build_rsa_jwks("bench-kid")
+
+    async def local_jwks():
+        return jwks
+
+    verifier.jwks_cache.fetcher = local_jwks
+
+    claims = {
+        "sub": str(user_id),
+        "aud": "authenticated",
+        "exp": datetime.now(timezone.utc) + timedelta(hours=1),
+    }
+    tokens = {
+        "HS256": jwt.encode(claims, settings.JWT_SECRET_KEY, algorithm="HS256"),
+        "RS256": jwt.encode(claims, pem, algorithm="RS256", headers={"kid": "bench-kid"}),
+    }
+
+    cache_size = settings.TOKEN_CACHE_MAX_SIZE
+    print(f"{'alg':<6} {'claims cache':<13} {'req/s':>10}")
+    for alg, token in tokens.items():
+        results = {}
+        for enabled in (False, True):
+            verifier.claims_cache = ClaimsCache(cache_size if enabled else 0)
+            results[enabled] = await run(token, args.requests, args.concurrency)
+            print(f"{alg:<6} {'on' if enabled else 'off':<13} {results[enabled]:>10.1f}")
+        print(f"{alg:<6} {'speedup':<13} {results[True] / results[False]:>9.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Relay TCP local de eventos (EVENTS_BROKER=relay): faz o papel do pub/sub do Redis para
+vários workers do uvicorn numa mesma máquina, sem servidor externo.
+
+Protocolo: uma linha JSON por mensagem. A primeira linha de cada conexão é
+{"subscribe": true|false}; cada linha seguinte é repassada a todas as conexões inscritas
+(inclusive a que publicou). Um inscrito que não consome (buffer acima de --max-buffer)
+é desconectado e se reconecta sozinho.
+
+    python -m benchmarks.event_relay_standin --port 9003
+    EVENTS_BROKER=relay uvicorn app.main:app --workers 4
+"""
+import argparse
+import asyncio
+import json
+from typing import Optional
+
+MAX_LINE_BYTES = 1024 * 1024
+
+
+class EventRelay:
+    def __init__(self, max_buffer: int = 1024 * 1024):
+        self.max_buffer = max_buffer
+        self.subscribers: set[asyncio.StreamWriter] = set()
+        self.relayed = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            hello = json.loads(await reader.readline() or b"{}")
+            if hello.get("subscribe"):
+                self.subscribers.add(writer)
+            while line := await reader.readline():
+                self.broadcast(line)
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.subscribers.discard(writer)
+            writer.close()
+
+    def broadcast(self, line: bytes) -> None:
+        self.relayed += 1
+        for subscriber in list(self.subscribers):
+            if subscriber.transport.get_write_buffer_size() > self.max_buffer:
+                self.subscribers.discard(subscriber)
+                subscriber.close()
+                continue
+            subscriber.write(line)
+
+
+async def start_relay(host: str = "127.0.0.1", port: int = 9003, relay: Optional[EventRelay] = None) -> asyncio.Server:
+    relay = relay or EventRelay()
+    return await asyncio.start_server(relay.handle, host, port, limit=MAX_LINE_BYTES)
+
+
+async def serve(args: argparse.Namespace) -> None:
+    server = await start_relay(args.host, args.port, EventRelay(args.max_buffer))
+    print(f"Relay de eventos em {args.host}:{args.port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9003)
+    parser.add_argument("--max-buffer", type=int, default=1024 * 1024)
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
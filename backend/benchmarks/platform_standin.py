@@ -0,0 +1,71 @@
+"""
+Servidor local que imita a API de publicação de uma rede social (protocolo do HttpPublisher).
+
+Aplica o próprio limite de taxa por conta e responde 429 (com Retry-After) quando ele é
+excedido, para testar o dispatcher sem depender das redes reais. Pode ser usado em
+processo (httpx.ASGITransport) ou como servidor:
+
+    uvicorn benchmarks.platform_standin:app --port 9001
+"""
+import asyncio
+import time
+import uuid
+from collections import Counter
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.core.rate_limit import TokenBucket
+
+
+def create_platform_app(rate_per_second: float = 5.0, burst: int = 5, latency: float = 0.02) -> FastAPI:
+    """
+    rate_per_second/burst: limite de chamadas por conta aplicado pela "rede".
+    latency: tempo de resposta simulado por chamada.
+    """
+    app = FastAPI()
+    buckets: dict[str, TokenBucket] = {}
+    app.state.stats = Counter()
+    # idempotency_key -> id criado (reenvios do mesmo post devolvem o mesmo id)
+    app.state.published: dict[str, str] = {}
+
+    def allow(account: str) -> bool:
+        bucket = buckets.setdefault(account, TokenBucket(rate_per_second, burst, clock=time.monotonic))
+        return bucket.try_acquire()
+
+    def create(item: dict) -> dict:
+        key = item["idempotency_key"]
+        if key in app.state.published:
+            app.state.stats["duplicates"] += 1
+        else:
+            app.state.published[key] = f"standin-{uuid.uuid4()}"
+        return {"id": app.state.published[key]}
+
+    def rate_limited() -> JSONResponse:
+        app.state.stats["rate_limited"] += 1
+        return JSONResponse({"error": "rate limited"}, status_code=429, headers={"Retry-After": "1"})
+
+    @app.post("/posts")
+    async def publish(request: Request):
+        item = await request.json()
+        if not allow(item.get("account_id") or "default"):
+            return rate_limited()
+        app.state.stats["calls"] += 1
+        await asyncio.sleep(latency)
+        return create(item)
+
+    @app.post("/posts/batch")
+    async def publish_batch(request: Request):
+        items = (await request.json())["items"]
+        # Um lote consome uma chamada da conta (todos os itens são da mesma conta)
+        if not allow(items[0].get("account_id") or "default"):
+            return rate_limited()
+        app.state.stats["calls"] += 1
+        app.state.stats["batched_items"] += len(items)
+        await asyncio.sleep(latency)
+        return {"results": [create(item) for item in items]}
+
+    return app
+
+
+app = create_platform_app()
@@ -0,0 +1,94 @@
+"""
+Servidor local que imita o Supabase Auth (/auth/v1/signup, /auth/v1/token e o JWKS).
+
+Guarda os usuários em memória e emite tokens HS256 assinados com JWT_SECRET_KEY e
+aud "authenticated", que a API valida localmente como os do Supabase. Usado pelo
+teste de carga para não depender do projeto real (nem dos limites de taxa dele):
+
+    JWT_SECRET_KEY=... uvicorn benchmarks.supabase_standin:app --port 9002
+
+SUPABASE_STANDIN_LATENCY_MS simula a latência de rede até o Supabase (padrão 0).
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import Counter
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from jose import jwt
+
+TOKEN_TTL_SECONDS = 3600
+
+
+def create_supabase_app(jwt_secret: str, latency: float = 0.0) -> FastAPI:
+    """
+    jwt_secret: chave dos tokens emitidos (a mesma JWT_SECRET_KEY da API).
+    latency: tempo de resposta simulado por chamada, em segundos.
+    """
+    app = FastAPI()
+    app.state.stats = Counter()
+    # email -> (senha, id)
+    users: dict[str, tuple[str, str]] = {}
+
+    def user_payload(email: str, user_id: str) -> dict:
+        return {"id": user_id, "aud": "authenticated", "role": "authenticated", "email": email}
+
+    def issue_token(email: str, user_id: str) -> dict:
+        now = int(time.time())
+        claims = {
+            "sub": user_id,
+            "email": email,
+            "aud": "authenticated",
+            "role": "authenticated",
+            "iat": now,
+            "exp": now + TOKEN_TTL_SECONDS,
+        }
+        return {
+            "access_token": jwt.encode(claims, jwt_secret, algorithm="HS256"),
+            "token_type": "bearer",
+            "expires_in": TOKEN_TTL_SECONDS,
+            "refresh_token": uuid.uuid4().hex,
+            "user": user_payload(email, user_id),
+        }
+
+    @app.post("/auth/v1/signup")
+    async def signup(request: Request):
+        data = await request.json()
+        app.state.stats["signup"] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        email = data["email"].lower()
+        if email in users:
+            return JSONResponse({"code": 422, "msg": "User already registered"}, status_code=400)
+        user_id = str(uuid.uuid4())
+        users[email] = (data["password"], user_id)
+        return {"user": user_payload(email, user_id), "session": None}
+
+    @app.post("/auth/v1/token")
+    async def token(request: Request):
+        data = await request.json()
+        app.state.stats["token"] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        email = data["email"].lower()
+        stored = users.get(email)
+        if stored is None or stored[0] != data["password"]:
+            return JSONResponse(
+                {"error": "invalid_grant", "error_description": "Invalid login credentials"}, status_code=400
+            )
+        return issue_token(email, stored[1])
+
+    @app.get("/auth/v1/.well-known/jwks.json")
+    async def jwks():
+        # Só tokens HS256: não há chaves públicas a publicar
+        return {"keys": []}
+
+    return app
+
+
+app = create_supabase_app(
+    os.environ.get("JWT_SECRET_KEY", "loadtest-secret"),
+    latency=float(os.environ.get("SUPABASE_STANDIN_LATENCY_MS", "0")) / 1000,
+)
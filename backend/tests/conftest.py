@@ -0,0 +1,82 @@
+"""
+Configuração dos testes (a partir de backend/: python -m pytest).
+
+As variáveis de ambiente são definidas antes de importar o app: as configurações são lidas
+uma única vez. Cada execução usa um SQLite e um diretório de mídia temporários, com o
+orçamento de consultas em modo "raise" (estourar o @query_budget de uma rota falha o teste).
+"""
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+import pytest
+
+_tmp_dir = tempfile.mkdtemp(prefix="smcm_tests_")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_tmp_dir}/test.db",
+    "SUPABASE_URL": "http://supabase.test",
+    "SUPABASE_KEY": "test",
+    "JWT_SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "AUTH_BACKEND": "supabase",
+    "DB_CREATE_TABLES": "true",
+    "JWKS_BACKGROUND_REFRESH": "false",
+    "MEDIA_STORAGE_DIR": f"{_tmp_dir}/media",
+    "MEDIA_WORKER_ENABLED": "false",
+    "SCHEDULER_ENABLED": "false",
+    "QUERY_BUDGET_MODE": "raise",
+})
+
+from fastapi.testclient import TestClient  # noqa: E402
+from jose import jwt  # noqa: E402
+
+from app.core.container import aclose_resources  # noqa: E402
+from app.core.database import create_db_and_tables  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def make_auth_headers() -> dict:
+    """
+    Cabeçalho Authorization de um usuário novo (token HS256 assinado com JWT_SECRET_KEY).
+    """
+    token = jwt.encode(
+        {"sub": str(uuid.uuid4()), "exp": int(time.time()) + 600}, os.environ["JWT_SECRET_KEY"], algorithm="HS256"
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def auth_headers() -> dict:
+    return make_auth_headers()
+
+
+@pytest.fixture
+def other_auth_headers() -> dict:
+    """
+    Cabeçalho de um segundo usuário.
+    """
+    return make_auth_headers()
+
+
+@pytest.fixture
+def run():
+    """
+    Roda uma corrotina num event loop novo, com as tabelas criadas, e fecha no fim os
+    recursos criados por ela (motores e pools ficam presos ao event loop).
+    """
+    async def main(coro):
+        try:
+            await create_db_and_tables()
+            return await coro
+        finally:
+            await aclose_resources()
+
+    return lambda coro: asyncio.run(main(coro))
@@ -0,0 +1,66 @@
+"""
+Cache de respostas: versão por usuário trocada nas escritas e revalidação por ETag (304).
+"""
+import pytest
+
+from app.api.v1 import post as post_routes
+
+POST = {"content": "legenda", "platform": "instagram", "scheduled_at": "2030-01-01T12:00:00Z"}
+
+
+@pytest.fixture
+def list_calls(monkeypatch):
+    """
+    Conta as leituras de posts no banco feitas pela rota de listagem (cache miss).
+    """
+    calls = []
+    list_posts = post_routes.list_posts
+
+    async def counting_list_posts(*args, **kwargs):
+        calls.append(args[0])
+        return await list_posts(*args, **kwargs)
+
+    monkeypatch.setattr(post_routes, "list_posts", counting_list_posts)
+    return calls
+
+
+def test_write_through_service_invalidates_cached_list(client, auth_headers, list_calls):
+    post_id = client.post("/api/v1/posts", json=POST, headers=auth_headers).json()["id"]
+
+    first = client.get("/api/v1/posts", headers=auth_headers)
+    cached = client.get("/api/v1/posts", headers=auth_headers)
+    assert len(list_calls) == 1
+    assert cached.content == first.content
+
+    response = client.patch(f"/api/v1/posts/{post_id}", json={"content": "editado"}, headers=auth_headers)
+    assert response.status_code == 200
+    after_write = client.get("/api/v1/posts", headers=auth_headers)
+    assert len(list_calls) == 2
+    assert after_write.json()["items"][0]["content"] == "editado"
+
+
+def test_write_by_other_user_keeps_cache(client, auth_headers, other_auth_headers, list_calls):
+    client.get("/api/v1/posts", headers=auth_headers)
+    assert client.post("/api/v1/posts", json=POST, headers=other_auth_headers).status_code == 201
+    client.get("/api/v1/posts", headers=auth_headers)
+    assert len(list_calls) == 1
+
+
+def test_if_none_match_returns_304_without_body(client, auth_headers):
+    client.post("/api/v1/posts", json=POST, headers=auth_headers)
+    response = client.get("/api/v1/posts", headers=auth_headers)
+    etag = response.headers["etag"]
+
+    not_modified = client.get("/api/v1/posts", headers={**auth_headers, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+
+    weak = client.get("/api/v1/posts", headers={**auth_headers, "If-None-Match": f"W/{etag}"})
+    assert weak.status_code == 304
+
+    client.post("/api/v1/posts", json=POST, headers=auth_headers)
+    changed = client.get("/api/v1/posts", headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert len(changed.json()["items"]) == 2
@@ -0,0 +1,120 @@
+"""
+Eventos em tempo real: eventos do mesmo recurso agrupados, 'resync' quando a fila da conexão
+estoura e a vaga da conexão SSE liberada mesmo se o cliente cai antes do primeiro evento.
+"""
+import asyncio
+import uuid
+
+import pytest
+from jose import jwt
+
+from app.core.events import RESYNC_EVENT, Subscription, get_event_hub
+from app.main import app
+
+
+def test_push_keeps_latest_state_per_resource(run):
+    async def scenario():
+        subscription = Subscription("usuario", max_pending=10)
+        subscription.push("post", {"id": "1", "status": "draft"})
+        subscription.push("media", {"id": "1", "derivatives_status": "pending"})
+        subscription.push("post", {"id": "2", "status": "draft"})
+        subscription.push("post", {"id": "1", "status": "scheduled"})
+        batch = await subscription.next_batch(heartbeat=1, coalesce=0)
+        return batch, await subscription.next_batch(heartbeat=0.01, coalesce=0)
+
+    batch, empty = run(scenario())
+    # O post 1 fica só com o estado mais recente, na posição do último evento
+    assert batch == [
+        {"event": "media", "data": {"id": "1", "derivatives_status": "pending"}},
+        {"event": "post", "data": {"id": "2", "status": "draft"}},
+        {"event": "post", "data": {"id": "1", "status": "scheduled"}},
+    ]
+    assert empty is None
+
+
+def test_overflow_sends_resync_then_resumes(run):
+    async def scenario():
+        subscription = Subscription("usuario", max_pending=2)
+        for post_id in ("1", "2"):
+            subscription.push("post", {"id": post_id})
+        # Mesmo recurso não ocupa vaga nova
+        subscription.push("post", {"id": "1", "status": "scheduled"})
+        full = list(subscription._pending.values())
+        subscription.push("post", {"id": "3"})
+        # Depois do estouro, nada é guardado até o cliente receber o 'resync'
+        subscription.push("post", {"id": "4"})
+        resync = await subscription.next_batch(heartbeat=1, coalesce=0)
+        subscription.push("post", {"id": "5"})
+        return full, resync, await subscription.next_batch(heartbeat=1, coalesce=0)
+
+    full, resync, resumed = run(scenario())
+    assert len(full) == 2
+    assert resync == [{"event": RESYNC_EVENT, "data": {}}]
+    assert resumed == [{"event": "post", "data": {"id": "5"}}]
+
+
+async def disconnect_before_first_event(headers: dict, spec_version: str) -> list[dict]:
+    """
+    GET /api/v1/events de um cliente que cai enquanto os cabeçalhos são enviados:
+    - ASGI 2.4: o servidor levanta OSError no send;
+    - ASGI anterior: o send não termina e o receive avisa a desconexão.
+    Retorna as mensagens enviadas pelo app.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": spec_version},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/v1/events",
+        "raw_path": b"/api/v1/events",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "client": ("127.0.0.1", 50000),
+        "server": ("test", 80),
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if spec_version >= "2.4":
+            raise OSError("conexão fechada pelo cliente")
+        await asyncio.Event().wait()
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        pass
+    return sent
+
+
+@pytest.mark.parametrize("spec_version", ["2.4", "2.0"])
+def test_disconnect_before_first_event_frees_connection_slot(run, auth_headers, spec_version):
+    async def scenario():
+        hub = get_event_hub()
+        attempts = []
+        for _ in range(hub.max_connections_per_user + 2):
+            sent = await asyncio.wait_for(disconnect_before_first_event(auth_headers, spec_version), timeout=5)
+            attempts.append(sent[0]["status"])
+        return attempts, hub._subscriptions
+
+    attempts, subscriptions = run(scenario())
+    # Sem a vaga liberada, as últimas tentativas receberiam 429
+    assert set(attempts) == {200}
+    assert subscriptions == {}
+
+
+def test_connection_limit_still_returns_429(run, auth_headers):
+    async def scenario():
+        hub = get_event_hub()
+        user_id = jwt.get_unverified_claims(auth_headers["Authorization"].removeprefix("Bearer "))["sub"]
+        for _ in range(hub.max_connections_per_user):
+            hub.subscribe(uuid.UUID(user_id))
+        return await disconnect_before_first_event(auth_headers, "2.4")
+
+    sent = run(scenario())
+    assert sent[0]["status"] == 429
@@ -0,0 +1,192 @@
+"""
+Idempotency-Key: repetição da resposta gravada, corpo diferente, coalescência no mesmo
+processo, respostas temporárias não gravadas e reservas expiradas.
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI, Response
+from jose import jwt
+
+from app.core.config import get_settings
+from app.core.database import async_session_maker
+from app.core.idempotency import IdempotencyMiddleware, _sha256
+from app.models.idempotency import IdempotencyKey, IdempotencyStatus
+from app.models.post import utc_now
+
+settings = get_settings()
+
+
+class Endpoint:
+    """
+    Rota de teste: conta as execuções e responde com o status pedido no corpo.
+    Com `gate`, cada execução espera o evento antes de responder.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.gate: asyncio.Event | None = None
+
+    def app(self) -> IdempotencyMiddleware:
+        api = FastAPI()
+
+        @api.post("/items")
+        async def create_item(data: dict, response: Response):
+            self.calls += 1
+            if self.gate is not None:
+                await self.gate.wait()
+            response.status_code = data.get("status", 201)
+            return {"call": self.calls, "name": data.get("name")}
+
+        return IdempotencyMiddleware(api, anonymous_routes=[("POST", "/items")])
+
+
+@pytest.fixture
+def endpoint():
+    return Endpoint()
+
+
+def body(**data) -> bytes:
+    return json.dumps(data).encode()
+
+
+def post(client: httpx.AsyncClient, key: str, **data):
+    headers = {"Idempotency-Key": key, "Content-Type": "application/json"}
+    return client.post("/items", content=body(**data), headers=headers)
+
+
+def client_for(endpoint: Endpoint) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=endpoint.app()), base_url="http://test")
+
+
+def test_repeat_returns_stored_response(endpoint, run):
+    async def scenario():
+        key = str(uuid.uuid4())
+        async with client_for(endpoint) as client:
+            return await post(client, key, name="a"), await post(client, key, name="a")
+
+    first, second = run(scenario())
+    assert first.status_code == second.status_code == 201
+    assert second.json() == first.json() == {"call": 1, "name": "a"}
+    assert "idempotent-replayed" not in first.headers
+    assert second.headers["idempotent-replayed"] == "true"
+    assert endpoint.calls == 1
+
+
+def test_same_key_with_other_body_is_rejected(endpoint, run):
+    async def scenario():
+        key = str(uuid.uuid4())
+        async with client_for(endpoint) as client:
+            await post(client, key, name="a")
+            return await post(client, key, name="b")
+
+    response = run(scenario())
+    assert response.status_code == 422
+    assert response.json()["detail"]["code"] == "IDEMPOTENCY_KEY_REUSED"
+    assert endpoint.calls == 1
+
+
+def test_concurrent_repeats_execute_once(endpoint, run):
+    async def scenario():
+        key = str(uuid.uuid4())
+        endpoint.gate = asyncio.Event()
+        async with client_for(endpoint) as client:
+            requests = [asyncio.create_task(post(client, key, name="a")) for _ in range(5)]
+            while endpoint.calls == 0:
+                await asyncio.sleep(0.01)
+            # As repetições chegam enquanto a primeira ainda executa
+            await asyncio.sleep(0.05)
+            endpoint.gate.set()
+            return await asyncio.gather(*requests)
+
+    responses = run(scenario())
+    assert endpoint.calls == 1
+    assert [r.status_code for r in responses] == [201] * 5
+    assert {r.json()["call"] for r in responses} == {1}
+    assert sum(r.headers.get("idempotent-replayed") == "true" for r in responses) == 4
+
+
+@pytest.mark.parametrize("status_code", [500, 503, 401, 429])
+def test_retryable_responses_are_not_stored(endpoint, run, status_code):
+    async def scenario():
+        key = str(uuid.uuid4())
+        async with client_for(endpoint) as client:
+            return await post(client, key, status=status_code), await post(client, key, status=status_code)
+
+    first, second = run(scenario())
+    assert first.status_code == second.status_code == status_code
+    assert "idempotent-replayed" not in second.headers
+    assert endpoint.calls == 2
+
+
+async def insert_processing_key(key: str, locked_until, **data) -> None:
+    """
+    Chave reservada por outra réplica para a mesma requisição (POST /items com `data`).
+    """
+    now = utc_now()
+    async with async_session_maker() as db:
+        db.add(IdempotencyKey(
+            key=_sha256(b"anonymous", key.encode()),
+            request_hash=_sha256(b"POST", b"/items", b"", body(**data)),
+            status=IdempotencyStatus.PROCESSING.value,
+            locked_until=locked_until,
+            created_at=now,
+            expires_at=now + timedelta(hours=1),
+        ))
+        await db.commit()
+
+
+def test_expired_lock_is_reclaimed(endpoint, run):
+    async def scenario():
+        key = str(uuid.uuid4())
+        # Processo que morreu no meio: a reserva venceu sem resposta gravada
+        await insert_processing_key(key, utc_now() - timedelta(seconds=1), name="a")
+        async with client_for(endpoint) as client:
+            return await post(client, key, name="a"), await post(client, key, name="a")
+
+    first, second = run(scenario())
+    assert first.status_code == 201
+    assert "idempotent-replayed" not in first.headers
+    assert second.headers["idempotent-replayed"] == "true"
+    assert endpoint.calls == 1
+
+
+def test_live_lock_in_other_replica_returns_conflict(endpoint, run, monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.2)
+
+    async def scenario():
+        key = str(uuid.uuid4())
+        await insert_processing_key(key, utc_now() + timedelta(minutes=1), name="a")
+        async with client_for(endpoint) as client:
+            return await post(client, key, name="a")
+
+    response = run(scenario())
+    assert response.status_code == 409
+    assert response.headers["retry-after"] == "1"
+    assert endpoint.calls == 0
+
+
+def test_keys_are_scoped_by_token_subject(client):
+    def headers(sub: str, exp_offset: int) -> dict:
+        token = jwt.encode({"sub": sub, "exp": int(time.time()) + exp_offset}, os.environ["JWT_SECRET_KEY"])
+        return {"Authorization": f"Bearer {token}", "Idempotency-Key": "mesma-chave"}
+
+    data = {"content": "legenda", "platform": "instagram", "scheduled_at": "2030-01-01T12:00:00Z"}
+    user_a = str(uuid.uuid4())
+    first = client.post("/api/v1/posts", json=data, headers=headers(user_a, 600))
+    # Token renovado do mesmo usuário: mesma operação
+    renewed = client.post("/api/v1/posts", json=data, headers=headers(user_a, 900))
+    # Outro usuário com a mesma chave: operação própria
+    other = client.post("/api/v1/posts", json=data, headers=headers(str(uuid.uuid4()), 600))
+
+    assert first.status_code == renewed.status_code == other.status_code == 201
+    assert renewed.headers["idempotent-replayed"] == "true"
+    assert renewed.json()["id"] == first.json()["id"]
+    assert "idempotent-replayed" not in other.headers
+    assert other.json()["id"] != first.json()["id"]
@@ -0,0 +1,53 @@
+"""
+Login com AUTH_BACKEND="internal": senha em user_credentials e rehash quando o custo muda.
+"""
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from app.core.config import get_settings
+from app.core.database import async_session_maker
+from app.main import app
+from app.models.user import User, UserCredential
+
+settings = get_settings()
+
+
+@pytest.fixture
+def internal_auth(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_BACKEND", "internal")
+    monkeypatch.setattr(settings, "PASSWORD_BCRYPT_ROUNDS", 4)
+
+
+async def stored_hash(email: str) -> str:
+    async with async_session_maker() as db:
+        statement = select(UserCredential.password_hash).join(User).where(User.email == email)
+        return (await db.exec(statement)).one()
+
+
+def test_register_and_login(internal_auth, client):
+    email = f"{uuid.uuid4().hex}@example.com"
+    response = client.post("/api/v1/auth/register", json={"email": email, "name": "Ana", "password": "segredo123"})
+    assert response.status_code == 201
+
+    response = client.post("/api/v1/auth/login", json={"email": email, "password": "segredo123"})
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    assert client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {token}"}).json()["email"] == email
+
+    response = client.post("/api/v1/auth/login", json={"email": email, "password": "errada"})
+    assert response.status_code == 401
+
+
+def test_login_rehashes_with_new_cost(internal_auth, monkeypatch, run):
+    email = f"{uuid.uuid4().hex}@example.com"
+    with TestClient(app) as client:
+        client.post("/api/v1/auth/register", json={"email": email, "name": "Ana", "password": "segredo123"})
+    assert run(stored_hash(email)).startswith("$2b$04$")
+
+    monkeypatch.setattr(settings, "PASSWORD_BCRYPT_ROUNDS", 5)
+    with TestClient(app) as client:
+        assert client.post("/api/v1/auth/login", json={"email": email, "password": "segredo123"}).status_code == 200
+    assert run(stored_hash(email)).startswith("$2b$05$")
@@ -0,0 +1,156 @@
+"""
+Blobs de mídia por SHA-256: deduplicação, contagem de referências e coletor de lixo
+(inclusive a corrida com um upload concorrente do mesmo conteúdo).
+"""
+import hashlib
+import os
+import uuid
+
+import pytest
+
+from app.core.config import get_settings
+from app.core.database import async_session_maker
+from app.core.storage import LocalStorageBackend
+from app.models.media import MediaBlob
+from app.models.post import Post, utc_now
+from app.services import media_service
+from app.services.media_service import (
+    attach_media_to_post,
+    blob_key,
+    collect_unreferenced_blobs,
+    create_media_from_hash,
+    delete_media,
+    detach_media_from_post,
+    upload_media_stream,
+)
+
+settings = get_settings()
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorageBackend(str(tmp_path))
+
+
+def unique_content() -> bytes:
+    return f"imagem {uuid.uuid4()} ".encode() * 200
+
+
+async def stream(content: bytes):
+    for start in range(0, len(content), 1000):
+        yield content[start:start + 1000]
+
+
+async def upload(user_id, content: bytes, storage):
+    async with async_session_maker() as db:
+        return await upload_media_stream(user_id, "foto.jpg", "image/jpeg", stream(content), db, storage)
+
+
+async def get_blob(sha256: str):
+    async with async_session_maker() as db:
+        return await db.get(MediaBlob, sha256)
+
+
+def test_identical_uploads_share_one_blob(run, storage):
+    content = unique_content()
+
+    async def scenario():
+        first = await upload(uuid.uuid4(), content, storage)
+        second = await upload(uuid.uuid4(), content, storage)
+        return first, second, await get_blob(first.sha256)
+
+    first, second, blob = run(scenario())
+    assert first.sha256 == second.sha256 == hashlib.sha256(content).hexdigest()
+    assert first.storage_key == second.storage_key == blob_key(first.sha256)
+    assert blob.ref_count == 2
+    assert (storage.root / blob.storage_key).read_bytes() == content
+    # Os bytes do segundo upload foram descartados, sem arquivo temporário sobrando
+    assert not os.listdir(storage.root / "uploads")
+
+
+def test_references_follow_media_and_attachments(run, storage, monkeypatch):
+    content = unique_content()
+    user_id = uuid.uuid4()
+
+    async def scenario():
+        media = await upload(user_id, content, storage)
+        counts = [(await get_blob(media.sha256)).ref_count]
+        async with async_session_maker() as db:
+            post = Post(user_id=user_id, content="legenda", platform="instagram", scheduled_at=utc_now())
+            db.add(post)
+            await db.commit()
+            await attach_media_to_post(post.id, media, db)
+            # Anexar de novo não conta outra referência
+            await attach_media_to_post(post.id, media, db)
+            counts.append((await get_blob(media.sha256)).ref_count)
+            copy = await create_media_from_hash(user_id, media.sha256, "copia.jpg", "image/jpeg", db)
+            counts.append((await get_blob(media.sha256)).ref_count)
+            await detach_media_from_post(post.id, media, db)
+            counts.append((await get_blob(media.sha256)).ref_count)
+            await attach_media_to_post(post.id, media, db)
+            # Excluir a mídia libera também o anexo
+            await delete_media(user_id, media.id, db)
+            counts.append((await get_blob(media.sha256)).ref_count)
+            await delete_media(user_id, copy.id, db)
+            counts.append((await get_blob(media.sha256)).ref_count)
+
+            # Dentro da carência o blob sem referência é mantido
+            await collect_unreferenced_blobs(db, storage)
+            kept = await get_blob(media.sha256)
+            monkeypatch.setattr(settings, "MEDIA_BLOB_GC_GRACE_SECONDS", 0)
+            await collect_unreferenced_blobs(db, storage)
+        return media, counts, kept, await get_blob(media.sha256)
+
+    media, counts, kept, collected = run(scenario())
+    assert counts == [1, 2, 3, 2, 1, 0]
+    assert kept is not None
+    assert collected is None
+    assert not (storage.root / media.storage_key).exists()
+
+
+def test_collector_keeps_blob_reused_by_concurrent_upload(run, storage, monkeypatch):
+    content = unique_content()
+    forget_derivatives = media_service.forget_derivatives
+
+    async def scenario():
+        media = await upload(uuid.uuid4(), content, storage)
+        async with async_session_maker() as db:
+            await delete_media(media.user_id, media.id, db)
+        monkeypatch.setattr(settings, "MEDIA_BLOB_GC_GRACE_SECONDS", 0)
+
+        reused = []
+
+        async def upload_during_collection(sha256, db):
+            # O mesmo conteúdo chega entre a varredura do coletor e o DELETE
+            if sha256 == media.sha256 and not reused:
+                reused.append(await upload(uuid.uuid4(), content, storage))
+            return await forget_derivatives(sha256, db)
+
+        monkeypatch.setattr(media_service, "forget_derivatives", upload_during_collection)
+        async with async_session_maker() as db:
+            await collect_unreferenced_blobs(db, storage)
+        return reused, await get_blob(media.sha256)
+
+    reused, blob = run(scenario())
+    assert len(reused) == 1
+    assert blob.ref_count == 1
+    assert (storage.root / blob.storage_key).read_bytes() == content
+
+
+def test_upload_after_collection_stores_content_again(run, storage, monkeypatch):
+    content = unique_content()
+
+    async def scenario():
+        media = await upload(uuid.uuid4(), content, storage)
+        async with async_session_maker() as db:
+            await delete_media(media.user_id, media.id, db)
+            monkeypatch.setattr(settings, "MEDIA_BLOB_GC_GRACE_SECONDS", 0)
+            await collect_unreferenced_blobs(db, storage)
+        collected = await get_blob(media.sha256)
+        again = await upload(uuid.uuid4(), content, storage)
+        return collected, again, await get_blob(media.sha256)
+
+    collected, again, blob = run(scenario())
+    assert collected is None
+    assert blob.ref_count == 1
+    assert (storage.root / again.storage_key).read_bytes() == content
@@ -0,0 +1,72 @@
+"""
+Uploads retomáveis: finalização que falha depois de os bytes saírem do arquivo temporário.
+"""
+import hashlib
+
+import pytest
+
+from app.core.storage import get_storage
+from app.services import media_service
+from app.services.media_service import blob_key
+
+CONTENT = b"conteudo do video " * 1000
+
+
+def start_upload(client, headers, content: bytes = CONTENT) -> str:
+    response = client.post(
+        "/api/v1/media/uploads",
+        json={"filename": "video.mp4", "content_type": "video/mp4", "total_size": len(content)},
+        headers=headers,
+    )
+    upload_id = response.json()["id"]
+    response = client.put(f"/api/v1/media/uploads/{upload_id}?offset=0", content=content, headers=headers)
+    assert response.json()["offset"] == len(content)
+    return upload_id
+
+
+def test_failed_finalize_can_be_retried(client, auth_headers, monkeypatch):
+    upload_id = start_upload(client, auth_headers)
+
+    async def failing_enqueue(media, db):
+        raise RuntimeError("falha antes do commit da mídia")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(media_service, "enqueue_derivatives", failing_enqueue)
+        with pytest.raises(RuntimeError):
+            client.post(f"/api/v1/media/uploads/{upload_id}/complete", headers=auth_headers)
+
+    # Os bytes já foram para o blob: a sessão não aceita mais blocos
+    session = client.get(f"/api/v1/media/uploads/{upload_id}", headers=auth_headers).json()
+    assert session["status"] == "finalizing"
+    assert session["offset"] == len(CONTENT)
+    response = client.put(
+        f"/api/v1/media/uploads/{upload_id}?offset={len(CONTENT)}", content=b"mais", headers=auth_headers
+    )
+    assert response.status_code == 409
+
+    # Outro processo (sem o hash em memória) retoma a finalização a partir do hash gravado
+    media_service._upload_hashers.clear()
+    response = client.post(f"/api/v1/media/uploads/{upload_id}/complete", headers=auth_headers)
+    assert response.status_code == 201
+    sha256 = hashlib.sha256(CONTENT).hexdigest()
+    assert response.json()["sha256"] == sha256
+    assert client.get(f"/api/v1/media/uploads/{upload_id}", headers=auth_headers).json()["status"] == "completed"
+
+
+def test_finalize_without_bytes_reports_lost_upload(client, auth_headers, monkeypatch):
+    upload_id = start_upload(client, auth_headers, b"conteudo perdido")
+
+    async def failing_enqueue(media, db):
+        raise RuntimeError("falha antes do commit da mídia")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(media_service, "enqueue_derivatives", failing_enqueue)
+        with pytest.raises(RuntimeError):
+            client.post(f"/api/v1/media/uploads/{upload_id}/complete", headers=auth_headers)
+
+    # O blob sem referência foi coletado antes da nova tentativa
+    client.portal.call(get_storage().delete, blob_key(hashlib.sha256(b"conteudo perdido").hexdigest()))
+    response = client.post(f"/api/v1/media/uploads/{upload_id}/complete", headers=auth_headers)
+    assert response.status_code == 409
+    assert response.json()["detail"]["code"] == "UPLOAD_LOST"
+    assert client.get(f"/api/v1/media/uploads/{upload_id}", headers=auth_headers).json()["status"] == "aborted"
@@ -0,0 +1,113 @@
+"""
+Rollups do calendário: depois de cada tipo de escrita (criação, edição que muda dia/status/rede,
+exclusão, importação e publicação), as contagens batem com um GROUP BY sobre posts.
+"""
+import asyncio
+import json
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func
+from sqlmodel import select
+
+from app.core.database import async_session_maker
+from app.models.post import Post, PostDailyCount, PostStatus, utc_now
+from app.schemas.post import PostCreate, PostFileFormat, PostUpdate
+from app.services.post_rollup_service import rollup_key
+from app.services.post_service import create_post, delete_post, update_post
+from app.services.post_transfer_service import import_posts
+from app.services.publishers import FakePublisher, PublisherRegistry
+from app.services.scheduler_service import PublishingEngine
+
+DAY = datetime(2030, 3, 10, 23, 30, tzinfo=timezone.utc)
+
+
+async def counts_from_posts(user_id: uuid.UUID) -> Counter:
+    statement = (
+        select(Post.scheduled_at, Post.status, Post.platform, func.count())
+        .where(Post.user_id == user_id)
+        .group_by(Post.scheduled_at, Post.status, Post.platform)
+    )
+    counts = Counter()
+    async with async_session_maker() as db:
+        for scheduled_at, post_status, platform, count in (await db.exec(statement)).all():
+            counts[rollup_key(scheduled_at, post_status, platform)] += count
+    return counts
+
+
+async def counts_from_rollups(user_id: uuid.UUID) -> Counter:
+    statement = select(PostDailyCount.day, PostDailyCount.status, PostDailyCount.platform, PostDailyCount.count).where(
+        PostDailyCount.user_id == user_id, PostDailyCount.count != 0
+    )
+    async with async_session_maker() as db:
+        return Counter({(day, status, platform): count for day, status, platform, count in (await db.exec(statement)).all()})
+
+
+async def assert_consistent(user_id: uuid.UUID) -> None:
+    expected = await counts_from_posts(user_id)
+    assert expected
+    assert await counts_from_rollups(user_id) == expected
+
+
+async def lines(body: str):
+    yield body.encode()
+
+
+def test_rollups_follow_every_write(run):
+    async def scenario():
+        user_id = uuid.uuid4()
+        async with async_session_maker() as db:
+            draft = await create_post(user_id, PostCreate(content="a", platform="instagram", scheduled_at=DAY), db)
+            scheduled = await create_post(
+                user_id,
+                PostCreate(content="b", platform="tiktok", scheduled_at=DAY + timedelta(days=1), status="scheduled"),
+                db,
+            )
+            await create_post(user_id, PostCreate(content="c", platform="instagram", scheduled_at=DAY), db)
+        await assert_consistent(user_id)
+
+        # Edição que muda o dia (23h30 + 1h cai no dia seguinte), o status e a rede
+        async with async_session_maker() as db:
+            await update_post(user_id, draft.id, PostUpdate(scheduled_at=DAY + timedelta(hours=1)), db)
+        await assert_consistent(user_id)
+        async with async_session_maker() as db:
+            await update_post(user_id, draft.id, PostUpdate(status="scheduled", platform="tiktok"), db)
+        await assert_consistent(user_id)
+        async with async_session_maker() as db:
+            await update_post(user_id, draft.id, PostUpdate(content="só a legenda"), db)
+        await assert_consistent(user_id)
+
+        async with async_session_maker() as db:
+            await delete_post(user_id, scheduled.id, db)
+        await assert_consistent(user_id)
+
+        # Importação com um id repetido: só o post criado conta
+        repeated = str(uuid.uuid4())
+        row = {"content": "d", "platform": "x", "scheduled_at": (DAY + timedelta(days=2)).isoformat()}
+        body = "".join(json.dumps(data) + "\n" for data in ({**row, "id": repeated}, {**row, "id": repeated}, row))
+        async with async_session_maker() as db:
+            result = await import_posts(user_id, lines(body), PostFileFormat.NDJSON, db)
+        assert (result.inserted, result.skipped) == (2, 1)
+        await assert_consistent(user_id)
+
+        # Publicação (scheduled -> published) e falha definitiva (scheduled -> failed)
+        async with async_session_maker() as db:
+            due = await create_post(
+                user_id, PostCreate(content="e", platform="instagram", scheduled_at=utc_now(), status="scheduled"), db
+            )
+            failing = await create_post(
+                user_id, PostCreate(content="f", platform="falha", scheduled_at=utc_now(), status="scheduled"), db
+            )
+        registry = PublisherRegistry({"falha": FakePublisher(fail_platform_error=True)}, default=FakePublisher())
+        engine = PublishingEngine(registry, owner="test-rollups")
+        await engine.fill()
+        engine.fire_due()
+        await asyncio.gather(*engine._tasks)
+        await engine.shutdown()
+        async with async_session_maker() as db:
+            assert (await db.get(Post, due.id)).status == PostStatus.PUBLISHED.value
+            assert (await db.get(Post, failing.id)).status == PostStatus.FAILED.value
+        await assert_consistent(user_id)
+
+    run(scenario())
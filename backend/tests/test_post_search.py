@@ -0,0 +1,113 @@
+"""
+Busca de posts: conversão da sintaxe web para FTS5 (frases, '-' e 'or') e paginação keyset
+da busca só por tags, com post_tags acompanhando o horário quando o post é reagendado.
+"""
+import pytest
+
+from app.services.post_search_service import _fts5_query
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    [
+        ("verao praia", '"verao" "praia"'),
+        ('"por do sol" praia', '"por do sol" "praia"'),
+        ("praia -chuva", '"praia" NOT "chuva"'),
+        ('praia -"dia nublado"', '"praia" NOT "dia nublado"'),
+        ("praia or serra", '"praia" OR "serra"'),
+        ("praia -chuva or serra", '"praia" NOT "chuva" OR "serra"'),
+        # Aspas sem fechar valem até o fim; operadores do FTS5 viram palavras entre aspas
+        ('"por do sol', '"por do sol"'),
+        ('praia* and "a"b near(x)', '"praia" "and" "a" "b" "near x"'),
+        # Sem termo positivo (só exclusões, 'or' solto ou pontuação) não há busca
+        ("-chuva", None),
+        ("or", None),
+        ("praia or -chuva", '"praia"'),
+        ("!!! ???", None),
+    ],
+)
+def test_fts5_query(query, expected):
+    assert _fts5_query(query) == expected
+
+
+def create(client, headers, content: str, scheduled_at: str) -> str:
+    response = client.post(
+        "/api/v1/posts",
+        json={"content": content, "platform": "instagram", "scheduled_at": scheduled_at},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def search(client, headers, **params) -> dict:
+    response = client.get("/api/v1/posts/search", params=params, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def search_all(client, headers, **params) -> list[str]:
+    """
+    Percorre todas as páginas da busca e retorna os ids na ordem recebida.
+    """
+    ids, cursor = [], None
+    while True:
+        page = search(client, headers, **params, **({"cursor": cursor} if cursor else {}))
+        ids += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def test_text_search_phrases_exclusion_and_or(client, auth_headers):
+    sunset = create(client, auth_headers, "Pôr do sol na praia #Verão", "2030-01-01T12:00:00Z")
+    rain = create(client, auth_headers, "Praia com chuva", "2030-01-02T12:00:00Z")
+    mountain = create(client, auth_headers, "Fim de semana na serra", "2030-01-03T12:00:00Z")
+
+    def found(q: str) -> set[str]:
+        return {item["id"] for item in search(client, auth_headers, q=q)["items"]}
+
+    assert found("praia") == {sunset, rain}
+    assert found('"por do sol"') == {sunset}
+    assert found('"sol do por"') == set()
+    assert found("praia -chuva") == {sunset}
+    assert found("chuva or serra") == {rain, mountain}
+    assert found("-praia") == set()
+
+
+def test_tag_search_pages_newest_first(client, auth_headers, other_auth_headers):
+    ids = [
+        create(client, auth_headers, f"post {day} #verao @marca", f"2030-01-{day:02d}T12:00:00Z")
+        for day in range(1, 6)
+    ]
+    # Mesmo horário: o id desempata, sem repetir nem pular posts entre as páginas
+    ids += [create(client, auth_headers, f"empate {n} #verao", "2030-01-03T12:00:00Z") for n in range(2)]
+    create(client, auth_headers, "sem a tag", "2030-01-04T12:00:00Z")
+    create(client, other_auth_headers, "de outro usuário #verao", "2030-01-04T12:00:00Z")
+
+    found = search_all(client, auth_headers, tag="#Verão", limit=2)
+    posts = {item["id"]: item for item in client.get("/api/v1/posts", headers=auth_headers).json()["items"]}
+    expected = sorted(ids, key=lambda post_id: (posts[post_id]["scheduled_at"], post_id), reverse=True)
+    assert found == expected
+
+    # Várias tags: o post precisa ter todas
+    assert search_all(client, auth_headers, tag=["verao", "@marca"], limit=2) == ids[4::-1]
+
+
+def test_tag_search_follows_rescheduled_post(client, auth_headers):
+    first = create(client, auth_headers, "primeiro #verao", "2030-01-01T12:00:00Z")
+    second = create(client, auth_headers, "segundo #verao", "2030-01-02T12:00:00Z")
+    third = create(client, auth_headers, "terceiro #verao", "2030-01-03T12:00:00Z")
+    assert search_all(client, auth_headers, tag="verao", limit=2) == [third, second, first]
+
+    response = client.patch(
+        f"/api/v1/posts/{first}", json={"scheduled_at": "2030-01-04T12:00:00Z"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert search_all(client, auth_headers, tag="verao", limit=2) == [first, third, second]
+
+    # Trocar a legenda troca as tags do post
+    response = client.patch(f"/api/v1/posts/{third}", json={"content": "terceiro #inverno"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert search_all(client, auth_headers, tag="verao", limit=2) == [first, second]
+    assert search_all(client, auth_headers, tag="inverno") == [third]
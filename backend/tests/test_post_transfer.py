@@ -0,0 +1,97 @@
+"""
+Importação/exportação em massa: erros por linha, ids repetidos (ON CONFLICT DO NOTHING),
+campos CSV com várias linhas e proteção contra fórmulas na exportação CSV.
+"""
+import csv
+import io
+import json
+import uuid
+
+POST = {"content": "legenda", "platform": "instagram", "scheduled_at": "2030-01-01T12:00:00Z"}
+
+
+def import_file(client, headers, body: str, file_format: str = "ndjson"):
+    response = client.post(f"/api/v1/posts/import?format={file_format}", content=body.encode(), headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def ndjson(*rows) -> str:
+    return "".join((row if isinstance(row, str) else json.dumps(row)) + "\n" for row in rows)
+
+
+def list_contents(client, headers) -> list[str]:
+    return [item["content"] for item in client.get("/api/v1/posts", headers=headers).json()["items"]]
+
+
+def test_invalid_rows_are_reported_by_line(client, auth_headers):
+    body = ndjson(
+        POST,
+        "{isso não é json",
+        "",
+        "[1, 2]",
+        {**POST, "content": ""},
+        {**POST, "status": "published"},
+        {**POST, "content": "segundo"},
+    )
+    result = import_file(client, auth_headers, body)
+
+    assert result["inserted"] == 2
+    assert result["failed"] == 4
+    assert [error["line"] for error in result["errors"]] == [2, 4, 5, 6]
+    assert result["errors"][0]["message"].startswith("JSON inválido")
+    assert result["errors"][1]["message"] == "Cada linha deve ser um objeto JSON."
+    assert result["errors"][2]["message"].startswith("content:")
+    assert result["errors"][3]["message"].startswith("status:")
+
+
+def test_repeated_ids_are_skipped(client, auth_headers, other_auth_headers):
+    post_id = str(uuid.uuid4())
+    body = ndjson({**POST, "id": post_id})
+    assert import_file(client, auth_headers, body) == {"inserted": 1, "skipped": 0, "failed": 0, "errors": []}
+    # Reimportar o mesmo arquivo não duplica o post
+    assert import_file(client, auth_headers, body)["skipped"] == 1
+
+    # O id pertence a outro usuário: a linha é ignorada, sem alterar nem expor o post dele
+    other_body = ndjson({**POST, "id": post_id, "content": "de outro usuário"})
+    assert import_file(client, other_auth_headers, other_body)["skipped"] == 1
+    assert list_contents(client, other_auth_headers) == []
+    assert list_contents(client, auth_headers) == ["legenda"]
+
+
+def test_csv_quoted_fields_span_lines(client, auth_headers):
+    body = (
+        "content,platform,scheduled_at\n"
+        '"primeira linha\nsegunda, com vírgula\n""citação""",instagram,2030-01-01T12:00:00Z\n'
+        "sem aspas,instagram,2030-01-02T12:00:00Z\n"
+        "colunas,a mais,2030-01-03T12:00:00Z,extra\n"
+        '"aspas que não fecham,instagram,2030-01-04T12:00:00Z\n'
+    )
+    result = import_file(client, auth_headers, body, "csv")
+
+    assert result["inserted"] == 2
+    assert result["errors"] == [
+        {"line": 6, "message": "Esperadas 3 colunas, encontradas 4."},
+        {"line": 7, "message": "Campo entre aspas não foi fechado."},
+    ]
+    assert list_contents(client, auth_headers) == ['primeira linha\nsegunda, com vírgula\n"citação"', "sem aspas"]
+
+
+def test_csv_export_escapes_formulas(client, auth_headers, other_auth_headers):
+    contents = ['=HYPERLINK("http://exemplo.test","clique")', "+1", "-2", "@marca", "legenda - normal"]
+    import_file(client, auth_headers, ndjson(*({**POST, "content": content} for content in contents)))
+
+    exported = client.get("/api/v1/posts/export?format=csv", headers=auth_headers).text
+    rows = list(csv.DictReader(io.StringIO(exported)))
+    assert sorted(row["content"] for row in rows) == sorted([
+        '\'=HYPERLINK("http://exemplo.test","clique")', "'+1", "'-2", "'@marca", "legenda - normal"
+    ])
+
+    # O arquivo exportado (sem os ids, que já existem) volta ao conteúdo original na importação
+    without_ids = io.StringIO()
+    writer = csv.DictWriter(without_ids, [name for name in rows[0] if name != "id"], extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(rows)
+    result = import_file(client, other_auth_headers, without_ids.getvalue(), "csv")
+    assert result["inserted"] == len(contents)
+    assert sorted(list_contents(client, other_auth_headers)) == sorted(contents)
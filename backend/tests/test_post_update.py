@@ -0,0 +1,48 @@
+"""
+Atualização parcial de posts: campos omitidos são mantidos, null limpa account_id e é
+recusado nos campos obrigatórios.
+"""
+import pytest
+
+POST = {
+    "content": "legenda",
+    "platform": "instagram",
+    "account_id": "conta-1",
+    "scheduled_at": "2030-01-01T12:00:00Z",
+}
+
+
+@pytest.fixture
+def post_id(client, auth_headers) -> str:
+    response = client.post("/api/v1/posts", json=POST, headers=auth_headers)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def get_post(client, headers, post_id: str) -> dict:
+    return client.get(f"/api/v1/posts/{post_id}", headers=headers).json()
+
+
+def test_null_clears_account_id(client, auth_headers, post_id):
+    response = client.patch(f"/api/v1/posts/{post_id}", json={"account_id": None}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["account_id"] is None
+    post = get_post(client, auth_headers, post_id)
+    assert post["account_id"] is None
+    assert post["content"] == POST["content"]
+
+
+def test_omitted_fields_are_kept(client, auth_headers, post_id):
+    response = client.patch(f"/api/v1/posts/{post_id}", json={"content": "editado"}, headers=auth_headers)
+    assert response.status_code == 200
+    post = get_post(client, auth_headers, post_id)
+    assert (post["content"], post["account_id"], post["platform"]) == ("editado", "conta-1", "instagram")
+
+
+@pytest.mark.parametrize("field", ["content", "platform", "scheduled_at", "status"])
+def test_null_is_rejected_for_required_fields(client, auth_headers, post_id, field):
+    before = get_post(client, auth_headers, post_id)
+    response = client.patch(f"/api/v1/posts/{post_id}", json={field: None}, headers=auth_headers)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", field]
+    assert get_post(client, auth_headers, post_id) == before
@@ -0,0 +1,80 @@
+"""
+Orçamento de consultas por rota e detector de N+1 (QUERY_BUDGET_MODE="raise").
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.core.database import async_session_maker
+from app.core.query_budget import QueryBudgetExceeded, QueryBudgetMiddleware, query_budget
+
+settings = get_settings()
+
+
+async def run_queries(count: int, same_shape: bool = False) -> None:
+    async with async_session_maker() as db:
+        for i in range(count):
+            # Mesmo SQL com parâmetros diferentes (N+1) ou um SQL diferente por comando
+            sql = "SELECT :value" if same_shape else f"SELECT :value AS column_{i}"
+            await db.exec(text(sql), params={"value": i})
+
+
+@pytest.fixture
+def budget_client():
+    budget_app = FastAPI()
+    budget_app.add_middleware(
+        QueryBudgetMiddleware, mode="raise", repeat_threshold=settings.QUERY_REPEAT_THRESHOLD
+    )
+
+    @budget_app.get("/within-budget")
+    @query_budget(2)
+    async def within_budget():
+        await run_queries(2)
+        return {}
+
+    @budget_app.get("/over-budget")
+    @query_budget(2)
+    async def over_budget():
+        await run_queries(3)
+        return {}
+
+    @budget_app.get("/n-plus-one")
+    async def n_plus_one():
+        await run_queries(settings.QUERY_REPEAT_THRESHOLD, same_shape=True)
+        return {}
+
+    with TestClient(budget_app) as test_client:
+        yield test_client
+
+
+def test_route_within_budget_passes(budget_client):
+    assert budget_client.get("/within-budget").status_code == 200
+
+
+def test_route_over_budget_fails(budget_client):
+    with pytest.raises(QueryBudgetExceeded, match="mais de 2 comandos SQL"):
+        budget_client.get("/over-budget")
+
+
+def test_repeated_select_trips_n_plus_one_detector(budget_client):
+    with pytest.raises(QueryBudgetExceeded, match="possível N\\+1"):
+        budget_client.get("/n-plus-one")
+
+
+def test_app_routes_stay_within_budget(client, auth_headers):
+    # Rotas reais com @query_budget(1): uma falha aqui aponta a consulta excedente
+    client.post(
+        f"{settings.API_V1_STR}/posts",
+        json={"content": "Post #teste", "platform": "instagram", "scheduled_at": "2030-01-10T10:00:00Z"},
+        headers=auth_headers,
+    )
+    assert client.get(f"{settings.API_V1_STR}/posts", headers=auth_headers).status_code == 200
+    response = client.get(
+        f"{settings.API_V1_STR}/posts/calendar",
+        params={"start": "2030-01-01T00:00:00Z", "end": "2030-02-01T00:00:00Z"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 1
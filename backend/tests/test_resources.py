@@ -0,0 +1,35 @@
+"""
+Recursos do processo: armazenamento e verificador de tokens criados no primeiro uso e
+fechados por aclose_resources() (inclusive o refresh do JWKS ainda em andamento).
+"""
+import asyncio
+
+from app.core.container import aclose_resources
+from app.core.jwt_verifier import get_token_verifier
+from app.core.storage import get_storage
+
+
+def test_storage_and_token_verifier_are_closed_with_resources(run):
+    async def scenario():
+        storage, verifier = get_storage(), get_token_verifier()
+        assert get_storage() is storage and get_token_verifier() is verifier
+
+        started = asyncio.Event()
+
+        async def slow_fetch() -> dict:
+            started.set()
+            await asyncio.sleep(60)
+            return {"keys": []}
+
+        verifier.jwks_cache.fetcher = slow_fetch
+        verifier.jwks_cache._schedule_refresh()
+        refresh = verifier.jwks_cache._refresh_task
+        await started.wait()
+
+        await aclose_resources()
+        return storage, verifier, refresh, get_storage(), get_token_verifier()
+
+    storage, verifier, refresh, new_storage, new_verifier = run(scenario())
+    assert refresh.cancelled()
+    assert new_storage is not storage
+    assert new_verifier is not verifier
@@ -0,0 +1,214 @@
+"""
+Publicador de posts agendados: reservas (lease) e edição de um post já reservado,
+recuperação de leases expirados, novas tentativas com atraso exponencial e as filas
+por conta do dispatcher.
+"""
+import asyncio
+import uuid
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.core.config import get_settings
+from app.core.database import async_session_maker
+from app.models.post import Post, PostStatus, utc_now
+from app.schemas.post import PostUpdate, to_utc
+from app.services import dispatcher as dispatcher_module
+from app.services.dispatcher import PublishDispatcher
+from app.services.post_service import update_post
+from app.services.publishers import FakePublisher, PublishError, PublisherRegistry
+from app.services.scheduler_service import PublishingEngine, retry_delay
+
+settings = get_settings()
+
+
+class FlakyPublisher(FakePublisher):
+    """
+    Falha temporariamente em toda chamada (com o Retry-After pedido, se houver).
+    """
+
+    def __init__(self, retry_after: float | None = None):
+        super().__init__()
+        self.retry_after = retry_after
+        self.calls = 0
+
+    async def publish(self, post: Post) -> str:
+        self.calls += 1
+        raise PublishError("Rede indisponível (fake).", retry_after=self.retry_after)
+
+
+async def create_due_post(user_id: uuid.UUID, **fields) -> Post:
+    fields = {
+        "content": "legenda",
+        "platform": "instagram",
+        "status": PostStatus.SCHEDULED.value,
+        "scheduled_at": utc_now() - timedelta(seconds=1),
+        **fields,
+    }
+    post = Post(user_id=user_id, **fields)
+    async with async_session_maker() as db:
+        db.add(post)
+        await db.commit()
+    return post
+
+
+async def get_post(post_id: uuid.UUID) -> Post:
+    async with async_session_maker() as db:
+        return await db.get(Post, post_id)
+
+
+async def publish_due(engine: PublishingEngine) -> None:
+    engine.fire_due()
+    await asyncio.gather(*engine._tasks)
+
+
+def test_edit_between_claims_publishes_once(run):
+    async def scenario():
+        user_id = uuid.uuid4()
+        publisher = FakePublisher()
+        engine = PublishingEngine(PublisherRegistry(default=publisher), owner="test-edit")
+        post = await create_due_post(user_id)
+
+        await engine.fill()
+        first_token = (await get_post(post.id)).lease_owner
+        # A edição desfaz a reserva; o próximo fill reserva o post de novo
+        async with async_session_maker() as db:
+            await update_post(user_id, post.id, PostUpdate(content="editado"), db)
+        await engine.fill()
+        second_token = (await get_post(post.id)).lease_owner
+
+        assert first_token != second_token
+        assert [entry[1] for entry in engine._heap].count(post.id) == 2
+        await publish_due(engine)
+        await engine.shutdown()
+        return publisher.published.get(post.id), await get_post(post.id)
+
+    published, post = run(scenario())
+    assert published == 1
+    assert post.status == PostStatus.PUBLISHED.value
+    assert post.content == "editado"
+
+
+def test_expired_publishing_lease_is_reclaimed(run):
+    async def scenario():
+        user_id = uuid.uuid4()
+        publisher = FakePublisher()
+        engine = PublishingEngine(PublisherRegistry(default=publisher), owner="test-reclaim")
+        # Processo que morreu no meio da publicação: o lease venceu com o post em 'publishing'
+        stale = await create_due_post(
+            user_id,
+            status=PostStatus.PUBLISHING.value,
+            attempts=1,
+            lease_owner="morto/abc",
+            lease_expires_at=utc_now() - timedelta(seconds=1),
+        )
+        # Publicação ainda em andamento em outro processo: não é tocada
+        live = await create_due_post(
+            user_id,
+            status=PostStatus.PUBLISHING.value,
+            attempts=1,
+            lease_owner="vivo/abc",
+            lease_expires_at=utc_now() + timedelta(minutes=5),
+        )
+
+        assert await engine.fill() == 1
+        await publish_due(engine)
+        await engine.shutdown()
+        return publisher.published, await get_post(stale.id), await get_post(live.id)
+
+    published, stale, live = run(scenario())
+    assert published == {stale.id: 1}
+    assert stale.status == PostStatus.PUBLISHED.value
+    assert stale.attempts == 2
+    assert stale.lease_owner is None
+    assert live.status == PostStatus.PUBLISHING.value
+    assert live.lease_owner == "vivo/abc"
+
+
+def test_retry_delay_doubles_up_to_max():
+    base = settings.SCHEDULER_RETRY_BACKOFF_SECONDS
+    assert [retry_delay(attempts).total_seconds() for attempts in (1, 2, 3)] == [base, base * 2, base * 4]
+    assert retry_delay(30).total_seconds() == settings.SCHEDULER_RETRY_BACKOFF_MAX_SECONDS
+
+
+def test_retryable_failures_back_off_until_max_attempts(run, monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_MAX_ATTEMPTS", 3)
+
+    async def scenario():
+        publisher = FlakyPublisher()
+        engine = PublishingEngine(PublisherRegistry(default=publisher), owner="test-retry")
+        post = await create_due_post(uuid.uuid4())
+        history = []
+        for _ in range(settings.SCHEDULER_MAX_ATTEMPTS):
+            assert await engine.fill() == 1
+            started = utc_now()
+            await publish_due(engine)
+            current = await get_post(post.id)
+            history.append(current)
+            if current.status != PostStatus.SCHEDULED.value:
+                break
+            # Durante o atraso o post não é reservado de novo
+            assert await engine.fill() == 0
+            delay = to_utc(current.lease_expires_at) - started
+            assert abs(delay - retry_delay(current.attempts)) < timedelta(seconds=5)
+            # Simula a passagem do tempo até a próxima tentativa
+            async with async_session_maker() as db:
+                await db.exec(
+                    update(Post).where(Post.id == post.id).values(lease_expires_at=utc_now() - timedelta(seconds=1))
+                )
+                await db.commit()
+        await engine.shutdown()
+        return publisher.calls, history
+
+    calls, history = run(scenario())
+    assert calls == 3
+    assert [post.status for post in history] == [
+        PostStatus.SCHEDULED.value, PostStatus.SCHEDULED.value, PostStatus.FAILED.value
+    ]
+    assert [post.attempts for post in history] == [1, 2, 3]
+    assert all(post.lease_owner is None for post in history)
+    assert history[-1].lease_expires_at is None
+    assert history[-1].last_error == "Rede indisponível (fake)."
+
+
+def test_retry_after_from_network_extends_backoff(run):
+    async def scenario():
+        engine = PublishingEngine(PublisherRegistry(default=FlakyPublisher(retry_after=600)), owner="test-retry-after")
+        post = await create_due_post(uuid.uuid4())
+        await engine.fill()
+        started = utc_now()
+        await publish_due(engine)
+        await engine.shutdown()
+        return started, await get_post(post.id)
+
+    started, post = run(scenario())
+    assert post.status == PostStatus.SCHEDULED.value
+    assert abs(to_utc(post.lease_expires_at) - started - timedelta(seconds=600)) < timedelta(seconds=5)
+
+
+@pytest.mark.parametrize("pause", [0.0, 0.3])
+def test_idle_lanes_are_evicted(run, monkeypatch, pause):
+    monkeypatch.setattr(dispatcher_module, "LANE_IDLE_SECONDS", 0.05)
+
+    async def scenario():
+        publisher = FakePublisher()
+        publisher.rate_per_second = 100.0
+        dispatcher = PublishDispatcher(PublisherRegistry(default=publisher))
+        post = Post(user_id=uuid.uuid4(), content="legenda", platform="instagram", scheduled_at=utc_now())
+        with dispatcher.admit("instagram", "conta"):
+            await dispatcher.submit(post, "conta")
+        lane = dispatcher._lanes[("instagram", "conta")]
+        # Pausa pedida pela rede (Retry-After): a fila guarda o bucket até a pausa acabar
+        lane.bucket.pause(pause)
+        await asyncio.sleep(0.2)
+        during_pause = ("instagram", "conta") in dispatcher._lanes
+        await asyncio.sleep(pause + 0.2)
+        after = dict(dispatcher._lanes)
+        await dispatcher.aclose()
+        return during_pause, after, lane
+
+    during_pause, after, lane = run(scenario())
+    assert during_pause == bool(pause)
+    assert after == {}
+    assert lane.task is None
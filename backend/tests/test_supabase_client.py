@@ -0,0 +1,182 @@
+"""
+Retry com backoff + jitter, circuit breaker e mapeamento para 503 do SupabaseAuthClient,
+com um httpx.MockTransport no lugar do Supabase.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.config import get_settings
+from app.core.supabase import CircuitBreaker, CircuitOpenError, SupabaseAuthClient
+from app.main import app
+
+settings = get_settings()
+
+
+class FakeSupabase:
+    """
+    Handler do MockTransport: devolve (ou levanta) os resultados na ordem e conta as chamadas.
+    """
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        result = self.results.pop(0) if len(self.results) > 1 else self.results[0]
+        if isinstance(result, Exception):
+            raise result
+        return httpx.Response(result, json={})
+
+
+def make_client(handler, *, max_retries=2, failure_threshold=5, reset_timeout=30.0) -> SupabaseAuthClient:
+    return SupabaseAuthClient(
+        "http://supabase.test",
+        "test",
+        limits=httpx.Limits(),
+        timeout=httpx.Timeout(1.0),
+        http2=False,
+        max_retries=max_retries,
+        # Sem espera entre as tentativas
+        backoff_base=0.0,
+        backoff_max=0.0,
+        breaker=CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout),
+        transport=httpx.MockTransport(handler),
+    )
+
+
+async def call(client: SupabaseAuthClient, *, idempotent=True):
+    try:
+        return await client.request("POST", "/auth/v1/test", idempotent=idempotent)
+    finally:
+        await client.aclose()
+
+
+# --- Retry ---
+
+def test_retries_5xx_until_success():
+    supabase = FakeSupabase(503, 500, 200)
+    response = asyncio.run(call(make_client(supabase)))
+    assert response.status_code == 200
+    assert supabase.calls == 3
+
+
+def test_returns_last_5xx_after_max_retries():
+    supabase = FakeSupabase(500)
+    response = asyncio.run(call(make_client(supabase, max_retries=2)))
+    assert response.status_code == 500
+    assert supabase.calls == 3
+
+
+def test_4xx_is_not_retried():
+    supabase = FakeSupabase(400)
+    assert asyncio.run(call(make_client(supabase))).status_code == 400
+    assert supabase.calls == 1
+
+
+def test_connect_error_is_retried_then_raised():
+    supabase = FakeSupabase(httpx.ConnectError("recusada"))
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(call(make_client(supabase, max_retries=2)))
+    assert supabase.calls == 3
+
+
+def test_non_idempotent_call_retries_only_when_not_processed():
+    # 500 e timeout de leitura: o signup pode ter sido criado, não repete
+    supabase = FakeSupabase(500)
+    assert asyncio.run(call(make_client(supabase), idempotent=False)).status_code == 500
+    assert supabase.calls == 1
+
+    supabase = FakeSupabase(httpx.ReadTimeout("lento"))
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(call(make_client(supabase), idempotent=False))
+    assert supabase.calls == 1
+
+    # 503 do gateway e erro de conexão: a requisição não chegou, repete
+    supabase = FakeSupabase(503, httpx.ConnectError("recusada"), 200)
+    assert asyncio.run(call(make_client(supabase), idempotent=False)).status_code == 200
+    assert supabase.calls == 3
+
+
+def test_backoff_is_jittered_and_capped():
+    client = make_client(FakeSupabase(200))
+    client.backoff_base, client.backoff_max = 0.2, 1.0
+    for attempt, cap in ((0, 0.2), (1, 0.4), (2, 0.8), (5, 1.0)):
+        delays = [client._backoff(attempt) for _ in range(200)]
+        assert all(0 <= delay <= cap for delay in delays)
+        assert len(set(delays)) > 1
+    asyncio.run(client.aclose())
+
+
+# --- Circuit breaker ---
+
+def test_breaker_opens_then_half_open_trial_closes_it():
+    async def scenario():
+        supabase = FakeSupabase(500, 500, 200)
+        client = make_client(supabase, max_retries=0, failure_threshold=2, reset_timeout=0.05)
+        try:
+            for _ in range(2):
+                assert (await client.request("GET", "/auth/v1/test")).status_code == 500
+            assert client.breaker.state == "open"
+            # Aberto: falha sem chamar o Supabase
+            with pytest.raises(CircuitOpenError):
+                await client.request("GET", "/auth/v1/test")
+            assert supabase.calls == 2
+
+            await asyncio.sleep(0.06)
+            assert client.breaker.state == "half-open"
+            assert (await client.request("GET", "/auth/v1/test")).status_code == 200
+            assert client.breaker.state == "closed"
+            assert supabase.calls == 3
+        finally:
+            await client.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_failed_half_open_trial_reopens_breaker():
+    async def scenario():
+        supabase = FakeSupabase(500)
+        client = make_client(supabase, max_retries=0, failure_threshold=1, reset_timeout=0.05)
+        try:
+            await client.request("GET", "/auth/v1/test")
+            await asyncio.sleep(0.06)
+            assert client.breaker.state == "half-open"
+            await client.request("GET", "/auth/v1/test")
+            assert client.breaker.state == "open"
+            assert supabase.calls == 2
+        finally:
+            await client.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_half_open_allows_a_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.release_trial()
+    breaker.before_call()
+
+
+# --- Endpoints de autenticação ---
+
+def test_auth_endpoints_return_503_while_circuit_is_open(client):
+    supabase = FakeSupabase(200)
+    open_client = make_client(supabase, failure_threshold=1)
+    open_client.breaker.record_failure()
+    app.state.supabase = open_client
+    try:
+        credentials = {"email": "user@example.com", "password": "secret-password"}
+        response = client.post(f"{settings.API_V1_STR}/auth/register", json={**credentials, "name": "User"})
+        assert response.status_code == 503
+        assert response.json()["detail"]["code"] == "SERVICE_UNAVAILABLE"
+        response = client.post(f"{settings.API_V1_STR}/auth/login", json=credentials)
+        assert response.status_code == 503
+        assert supabase.calls == 0
+    finally:
+        client.portal.call(open_client.aclose)